@@ -6,16 +6,43 @@ d = { 'settings': { 'branch': 'main',
                 'git_url': 'https://github.com/alvaro-francisco-gil/orbit-generation',
                 'lib_path': 'orbit_generation'},
   'syms': { 'orbit_generation.constants': {},
-            'orbit_generation.data': { 'orbit_generation.data.get_example_orbit_data': ( 'data.html#get_example_orbit_data',
+            'orbit_generation.data': { 'orbit_generation.data._hdf5_compression': ( 'data.html#_hdf5_compression',
+                                                                                    'orbit_generation/data.py'),
+                                       'orbit_generation.data._write_gzip_chunks': ( 'data.html#_write_gzip_chunks',
+                                                                                     'orbit_generation/data.py'),
+                                       'orbit_generation.data.benchmark_save_data': ( 'data.html#benchmark_save_data',
+                                                                                      'orbit_generation/data.py'),
+                                       'orbit_generation.data.block_shuffle_indices': ( 'data.html#block_shuffle_indices',
+                                                                                        'orbit_generation/data.py'),
+                                       'orbit_generation.data.build_class_index': ( 'data.html#build_class_index',
+                                                                                    'orbit_generation/data.py'),
+                                       'orbit_generation.data.get_example_orbit_data': ( 'data.html#get_example_orbit_data',
                                                                                          'orbit_generation/data.py'),
                                        'orbit_generation.data.get_orbit_features': ( 'data.html#get_orbit_features',
                                                                                      'orbit_generation/data.py'),
+                                       'orbit_generation.data.import_times': ('data.html#import_times', 'orbit_generation/data.py'),
                                        'orbit_generation.data.load_memmap_array': ( 'data.html#load_memmap_array',
                                                                                     'orbit_generation/data.py'),
                                        'orbit_generation.data.load_orbit_data': ('data.html#load_orbit_data', 'orbit_generation/data.py'),
                                        'orbit_generation.data.sample_orbits': ('data.html#sample_orbits', 'orbit_generation/data.py'),
-                                       'orbit_generation.data.save_data': ('data.html#save_data', 'orbit_generation/data.py')},
-            'orbit_generation.dataset': { 'orbit_generation.dataset.get_first_period_dataset': ( 'dataset.html#get_first_period_dataset',
+                                       'orbit_generation.data.save_data': ('data.html#save_data', 'orbit_generation/data.py'),
+                                       'orbit_generation.data.shuffle_mixing': ('data.html#shuffle_mixing', 'orbit_generation/data.py'),
+                                       'orbit_generation.data.shuffled_batches': ('data.html#shuffled_batches', 'orbit_generation/data.py'),
+                                       'orbit_generation.data.take_orbits': ('data.html#take_orbits', 'orbit_generation/data.py')},
+            'orbit_generation.dataset': { 'orbit_generation.dataset._is_packed': ('dataset.html#_is_packed', 'orbit_generation/dataset.py'),
+                                          'orbit_generation.dataset._orbit_keys_from_hdf5': ( 'dataset.html#_orbit_keys_from_hdf5',
+                                                                                              'orbit_generation/dataset.py'),
+                                          'orbit_generation.dataset._sample_orbit_chunk': ( 'dataset.html#_sample_orbit_chunk',
+                                                                                            'orbit_generation/dataset.py'),
+                                          'orbit_generation.dataset._sampled_chunks': ( 'dataset.html#_sampled_chunks',
+                                                                                        'orbit_generation/dataset.py'),
+                                          'orbit_generation.dataset._system_features_from_hdf5': ( 'dataset.html#_system_features_from_hdf5',
+                                                                                                   'orbit_generation/dataset.py'),
+                                          'orbit_generation.dataset._write_dataset_manifest': ( 'dataset.html#_write_dataset_manifest',
+                                                                                                'orbit_generation/dataset.py'),
+                                          'orbit_generation.dataset.build_orbit_dataset': ( 'dataset.html#build_orbit_dataset',
+                                                                                            'orbit_generation/dataset.py'),
+                                          'orbit_generation.dataset.get_first_period_dataset': ( 'dataset.html#get_first_period_dataset',
                                                                                                  'orbit_generation/dataset.py'),
                                           'orbit_generation.dataset.get_orbit_data_from_hdf5': ( 'dataset.html#get_orbit_data_from_hdf5',
                                                                                                  'orbit_generation/dataset.py'),
@@ -24,34 +51,176 @@ d = { 'settings': { 'branch': 'main',
                                           'orbit_generation.dataset.get_orbit_features_from_hdf5': ( 'dataset.html#get_orbit_features_from_hdf5',
                                                                                                      'orbit_generation/dataset.py'),
                                           'orbit_generation.dataset.get_segmented_dataset': ( 'dataset.html#get_segmented_dataset',
-                                                                                              'orbit_generation/dataset.py')},
+                                                                                              'orbit_generation/dataset.py'),
+                                          'orbit_generation.dataset.read_segments': ( 'dataset.html#read_segments',
+                                                                                      'orbit_generation/dataset.py'),
+                                          'orbit_generation.dataset.segment_batches': ( 'dataset.html#segment_batches',
+                                                                                        'orbit_generation/dataset.py'),
+                                          'orbit_generation.dataset.virtual_segment_dataset': ( 'dataset.html#virtual_segment_dataset',
+                                                                                                'orbit_generation/dataset.py')},
             'orbit_generation.model': {'orbit_generation.model.get_optimizer': ('model.html#get_optimizer', 'orbit_generation/model.py')},
-            'orbit_generation.processing': { 'orbit_generation.processing.add_time_vector_to_orbits': ( 'processing.html#add_time_vector_to_orbits',
+            'orbit_generation.neighbors': { 'orbit_generation.neighbors._brute_force_neighbors': ( 'neighbors.html#_brute_force_neighbors',
+                                                                                                   'orbit_generation/neighbors.py'),
+                                            'orbit_generation.neighbors.build_orbit_index': ( 'neighbors.html#build_orbit_index',
+                                                                                              'orbit_generation/neighbors.py'),
+                                            'orbit_generation.neighbors.flatten_orbits': ( 'neighbors.html#flatten_orbits',
+                                                                                           'orbit_generation/neighbors.py'),
+                                            'orbit_generation.neighbors.load_orbit_index': ( 'neighbors.html#load_orbit_index',
+                                                                                             'orbit_generation/neighbors.py'),
+                                            'orbit_generation.neighbors.novelty_metrics': ( 'neighbors.html#novelty_metrics',
+                                                                                            'orbit_generation/neighbors.py'),
+                                            'orbit_generation.neighbors.query_orbit_index': ( 'neighbors.html#query_orbit_index',
+                                                                                              'orbit_generation/neighbors.py'),
+                                            'orbit_generation.neighbors.save_orbit_index': ( 'neighbors.html#save_orbit_index',
+                                                                                             'orbit_generation/neighbors.py')},
+            'orbit_generation.processing': { 'orbit_generation.processing._apply_feature_scaling': ( 'processing.html#_apply_feature_scaling',
+                                                                                                     'orbit_generation/processing.py'),
+                                             'orbit_generation.processing._float_dtype': ( 'processing.html#_float_dtype',
+                                                                                           'orbit_generation/processing.py'),
+                                             'orbit_generation.processing.add_time_vector_to_orbits': ( 'processing.html#add_time_vector_to_orbits',
                                                                                                         'orbit_generation/processing.py'),
                                              'orbit_generation.processing.average_downsample_3d_array': ( 'processing.html#average_downsample_3d_array',
                                                                                                           'orbit_generation/processing.py'),
+                                             'orbit_generation.processing.collate_packed': ( 'processing.html#collate_packed',
+                                                                                             'orbit_generation/processing.py'),
+                                             'orbit_generation.processing.fit_feature_scaler': ( 'processing.html#fit_feature_scaler',
+                                                                                                 'orbit_generation/processing.py'),
+                                             'orbit_generation.processing.inverse_scale_features': ( 'processing.html#inverse_scale_features',
+                                                                                                     'orbit_generation/processing.py'),
+                                             'orbit_generation.processing.load_feature_scaler': ( 'processing.html#load_feature_scaler',
+                                                                                                  'orbit_generation/processing.py'),
+                                             'orbit_generation.processing.pack_orbits': ( 'processing.html#pack_orbits',
+                                                                                          'orbit_generation/processing.py'),
+                                             'orbit_generation.processing.packed_batches': ( 'processing.html#packed_batches',
+                                                                                             'orbit_generation/processing.py'),
                                              'orbit_generation.processing.pad_and_convert_to_3d': ( 'processing.html#pad_and_convert_to_3d',
                                                                                                     'orbit_generation/processing.py'),
                                              'orbit_generation.processing.reorder_orbits': ( 'processing.html#reorder_orbits',
                                                                                              'orbit_generation/processing.py'),
                                              'orbit_generation.processing.resample_3d_array': ( 'processing.html#resample_3d_array',
                                                                                                 'orbit_generation/processing.py'),
+                                             'orbit_generation.processing.save_feature_scaler': ( 'processing.html#save_feature_scaler',
+                                                                                                  'orbit_generation/processing.py'),
+                                             'orbit_generation.processing.scale_features': ( 'processing.html#scale_features',
+                                                                                             'orbit_generation/processing.py'),
                                              'orbit_generation.processing.segment_and_convert_to_3d': ( 'processing.html#segment_and_convert_to_3d',
-                                                                                                        'orbit_generation/processing.py')},
-            'orbit_generation.propagation': { 'orbit_generation.propagation.calculate_errors': ( 'propagation.html#calculate_errors',
+                                                                                                        'orbit_generation/processing.py'),
+                                             'orbit_generation.processing.unpack_orbit': ( 'processing.html#unpack_orbit',
+                                                                                           'orbit_generation/processing.py')},
+            'orbit_generation.profiling': { 'orbit_generation.profiling._array_bytes': ( 'profiling.html#_array_bytes',
+                                                                                         'orbit_generation/profiling.py'),
+                                            'orbit_generation.profiling._record': ( 'profiling.html#_record',
+                                                                                    'orbit_generation/profiling.py'),
+                                            'orbit_generation.profiling.instrument': ( 'profiling.html#instrument',
+                                                                                       'orbit_generation/profiling.py'),
+                                            'orbit_generation.profiling.load_profile': ( 'profiling.html#load_profile',
+                                                                                         'orbit_generation/profiling.py'),
+                                            'orbit_generation.profiling.profile_run': ( 'profiling.html#profile_run',
+                                                                                        'orbit_generation/profiling.py'),
+                                            'orbit_generation.profiling.profile_summary': ( 'profiling.html#profile_summary',
+                                                                                            'orbit_generation/profiling.py'),
+                                            'orbit_generation.profiling.record_solver': ( 'profiling.html#record_solver',
+                                                                                          'orbit_generation/profiling.py'),
+                                            'orbit_generation.profiling.save_profile': ( 'profiling.html#save_profile',
+                                                                                         'orbit_generation/profiling.py')},
+            'orbit_generation.propagation': { 'orbit_generation.propagation._batch_tolerances': ( 'propagation.html#_batch_tolerances',
+                                                                                                  'orbit_generation/propagation.py'),
+                                              'orbit_generation.propagation._coarse_to_fine_order': ( 'propagation.html#_coarse_to_fine_order',
+                                                                                                      'orbit_generation/propagation.py'),
+                                              'orbit_generation.propagation._eom_cr3bp_normalized': ( 'propagation.html#_eom_cr3bp_normalized',
+                                                                                                      'orbit_generation/propagation.py'),
+                                              'orbit_generation.propagation._eom_cr3bp_stm_normalized': ( 'propagation.html#_eom_cr3bp_stm_normalized',
+                                                                                                          'orbit_generation/propagation.py'),
+                                              'orbit_generation.propagation._prop_node_cache_get': ( 'propagation.html#_prop_node_cache_get',
+                                                                                                     'orbit_generation/propagation.py'),
+                                              'orbit_generation.propagation._prop_node_cache_key': ( 'propagation.html#_prop_node_cache_key',
+                                                                                                     'orbit_generation/propagation.py'),
+                                              'orbit_generation.propagation._prop_node_cache_put': ( 'propagation.html#_prop_node_cache_put',
+                                                                                                     'orbit_generation/propagation.py'),
+                                              'orbit_generation.propagation._prop_node_cache_remember': ( 'propagation.html#_prop_node_cache_remember',
+                                                                                                          'orbit_generation/propagation.py'),
+                                              'orbit_generation.propagation._prop_node_memory_entry_bytes': ( 'propagation.html#_prop_node_memory_entry_bytes',
+                                                                                                              'orbit_generation/propagation.py'),
+                                              'orbit_generation.propagation._prop_stm_chunk': ( 'propagation.html#_prop_stm_chunk',
+                                                                                                'orbit_generation/propagation.py'),
+                                              'orbit_generation.propagation.budgeted_dynamics_defect': ( 'propagation.html#budgeted_dynamics_defect',
+                                                                                                         'orbit_generation/propagation.py'),
+                                              'orbit_generation.propagation.budgeted_dynamics_defects': ( 'propagation.html#budgeted_dynamics_defects',
+                                                                                                          'orbit_generation/propagation.py'),
+                                              'orbit_generation.propagation.calculate_errors': ( 'propagation.html#calculate_errors',
                                                                                                  'orbit_generation/propagation.py'),
+                                              'orbit_generation.propagation.catalog_stability_indices': ( 'propagation.html#catalog_stability_indices',
+                                                                                                          'orbit_generation/propagation.py'),
+                                              'orbit_generation.propagation.clear_prop_node_cache': ( 'propagation.html#clear_prop_node_cache',
+                                                                                                      'orbit_generation/propagation.py'),
+                                              'orbit_generation.propagation.correct_periodic_orbits': ( 'propagation.html#correct_periodic_orbits',
+                                                                                                        'orbit_generation/propagation.py'),
+                                              'orbit_generation.propagation.disable_prop_node_cache': ( 'propagation.html#disable_prop_node_cache',
+                                                                                                        'orbit_generation/propagation.py'),
                                               'orbit_generation.propagation.dynamics_defect': ( 'propagation.html#dynamics_defect',
                                                                                                 'orbit_generation/propagation.py'),
+                                              'orbit_generation.propagation.dynamics_defects': ( 'propagation.html#dynamics_defects',
+                                                                                                 'orbit_generation/propagation.py'),
+                                              'orbit_generation.propagation.enable_prop_node_cache': ( 'propagation.html#enable_prop_node_cache',
+                                                                                                       'orbit_generation/propagation.py'),
                                               'orbit_generation.propagation.eom_cr3bp': ( 'propagation.html#eom_cr3bp',
                                                                                           'orbit_generation/propagation.py'),
                                               'orbit_generation.propagation.jacobi_constant': ( 'propagation.html#jacobi_constant',
                                                                                                 'orbit_generation/propagation.py'),
+                                              'orbit_generation.propagation.jacobi_constants': ( 'propagation.html#jacobi_constants',
+                                                                                                 'orbit_generation/propagation.py'),
+                                              'orbit_generation.propagation.jacobi_spread': ( 'propagation.html#jacobi_spread',
+                                                                                              'orbit_generation/propagation.py'),
                                               'orbit_generation.propagation.jacobi_test': ( 'propagation.html#jacobi_test',
                                                                                             'orbit_generation/propagation.py'),
                                               'orbit_generation.propagation.prop_node': ( 'propagation.html#prop_node',
-                                                                                          'orbit_generation/propagation.py')},
-            'orbit_generation.stats': { 'orbit_generation.stats.calculate_overall_statistics': ( 'statistics.html#calculate_overall_statistics',
+                                                                                          'orbit_generation/propagation.py'),
+                                              'orbit_generation.propagation.prop_node_cache_info': ( 'propagation.html#prop_node_cache_info',
+                                                                                                     'orbit_generation/propagation.py'),
+                                              'orbit_generation.propagation.prop_nodes': ( 'propagation.html#prop_nodes',
+                                                                                           'orbit_generation/propagation.py'),
+                                              'orbit_generation.propagation.prop_stm': ( 'propagation.html#prop_stm',
+                                                                                         'orbit_generation/propagation.py'),
+                                              'orbit_generation.propagation.screen_orbits': ( 'propagation.html#screen_orbits',
+                                                                                              'orbit_generation/propagation.py'),
+                                              'orbit_generation.propagation.shooting_nodes': ( 'propagation.html#shooting_nodes',
+                                                                                               'orbit_generation/propagation.py'),
+                                              'orbit_generation.propagation.stability_indices': ( 'propagation.html#stability_indices',
+                                                                                                  'orbit_generation/propagation.py')},
+            'orbit_generation.reports': { 'orbit_generation.reports._init_headless_worker': ( 'reports.html#_init_headless_worker',
+                                                                                              'orbit_generation/reports.py'),
+                                          'orbit_generation.reports._render_plot_spec': ( 'reports.html#_render_plot_spec',
+                                                                                          'orbit_generation/reports.py'),
+                                          'orbit_generation.reports._resolve_plot_function': ( 'reports.html#_resolve_plot_function',
+                                                                                               'orbit_generation/reports.py'),
+                                          'orbit_generation.reports.render_figures': ( 'reports.html#render_figures',
+                                                                                       'orbit_generation/reports.py')},
+            'orbit_generation.spectral': { 'orbit_generation.spectral.evaluate_spectral': ( 'spectral.html#evaluate_spectral',
+                                                                                            'orbit_generation/spectral.py'),
+                                           'orbit_generation.spectral.fit_spectral': ( 'spectral.html#fit_spectral',
+                                                                                       'orbit_generation/spectral.py'),
+                                           'orbit_generation.spectral.spectral_compression_report': ( 'spectral.html#spectral_compression_report',
+                                                                                                      'orbit_generation/spectral.py'),
+                                           'orbit_generation.spectral.spectral_resample': ( 'spectral.html#spectral_resample',
+                                                                                            'orbit_generation/spectral.py')},
+            'orbit_generation.stats': { 'orbit_generation.stats._dtw_series': ('statistics.html#_dtw_series', 'orbit_generation/stats.py'),
+                                        'orbit_generation.stats._histogram_cache_key': ( 'statistics.html#_histogram_cache_key',
+                                                                                         'orbit_generation/stats.py'),
+                                        'orbit_generation.stats._reduction_model': ( 'statistics.html#_reduction_model',
+                                                                                     'orbit_generation/stats.py'),
+                                        'orbit_generation.stats.calculate_overall_statistics': ( 'statistics.html#calculate_overall_statistics',
                                                                                                  'orbit_generation/stats.py'),
+                                        'orbit_generation.stats.dtw_distance_matrix': ( 'statistics.html#dtw_distance_matrix',
+                                                                                        'orbit_generation/stats.py'),
+                                        'orbit_generation.stats.dtw_nearest_neighbors': ( 'statistics.html#dtw_nearest_neighbors',
+                                                                                          'orbit_generation/stats.py'),
+                                        'orbit_generation.stats.histogram_counts': ( 'statistics.html#histogram_counts',
+                                                                                     'orbit_generation/stats.py'),
+                                        'orbit_generation.stats.histogram_edges': ( 'statistics.html#histogram_edges',
+                                                                                    'orbit_generation/stats.py'),
+                                        'orbit_generation.stats.lb_keogh': ('statistics.html#lb_keogh', 'orbit_generation/stats.py'),
+                                        'orbit_generation.stats.lb_keogh_envelopes': ( 'statistics.html#lb_keogh_envelopes',
+                                                                                       'orbit_generation/stats.py'),
                                         'orbit_generation.stats.plot_combined_latent_space': ( 'statistics.html#plot_combined_latent_space',
                                                                                                'orbit_generation/stats.py'),
                                         'orbit_generation.stats.plot_combined_latent_space_with_labels': ( 'statistics.html#plot_combined_latent_space_with_labels',
@@ -66,7 +235,23 @@ d = { 'settings': { 'branch': 'main',
                                                                                             'orbit_generation/stats.py'),
                                         'orbit_generation.stats.plot_time_increments': ( 'statistics.html#plot_time_increments',
                                                                                          'orbit_generation/stats.py')},
-            'orbit_generation.visualize': { 'orbit_generation.visualize.export_dynamic_orbits_html': ( 'visualization.html#export_dynamic_orbits_html',
+            'orbit_generation.validation': { 'orbit_generation.validation._prepare_generated_orbits': ( 'validation.html#_prepare_generated_orbits',
+                                                                                                        'orbit_generation/validation.py'),
+                                             'orbit_generation.validation._save_score_table': ( 'validation.html#_save_score_table',
+                                                                                                'orbit_generation/validation.py'),
+                                             'orbit_generation.validation.validate_generated_orbits': ( 'validation.html#validate_generated_orbits',
+                                                                                                        'orbit_generation/validation.py')},
+            'orbit_generation.visualize': { 'orbit_generation.visualize._build_orbits_figure': ( 'visualization.html#_build_orbits_figure',
+                                                                                                 'orbit_generation/visualize.py'),
+                                            'orbit_generation.visualize._cached_aggregate': ( 'visualization.html#_cached_aggregate',
+                                                                                              'orbit_generation/visualize.py'),
+                                            'orbit_generation.visualize._typed_array': ( 'visualization.html#_typed_array',
+                                                                                         'orbit_generation/visualize.py'),
+                                            'orbit_generation.visualize.compute_grouped_aggregates': ( 'visualization.html#compute_grouped_aggregates',
+                                                                                                       'orbit_generation/visualize.py'),
+                                            'orbit_generation.visualize.compute_value_proportions': ( 'visualization.html#compute_value_proportions',
+                                                                                                      'orbit_generation/visualize.py'),
+                                            'orbit_generation.visualize.export_dynamic_orbits_html': ( 'visualization.html#export_dynamic_orbits_html',
                                                                                                        'orbit_generation/visualize.py'),
                                             'orbit_generation.visualize.plot_grouped_features': ( 'visualization.html#plot_grouped_features',
                                                                                                   'orbit_generation/visualize.py'),
@@ -1,31 +1,34 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/01_data.ipynb.
 
 # %% auto 0
-__all__ = ['load_orbit_data', 'load_memmap_array', 'get_orbit_features', 'save_data', 'get_example_orbit_data', 'sample_orbits']
+__all__ = ['load_orbit_data', 'load_memmap_array', 'get_orbit_features', 'save_data', 'benchmark_save_data',
+           'get_example_orbit_data', 'build_class_index', 'take_orbits', 'sample_orbits', 'import_times',
+           'block_shuffle_indices', 'shuffled_batches', 'shuffle_mixing']
 
 # %% ../nbs/01_data.ipynb 2
 import h5py
-from scipy.io import loadmat
 import numpy as np
 import os
 import pandas as pd
-from typing import Optional, Any
+from typing import Optional, Any, Dict, Union, List, Sequence
 
-# %% ../nbs/01_data.ipynb 3
-from unittest.mock import patch, MagicMock
-from fastcore.test import test_eq
+from .profiling import instrument
 
 # %% ../nbs/01_data.ipynb 5
+@instrument(bytes_from='output')
 def load_orbit_data(file_path: str,  # The path to the .mat, .h5, or .npy file.
                     variable_name: Optional[str] = None,  # Name of the variable in the .mat file, optional.
-                    dataset_path: Optional[str] = None  # Path to the dataset in the .h5 file, optional.
+                    dataset_path: Optional[str] = None,  # Path to the dataset in the .h5 file, optional.
+                    dtype: Optional[np.dtype] = None  # Cast the data on read, e.g. np.float32, optional.
                    ) -> Any:  # The loaded orbit data.
     """
     Load orbit data from MATLAB .mat files, HDF5 .h5 files, or NumPy .npy files.
+    HDF5 data is converted by h5py while reading, so a float32 load never holds a float64 copy of the dataset.
     """
     if file_path.endswith('.mat'):
         if variable_name is None:
             raise ValueError("variable_name must be provided for .mat files")
+        from scipy.io import loadmat  # Only needed for MATLAB files.
         mat = loadmat(file_path)
         if variable_name in mat:
             data = mat[variable_name]
@@ -37,7 +40,7 @@ def load_orbit_data(file_path: str,  # The path to the .mat, .h5, or .npy file.
             if dataset_path is None:
                 raise ValueError("dataset_path must be provided for .h5 files")
             if dataset_path in file:
-                data = np.array(file[dataset_path])
+                data = np.array(file[dataset_path]) if dtype is None else file[dataset_path].astype(dtype)[()]
             else:
                 raise ValueError(f"{dataset_path} not found in {file_path}")
 
@@ -46,10 +49,13 @@ def load_orbit_data(file_path: str,  # The path to the .mat, .h5, or .npy file.
 
     else:
         raise ValueError("Unsupported file format. Please provide a .mat, .h5, or .npy file.")
+
+    if dtype is not None:
+        data = data.astype(dtype, copy=False)
     
     return data
 
-# %% ../nbs/01_data.ipynb 7
+# %% ../nbs/01_data.ipynb 8
 def load_memmap_array(file_path: str,  # The path to the .npy file as a string.
                       mode: str = 'c'  # Mode for memory-mapping ('r', 'r+', 'w+', 'c').
                      ) -> np.memmap:   # Returns a memory-mapped array.
@@ -75,7 +81,7 @@ def load_memmap_array(file_path: str,  # The path to the .npy file as a string.
     # Load the .npy file as a memmap object with the specified mode
     return np.load(file_path, mmap_mode=mode)
 
-# %% ../nbs/01_data.ipynb 8
+# %% ../nbs/01_data.ipynb 9
 def get_orbit_features(file_path: str,  # The path to the file (can be .mat, .h5, or .npy).
                        variable_name: Optional[str] = None,  # Name of the variable in the .mat file, optional.
                        dataset_path: Optional[str] = None  # Path to the dataset in the .h5 file, optional.
@@ -98,22 +104,92 @@ def get_orbit_features(file_path: str,  # The path to the file (can be .mat, .h5
 
     return features
 
-# %% ../nbs/01_data.ipynb 11
+# %% ../nbs/01_data.ipynb 12
+def _hdf5_compression(compression: Optional[str],  # Codec name: 'gzip', 'lzf', 'blosc', 'zstd' or None.
+                      level: Optional[int],        # Compression level, codec default when None.
+                      shuffle: bool                # Apply the byte-shuffle filter before compressing, ignored without a codec.
+                     ) -> Dict[str, Any]:          # Keyword arguments for `h5py.Group.create_dataset`.
+    """
+    Translate a codec name into `create_dataset` arguments. Blosc and Zstandard need the optional `hdf5plugin` package.
+    """
+    if compression is None:
+        return {}  # Shuffling only helps a compressor, on raw data it is pure filter overhead
+    if compression == 'gzip':
+        return {'compression': 'gzip', 'compression_opts': 9 if level is None else level, 'shuffle': shuffle}
+    if compression == 'lzf':
+        return {'compression': 'lzf', 'shuffle': shuffle}
+    if compression in ('blosc', 'zstd'):
+        try:
+            import hdf5plugin
+        except ImportError:
+            raise ImportError(f"The '{compression}' codec requires the hdf5plugin package (pip install hdf5plugin).")
+        if compression == 'blosc':
+            # Blosc applies its own byte shuffle, so the HDF5 shuffle filter is not added.
+            return dict(hdf5plugin.Blosc(cname='zstd', clevel=5 if level is None else level,
+                                         shuffle=hdf5plugin.Blosc.SHUFFLE if shuffle else hdf5plugin.Blosc.NOSHUFFLE))
+        return {**hdf5plugin.Zstd(clevel=3 if level is None else level), 'shuffle': shuffle}
+    raise ValueError("Unsupported compression. Supported codecs are 'gzip', 'lzf', 'blosc', 'zstd' or None.")
+
+# %% ../nbs/01_data.ipynb 13
+def _write_gzip_chunks(dataset: h5py.Dataset,  # Chunked dataset created with gzip (and optionally shuffle).
+                       data: np.ndarray,       # Data to write.
+                       level: int,             # Gzip compression level.
+                       shuffle: bool,          # Whether the dataset has the byte-shuffle filter.
+                       n_jobs: int             # Number of compression threads.
+                      ) -> None:
+    """
+    Compress the chunks of a gzip dataset in a thread pool (zlib releases the GIL) and store them with direct chunk writes.
+    """
+    import zlib
+    from concurrent.futures import ThreadPoolExecutor
+
+    chunk_orbits = dataset.chunks[0]
+    itemsize = dataset.dtype.itemsize
+
+    def compress(start):
+        chunk = np.zeros(dataset.chunks, dtype=dataset.dtype)  # Edge chunks are stored padded to the full chunk shape
+        block = data[start:start + chunk_orbits]
+        chunk[:len(block)] = block
+        raw = chunk.view(np.uint8).reshape(-1, itemsize).T.tobytes() if shuffle and itemsize > 1 else chunk.tobytes()
+        return start, zlib.compress(raw, level)
+
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        for start, payload in executor.map(compress, range(0, len(data), chunk_orbits)):
+            dataset.id.write_direct_chunk((start,) + (0,) * (data.ndim - 1), payload)
+
+# %% ../nbs/01_data.ipynb 14
+@instrument()
 def save_data(data: np.ndarray,  # The numpy array data to save.
-              file_name: str  # The name of the file to save the data in, including the extension.
+              file_name: str,  # The name of the file to save the data in, including the extension.
+              compression: Optional[str] = 'gzip',  # HDF5 codec: 'gzip', 'lzf', 'blosc', 'zstd' or None.
+              compression_level: Optional[int] = None,  # Codec compression level, codec default when None.
+              shuffle: bool = True,  # Byte-shuffle the values before compressing (HDF5 with a codec only).
+              chunk_orbits: Optional[int] = None,  # Orbits per HDF5 chunk, chunks are (chunk_orbits, *data.shape[1:]).
+              n_jobs: int = 1  # Threads compressing gzip chunks in parallel (HDF5 only).
              ) -> None:
     """
     Save a numpy array to a file based on the file extension specified in `file_name`.
     Supports saving to HDF5 (.hdf5) or NumPy (.npy) file formats.
+    HDF5 data is chunked along the first axis so that single orbits can be read without decompressing the whole array;
+    by default a chunk holds about 1 MB of whole orbits.
     """
     # Extract file extension from file name
     _, file_extension = os.path.splitext(file_name)
     
     if file_extension == '.hdf5':
+        filters = _hdf5_compression(compression, compression_level, shuffle)
+        if chunk_orbits is None:
+            orbit_bytes = max(data[:1].nbytes, 1)
+            chunk_orbits = max(1, (1 << 20) // orbit_bytes)
+        chunks = (min(chunk_orbits, max(len(data), 1)),) + tuple(data.shape[1:]) if data.ndim else None
         # Open a new HDF5 file
         with h5py.File(file_name, 'w') as f:
-            # Create a dataset in the file
-            f.create_dataset('data', data=data, compression='gzip', compression_opts=9)
+            if compression == 'gzip' and n_jobs > 1 and data.ndim and len(data):
+                dataset = f.create_dataset('data', shape=data.shape, dtype=data.dtype, chunks=chunks, **filters)
+                _write_gzip_chunks(dataset, data, filters['compression_opts'], shuffle, n_jobs)
+            else:
+                # Create a dataset in the file
+                f.create_dataset('data', data=data, chunks=chunks, **filters)
     elif file_extension == '.npy':
         # Save the array to a NumPy .npy file
         np.save(file_name, data)
@@ -121,7 +197,48 @@ def save_data(data: np.ndarray,  # The numpy array data to save.
         # Raise an error for unsupported file types
         raise ValueError("Unsupported file extension. Supported extensions are '.hdf5' or '.npy'.")
 
-# %% ../nbs/01_data.ipynb 14
+# %% ../nbs/01_data.ipynb 17
+def benchmark_save_data(data: Optional[np.ndarray] = None,  # Orbit tensor to save, a generated (2000, 7, 300) tensor by default.
+                        codecs: Sequence[Optional[str]] = ('gzip', 'lzf', 'blosc', 'zstd', None),  # Codecs to compare.
+                        n_jobs: int = 1,  # Threads compressing gzip chunks in parallel.
+                        **kwargs  # Additional keyword arguments for `save_data`.
+                       ) -> pd.DataFrame:  # Write MB/s, read MB/s and compression ratio per codec.
+    """
+    Time `save_data` to HDF5 and a full read back for every codec. Codecs whose plugin is not installed are skipped.
+    """
+    import tempfile
+    import time
+
+    if data is None:
+        # Smooth periodic signals with the (time, position, velocity) layout of real orbits
+        time_points = np.linspace(0, 1, 300)
+        phases = np.random.default_rng(0).uniform(0, 2 * np.pi, size=(2000, 3, 1))
+        positions = np.sin(2 * np.pi * time_points + phases)
+        velocities = 2 * np.pi * np.cos(2 * np.pi * time_points + phases)
+        data = np.concatenate([np.broadcast_to(time_points, (2000, 1, 300)), positions, velocities], axis=1)
+
+    megabytes = data.nbytes / 1e6
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_name = os.path.join(tmp_dir, 'benchmark.hdf5')
+        for codec in codecs:
+            start = time.perf_counter()
+            try:
+                save_data(data, file_name, compression=codec, n_jobs=n_jobs, **kwargs)
+            except ImportError:
+                continue
+            write_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            with h5py.File(file_name, 'r') as f:
+                f['data'][...]
+            read_seconds = time.perf_counter() - start
+            results.append({'codec': str(codec),
+                            'write_MBps': megabytes / write_seconds,
+                            'read_MBps': megabytes / read_seconds,
+                            'compression_ratio': data.nbytes / os.path.getsize(file_name)})
+    return pd.DataFrame(results).set_index('codec')
+
+# %% ../nbs/01_data.ipynb 20
 def get_example_orbit_data():
     """
     Load orbit data from a hardcoded MAT file located in the `data` directory.
@@ -147,10 +264,61 @@ def get_example_orbit_data():
     
     return data
 
-# %% ../nbs/01_data.ipynb 17
+# %% ../nbs/01_data.ipynb 23
+def build_class_index(labels: np.ndarray,              # Array of labels corresponding to each orbit.
+                      cache_file: Optional[str] = None  # Optional .npz file to load the index from or store it in.
+                     ) -> Dict[str, np.ndarray]:        # Dictionary with 'classes', 'order', 'starts' and 'ends'.
+    """
+    Build a one-time index of the rows belonging to each class with a single stable argsort.
+    The rows of class `classes[i]` are `order[starts[i]:ends[i]]`, in ascending row order.
+    A cached index is only reused if it was built from the same labels, checked with a digest stored alongside it.
+    """
+    labels = np.asarray(labels)
+    digest = None
+    if cache_file is not None:
+        import hashlib
+        hashable = np.ascontiguousarray(labels.astype(str) if labels.dtype == object else labels)
+        digest = np.frombuffer(hashlib.blake2b(hashable.tobytes() + f'{hashable.dtype.str}{labels.shape}'.encode(),
+                                               digest_size=16).digest(), dtype=np.uint8)
+    if cache_file is not None and os.path.exists(cache_file):
+        with np.load(cache_file) as cached:
+            if 'labels_digest' in cached and np.array_equal(cached['labels_digest'], digest):
+                return {key: cached[key] for key in ('classes', 'order', 'starts', 'ends')}
+
+    order = np.argsort(labels, kind='stable')
+    sorted_labels = labels[order]
+    classes = np.unique(sorted_labels)
+    class_index = {'classes': classes,
+                   'order': order,
+                   'starts': np.searchsorted(sorted_labels, classes, side='left'),
+                   'ends': np.searchsorted(sorted_labels, classes, side='right')}
+
+    if cache_file is not None:
+        np.savez(cache_file, labels_digest=digest, **class_index)
+    return class_index
+
+# %% ../nbs/01_data.ipynb 24
+@instrument(bytes_from='output')
+def take_orbits(orbit_data: np.ndarray,  # Orbit data array, possibly memory-mapped.
+                indices: np.ndarray       # Row indices to read, in the order they should be returned.
+               ) -> np.ndarray:           # The selected rows as an in-memory array.
+    """
+    Read the selected rows in ascending order, so memory-mapped data is accessed sequentially,
+    and return them in the order of `indices`.
+    """
+    indices = np.asarray(indices, dtype=np.intp)
+    read_order = np.argsort(indices, kind='stable')
+    rows = np.empty((len(indices),) + orbit_data.shape[1:], dtype=orbit_data.dtype)
+    rows[read_order] = orbit_data[indices[read_order]]
+    return rows
+
+# %% ../nbs/01_data.ipynb 25
 def sample_orbits(orbit_data: np.ndarray,  # Orbit data array
                   sample_spec: dict or int, # Number of samples per class (dict) or total number of samples (int)
-                  labels: np.ndarray = None # Optional: Array of labels corresponding to each orbit
+                  labels: np.ndarray = None, # Optional: Array of labels corresponding to each orbit
+                  seed: Union[int, np.random.Generator, None] = None, # Seed or generator used for sampling
+                  class_index: Optional[Dict[str, np.ndarray]] = None, # Precomputed `build_class_index(labels)`
+                  return_indices: bool = False # Return the sampled row indices instead of reading the orbits
                  ) -> (np.ndarray, np.ndarray):
     """
     Randomly sample orbits from the provided dataset.
@@ -160,26 +328,128 @@ def sample_orbits(orbit_data: np.ndarray,  # Orbit data array
         sample_spec (dict or int): If int, it is the total number of orbits to sample.
                                    If dict, it specifies the number of samples for each class.
         labels (np.ndarray, optional): Array of labels for each orbit.
+        seed (int or np.random.Generator, optional): Makes the sample reproducible.
+        class_index (dict, optional): Class index of `labels`, reused across calls instead of rebuilt.
+        return_indices (bool): If True, no orbit is read and the sampled row indices are returned instead;
+                               they can be read later with `take_orbits`.
     
     Returns:
-        tuple: A tuple containing the sampled orbit data and corresponding labels (if provided).
+        tuple: A tuple containing the sampled orbit data (or indices) and corresponding labels (if provided).
     """
+    rng = np.random.default_rng(seed)
+
     if labels is not None and isinstance(sample_spec, dict):
         # Sampling specified number of orbits for each class
+        if class_index is None:
+            class_index = build_class_index(labels)
+        classes = class_index['classes']
         indices = []
         for label, count in sample_spec.items():
-            class_indices = np.where(labels == label)[0]
+            position = np.searchsorted(classes, label)
+            if position < len(classes) and classes[position] == label:
+                class_indices = class_index['order'][class_index['starts'][position]:class_index['ends'][position]]
+            else:
+                class_indices = np.empty(0, dtype=np.intp)
             if len(class_indices) < count:
                 raise ValueError(f"Not enough samples for class {label}. Requested {count}, available {len(class_indices)}.")
-            selected_indices = np.random.choice(class_indices, size=count, replace=False)
-            indices.extend(selected_indices)
-        indices = np.array(indices)
+            indices.append(rng.choice(class_indices, size=count, replace=False))
+        indices = np.concatenate(indices) if indices else np.empty(0, dtype=np.intp)
     else:
         # Random sampling without considering classes
-        indices = np.random.choice(orbit_data.shape[0], size=sample_spec, replace=False)
+        indices = rng.choice(orbit_data.shape[0], size=sample_spec, replace=False)
     
-    # Select the sampled data and labels
-    sampled_data = orbit_data[indices]
     sampled_labels = labels[indices] if labels is not None else None
-    
-    return sampled_data, sampled_labels
+    if return_indices:
+        return indices, sampled_labels
+
+    # Select the sampled data, reading the rows in sorted order
+    return take_orbits(orbit_data, indices), sampled_labels
+
+# %% ../nbs/01_data.ipynb 28
+def import_times(module: str  # Dotted name of the module to import, e.g. 'orbit_generation.stats'.
+                ) -> Dict[str, int]:  # Cumulative import time in microseconds of every module it loads.
+    """
+    Import a module in a fresh interpreter with `python -X importtime` and parse the report, e.g. to check which dependencies it loads eagerly.
+    """
+    import subprocess, sys
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, check=True)
+    return {line.split('|')[-1].strip(): int(line.split('|')[1])
+            for line in result.stderr.splitlines() if line.startswith('import time:') and 'cumulative' not in line}
+
+# %% ../nbs/01_data.ipynb 31
+def block_shuffle_indices(num_rows: int,           # Number of rows in the dataset.
+                          chunk_size: int = 1024,  # Number of contiguous rows read together.
+                          buffer_chunks: int = 8,  # Number of chunks shuffled together in memory.
+                          seed: Union[int, np.random.Generator, None] = None  # Seed or generator for the shuffle.
+                         ) -> np.ndarray:          # Permutation of the row indices, in epoch order.
+    """
+    Block-shuffle the rows of a dataset: the order of contiguous chunks is shuffled first,
+    then the rows of every group of `buffer_chunks` consecutive chunks are shuffled together.
+    """
+    rng = np.random.default_rng(seed)
+    chunk_starts = rng.permutation(np.arange(0, num_rows, chunk_size))
+    permutation = []
+    for first in range(0, len(chunk_starts), buffer_chunks):
+        buffer = np.concatenate([np.arange(start, min(start + chunk_size, num_rows))
+                                 for start in chunk_starts[first:first + buffer_chunks]])
+        permutation.append(rng.permutation(buffer))
+    return np.concatenate(permutation) if permutation else np.empty(0, dtype=int)
+
+# %% ../nbs/01_data.ipynb 32
+def shuffled_batches(orbit_data: np.ndarray,            # Orbit data array, typically memory-mapped.
+                     batch_size: int,                   # Number of orbits per batch.
+                     labels: Optional[np.ndarray] = None,  # Optional labels shuffled along with the orbits.
+                     chunk_size: int = 1024,            # Number of contiguous rows read from disk at once.
+                     buffer_chunks: int = 8,            # Number of chunks shuffled together in memory.
+                     seed: Union[int, np.random.Generator, None] = None  # Seed or generator for the shuffle.
+                    ):                                  # Yields batches, or (batch, labels) tuples when labels are given.
+    """
+    Iterate over one block-shuffled epoch of `orbit_data` without copying the whole array.
+    Only `chunk_size * buffer_chunks` rows are held in memory, and each chunk is read as one contiguous slice.
+    Pass a different seed (or the same generator) for every epoch.
+    """
+    permutation = block_shuffle_indices(len(orbit_data), chunk_size, buffer_chunks, seed)
+    buffer_size = chunk_size * buffer_chunks
+    pending_data, pending_labels = [], []
+    for first in range(0, len(permutation), buffer_size):
+        rows = permutation[first:first + buffer_size]
+        # The rows of a buffer come from whole chunks: read each chunk with one slice, then gather in memory.
+        starts = np.unique(rows - rows % chunk_size)
+        block = np.concatenate([orbit_data[start:start + chunk_size] for start in starts])
+        offsets = np.searchsorted(starts, rows - rows % chunk_size) * chunk_size + rows % chunk_size
+        pending_data.append(block[offsets])
+        if labels is not None:
+            pending_labels.append(np.asarray(labels[rows]))
+
+        data = np.concatenate(pending_data)
+        batch_labels = np.concatenate(pending_labels) if labels is not None else None
+        usable = len(data) - len(data) % batch_size
+        for start in range(0, usable, batch_size):
+            if labels is None:
+                yield data[start:start + batch_size]
+            else:
+                yield data[start:start + batch_size], batch_labels[start:start + batch_size]
+        # Carry the incomplete batch over to the next buffer
+        pending_data = [data[usable:]]
+        pending_labels = [batch_labels[usable:]] if labels is not None else []
+
+    if pending_data and len(pending_data[0]):
+        yield pending_data[0] if labels is None else (pending_data[0], pending_labels[0])
+
+# %% ../nbs/01_data.ipynb 33
+def shuffle_mixing(permutation: np.ndarray  # Epoch order of the row indices.
+                  ) -> Dict[str, float]:    # Mixing metrics of the permutation.
+    """
+    Measure how well a permutation mixes the rows. 'displacement' is the mean distance a row moves
+    relative to a uniformly random permutation (about 1 for a full shuffle, 0 for none), and
+    'rank_correlation' is the correlation between original and new positions (about 0 for a full shuffle).
+    """
+    num_rows = len(permutation)
+    if num_rows < 2:
+        return {'displacement': 0.0, 'rank_correlation': 1.0}
+    positions = np.arange(num_rows)
+    expected_displacement = (num_rows ** 2 - 1) / (3 * num_rows)  # Mean |i - j| for a uniform permutation
+    displacement = np.abs(np.asarray(permutation) - positions).mean() / expected_displacement
+    rank_correlation = np.corrcoef(positions, permutation)[0, 1]
+    return {'displacement': float(displacement), 'rank_correlation': float(rank_correlation)}
@@ -2,19 +2,52 @@
 
 # %% auto 0
 __all__ = ['get_orbit_data_from_hdf5', 'get_orbit_features_from_hdf5', 'get_orbit_features_from_folder',
-           'get_first_period_dataset', 'get_segmented_dataset']
+           'get_first_period_dataset', 'get_segmented_dataset', 'virtual_segment_dataset', 'read_segments',
+           'segment_batches', 'build_orbit_dataset']
 
 # %% ../nbs/05_dataset.ipynb 2
 import os
+import json
 import h5py
 import numpy as np
 import pandas as pd
-from typing import Tuple, List, Dict
+from typing import Tuple, List, Dict, Any, Optional
 
 from .processing import pad_and_convert_to_3d, segment_and_convert_to_3d, add_time_vector_to_orbits
 
-# %% ../nbs/05_dataset.ipynb 4
-def get_orbit_data_from_hdf5(file_path: str                   # Path to the HDF5 file.
+# %% ../nbs/05_dataset.ipynb 6
+def _system_features_from_hdf5(file: h5py.File  # Open HDF5 file.
+                              ) -> Dict[str, float]:  # Dictionary containing system features.
+    """
+    Read the system features of an open HDF5 file.
+    """
+    system_features = file['system_features'][:]
+    system_labels = file['system_labels'][:].astype(str)
+    return {label: feature[0] for label, feature in zip(system_labels.flatten().tolist(), system_features)}
+
+# %% ../nbs/05_dataset.ipynb 7
+def _orbit_keys_from_hdf5(file: h5py.File  # Open HDF5 file.
+                         ) -> List[str]:    # Orbit dataset names sorted by their numerical value.
+    """
+    List the orbit datasets of an open HDF5 file in the order used to build the datasets.
+    """
+    return sorted((key for key in file.keys() if key.isdigit()), key=int)
+
+# %% ../nbs/05_dataset.ipynb 8
+def _write_dataset_manifest(out_path: str,           # Path of the .npy dataset.
+                            manifest: Dict[str, Any]  # Manifest entries describing the dataset.
+                           ) -> str:                 # Path of the JSON manifest.
+    """
+    Write the JSON manifest that sits next to a dataset streamed to a .npy file.
+    """
+    manifest_path = os.path.splitext(out_path)[0] + '.json'
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest_path
+
+# %% ../nbs/05_dataset.ipynb 9
+def get_orbit_data_from_hdf5(file_path: str,                  # Path to the HDF5 file.
+                             dtype: Optional[np.dtype] = None # Cast the orbits on read, e.g. np.float32.
                             ) -> Tuple[Dict[int, np.ndarray], # Dictionary of orbits with numerical keys.
                                     pd.DataFrame,             # DataFrame containing orbit features.
                                     Dict[str, float]]:        # Dictionary containing system features.
@@ -25,12 +58,8 @@ def get_orbit_data_from_hdf5(file_path: str                   # Path to the HDF5
         # Extract not_propagated_orbits and store in a list of integers
         not_propagated_orbits = [index - 1 for index in file['not_propagated_orbits'][0].tolist()]
         
-        # Extract system features and labels
-        system_features = file['system_features'][:]
-        system_labels = file['system_labels'][:].astype(str)
-        
         # Create a dictionary for system
-        system_dict = {label: feature[0] for label, feature in zip(system_labels.flatten().tolist(), system_features)}
+        system_dict = _system_features_from_hdf5(file)
         
         # Extract orbit features and labels
         orbit_features = file['orbit_features'][:]
@@ -43,14 +72,15 @@ def get_orbit_data_from_hdf5(file_path: str                   # Path to the HDF5
         orbit_df = orbit_df.drop(not_propagated_orbits).reset_index(drop=True)
         
         # Extract numpy arrays with numerical keys
-        orbits = {int(key): file[key][:] for key in file.keys() if key.isdigit()}
+        orbits = {int(key): file[key][:] if dtype is None else file[key].astype(dtype)[()]
+                  for key in file.keys() if key.isdigit()}
         
         # Reset the index of the dictionary to start on 0
         orbits = {i: orbits[key] for i, key in enumerate(sorted(orbits.keys()))}
                 
     return orbits, orbit_df, system_dict
 
-# %% ../nbs/05_dataset.ipynb 5
+# %% ../nbs/05_dataset.ipynb 10
 def get_orbit_features_from_hdf5(file_path: str          # Path to the HDF5 file.
                                 ) -> pd.DataFrame:       # DataFrame containing orbit features.
     """
@@ -72,7 +102,7 @@ def get_orbit_features_from_hdf5(file_path: str          # Path to the HDF5 file
                 
     return orbit_df
 
-# %% ../nbs/05_dataset.ipynb 6
+# %% ../nbs/05_dataset.ipynb 11
 def get_orbit_features_from_folder(folder_path: str    # Path to the folder
                           ) -> pd.DataFrame:  # DataFrame containing concatenated orbit features.
     """
@@ -100,28 +130,69 @@ def get_orbit_features_from_folder(folder_path: str    # Path to the folder
 
     # Concatenate all DataFrames
     concatenated_df = pd.concat(all_dfs, ignore_index=True)
+
+    # Store the system as a categorical column so grouping by it works on integer codes
+    concatenated_df['system'] = concatenated_df['system'].astype('category')
     
     return concatenated_df
 
-# %% ../nbs/05_dataset.ipynb 8
-def get_first_period_dataset(file_path: str                  # Path to the HDF5 file.
+# %% ../nbs/05_dataset.ipynb 13
+def get_first_period_dataset(file_path: str,                 # Path to the HDF5 file.
+                             out_path: Optional[str] = None, # Optional .npy file the padded orbits are streamed into.
+                             dtype: Optional[np.dtype] = None # Cast the orbits on read, e.g. np.float32.
                             ) -> Tuple[np.ndarray,          # 3D numpy array of padded orbits.
                                        pd.DataFrame,        # DataFrame containing orbit features.
                                        Dict[str, float]]:   # Dictionary containing system features.
     """
     Load and process orbit data from an HDF5 file for the first period.
+    With `out_path`, orbits are read one at a time and written into a memory-mapped .npy file (plus a JSON manifest),
+    so memory use is proportional to one orbit; the returned array is then a read-only memmap of that file.
     """
+    # Remove the file type and extract parts of the file name to determine processing steps
+    file_name = os.path.basename(file_path).split('.')[0]
+    file_parts = file_name.split('_')
+
+    if out_path is not None:
+        if file_parts[1] != 'N':
+            raise ValueError("out_path is only supported for files with a fixed number of timesteps ('N').")
+        timesteps = int(file_parts[3])
+        orbit_df = get_orbit_features_from_hdf5(file_path)
+        propagated_periods = orbit_df['propagated_periods'].tolist()
+        periods = orbit_df['period'].tolist()
+
+        with h5py.File(file_path, 'r') as file:
+            system_dict = _system_features_from_hdf5(file)
+            keys = _orbit_keys_from_hdf5(file)
+            num_states, _ = file[keys[0]].shape
+            dtype = file[keys[0]].dtype if dtype is None else np.dtype(dtype)
+            output = np.lib.format.open_memmap(out_path, mode='w+', dtype=dtype,
+                                               shape=(len(keys), num_states + 1, timesteps))
+            for index, key in enumerate(keys):
+                num_points = file[key].shape[1]
+                num_timesteps = min(timesteps, num_points)
+                # Same time vector as `add_time_vector_to_orbits`, truncated and padded like `pad_and_convert_to_3d`
+                tvec = np.linspace(0, propagated_periods[index] * periods[index], num_points)
+                output[index, 0, :num_timesteps] = tvec[:num_timesteps]
+                output[index, 1:, :num_timesteps] = file[key][:, :num_timesteps]
+                output[index, :, num_timesteps:] = 0
+            output.flush()
+            del output
+
+        _write_dataset_manifest(out_path, {'source': os.path.abspath(file_path),
+                                           'data': os.path.basename(out_path),
+                                           'shape': [len(keys), num_states + 1, timesteps],
+                                           'dtype': np.dtype(dtype).name,
+                                           'timesteps': timesteps,
+                                           'system': {label: float(value) for label, value in system_dict.items()}})
+        return np.load(out_path, mmap_mode='r'), orbit_df, system_dict
+
     # Load the orbit data, features dataframe, and system dictionary from the HDF5 file
-    orbits, orbit_df, system_dict = get_orbit_data_from_hdf5(file_path)
+    orbits, orbit_df, system_dict = get_orbit_data_from_hdf5(file_path, dtype=dtype)
 
     # Extract propagated periods and periods from the DataFrame
     propagated_periods = orbit_df['propagated_periods'].tolist()
     periods = orbit_df['period'].tolist()
 
-    # Remove the file type and extract parts of the file name to determine processing steps
-    file_name = os.path.basename(file_path).split('.')[0]
-    file_parts = file_name.split('_')
-
     # Check if the second part of the file name is 'N'
     if file_parts[1] == 'N':
         # Add time vectors to the orbits
@@ -131,19 +202,61 @@ def get_first_period_dataset(file_path: str                  # Path to the HDF5
 
     return orbits, orbit_df, system_dict
 
-
-# %% ../nbs/05_dataset.ipynb 10
+# %% ../nbs/05_dataset.ipynb 16
 def get_segmented_dataset(file_path: str,                     # Path to the HDF5 file.
-                          segment_length: int                 # Desired length of each segment.
+                          segment_length: int,                # Desired length of each segment.
+                          out_path: Optional[str] = None,     # Optional .npy file the segments are streamed into.
+                          dtype: Optional[np.dtype] = None    # Cast the orbits on read, e.g. np.float32.
                          ) -> Tuple[np.ndarray,               # 3D numpy array of segmented orbits.
                                     pd.DataFrame,             # DataFrame containing orbit features.
                                     List[int],                # List of IDs representing each new segment.
                                     Dict[str, float]]:        # Dictionary containing system features.
     """
     Load and process orbit data from an HDF5 file, segmenting each orbit into specified length.
+    With `out_path`, segments are streamed one orbit at a time into a memory-mapped .npy file, the segment IDs into
+    a sidecar `<name>_segment_ids.npy` and a JSON manifest is written; the arrays are returned as read-only memmaps.
     """
+    if out_path is not None:
+        if os.path.basename(file_path).split('_')[1] != 'dt':
+            raise ValueError("out_path is only supported for files with a fixed time step ('dt').")
+        orbit_df = get_orbit_features_from_hdf5(file_path)
+        ids_path = os.path.splitext(out_path)[0] + '_segment_ids.npy'
+
+        with h5py.File(file_path, 'r') as file:
+            system_dict = _system_features_from_hdf5(file)
+            keys = _orbit_keys_from_hdf5(file)
+            # Size the output from the dataset shapes, without reading any orbit
+            segments_per_orbit = [file[key].shape[1] // segment_length for key in keys]
+            num_states = file[keys[0]].shape[0]
+            dtype = file[keys[0]].dtype if dtype is None else np.dtype(dtype)
+            num_segments = sum(segments_per_orbit)
+            output = np.lib.format.open_memmap(out_path, mode='w+', dtype=dtype,
+                                               shape=(num_segments, num_states, segment_length))
+            segment_ids = np.lib.format.open_memmap(ids_path, mode='w+', dtype=np.int64, shape=(num_segments,))
+            position = 0
+            for index, (key, count) in enumerate(zip(keys, segments_per_orbit)):
+                if count == 0:
+                    continue
+                orbit = file[key][:, :count * segment_length]
+                # (states, count * length) -> (count, states, length), as in `segment_and_convert_to_3d`
+                output[position:position + count] = orbit.reshape(num_states, count, segment_length).transpose(1, 0, 2)
+                segment_ids[position:position + count] = index
+                position += count
+            output.flush()
+            segment_ids.flush()
+            del output, segment_ids
+
+        _write_dataset_manifest(out_path, {'source': os.path.abspath(file_path),
+                                           'data': os.path.basename(out_path),
+                                           'segment_ids': os.path.basename(ids_path),
+                                           'shape': [num_segments, num_states, segment_length],
+                                           'dtype': np.dtype(dtype).name,
+                                           'segment_length': segment_length,
+                                           'system': {label: float(value) for label, value in system_dict.items()}})
+        return np.load(out_path, mmap_mode='r'), orbit_df, np.load(ids_path, mmap_mode='r'), system_dict
+
     # Load the orbit data, features dataframe, and system dictionary from the HDF5 file
-    orbits, orbit_df, system_dict = get_orbit_data_from_hdf5(file_path)
+    orbits, orbit_df, system_dict = get_orbit_data_from_hdf5(file_path, dtype=dtype)
 
     # Check if the second part of the file name is 'dt'
     if os.path.basename(file_path).split('_')[1] == 'dt':
@@ -152,3 +265,291 @@ def get_segmented_dataset(file_path: str,                     # Path to the HDF5
 
     return orbits, orbit_df, orbits_ids, system_dict
 
+# %% ../nbs/05_dataset.ipynb 19
+def _is_packed(store: Any  # Orbit store.
+              ) -> bool:   # Whether the store holds packed orbits from `pack_orbits`.
+    """
+    Tell packed orbits apart from a dictionary of orbits.
+    """
+    return isinstance(store, dict) and 'values' in store and 'offsets' in store
+
+# %% ../nbs/05_dataset.ipynb 20
+def virtual_segment_dataset(store: Any,                        # Open HDF5 catalog, dict of (num_scalars, length) orbits, 3D array or packed orbits.
+                            segment_length: int,               # Number of time steps per segment.
+                            stride: Optional[int] = None,      # Time steps between the starts of consecutive segments, `segment_length` by default.
+                            lengths: Optional[np.ndarray] = None  # Valid length of every orbit, e.g. for zero-padded 3D arrays.
+                           ) -> Dict[str, Any]:                # Segment index over the store.
+    """
+    Index the segments of every orbit without reading them. Strides shorter than `segment_length` give overlapping
+    segments; the default stride gives the segments and order of `get_segmented_dataset`.
+    """
+    stride = segment_length if stride is None else stride
+    if segment_length < 1 or stride < 1:
+        raise ValueError("segment_length and stride must be positive.")
+    if isinstance(store, h5py.File):
+        keys = _orbit_keys_from_hdf5(store)
+        store = {index: store[key] for index, key in enumerate(keys)}
+    if lengths is None:
+        if _is_packed(store):
+            lengths = store['lengths']
+        elif isinstance(store, dict):
+            lengths = [orbit.shape[1] for orbit in store.values()]
+        else:
+            lengths = np.full(len(store), store.shape[2])
+    lengths = np.asarray(lengths, dtype=np.int64)
+    counts = np.maximum((lengths - segment_length) // stride + 1, 0)
+    cumulative = np.concatenate([[0], np.cumsum(counts)])
+    return {'store': list(store.values()) if isinstance(store, dict) and not _is_packed(store) else store,
+            'lengths': lengths,
+            'cumulative': cumulative,
+            # Orbit of every segment, so looking a segment up is O(1)
+            'segment_orbits': np.repeat(np.arange(len(lengths), dtype=np.int32), counts),
+            'segment_length': segment_length,
+            'stride': stride,
+            'num_segments': int(cumulative[-1])}
+
+# %% ../nbs/05_dataset.ipynb 21
+def read_segments(dataset: Dict[str, Any],  # Virtual segment dataset from `virtual_segment_dataset`.
+                  segment_ids: np.ndarray   # Global indices of the segments, in any order.
+                 ) -> Tuple[np.ndarray,     # Segments of shape (len(segment_ids), num_scalars, segment_length).
+                            np.ndarray]:    # Position of the orbit of every segment in the store.
+    """
+    Read segments by their global index. Packed and in-memory or memory-mapped arrays are gathered in one
+    indexing operation; HDF5 datasets and dictionaries of orbits are read one window at a time.
+    """
+    segment_ids = np.asarray(segment_ids, dtype=np.int64)
+    if segment_ids.size and (segment_ids.min() < 0 or segment_ids.max() >= dataset['num_segments']):
+        raise IndexError(f"Segment indices must be in [0, {dataset['num_segments']}).")
+    orbits = dataset['segment_orbits'][segment_ids].astype(np.int64)
+    starts = (segment_ids - dataset['cumulative'][orbits]) * dataset['stride']
+    windows = starts[:, None] + np.arange(dataset['segment_length'])
+    store = dataset['store']
+
+    if _is_packed(store):
+        segments = store['values'][store['offsets'][orbits][:, None] + windows].transpose(0, 2, 1)
+    elif isinstance(store, np.ndarray):
+        # The advanced indices around the slice put the segment axes first: (segments, length, scalars)
+        segments = store[orbits[:, None], :, windows].transpose(0, 2, 1)
+    else:
+        segments = np.stack([store[orbit][:, start:start + dataset['segment_length']]
+                             for orbit, start in zip(orbits, starts)]) if len(orbits) else np.empty((0, 0, 0))
+    return np.ascontiguousarray(segments), orbits
+
+# %% ../nbs/05_dataset.ipynb 22
+def segment_batches(dataset: Dict[str, Any],  # Virtual segment dataset from `virtual_segment_dataset`.
+                    batch_size: int,          # Number of segments per batch.
+                    shuffle: bool = True,     # Draw the segments in a random order.
+                    seed: Optional[int] = None  # Seed of the shuffle.
+                   ):                         # Yields (segments, orbits, segment_ids) tuples.
+    """
+    Iterate over the segments of a virtual dataset in (shuffled) batches.
+    """
+    order = np.arange(dataset['num_segments'])
+    if shuffle:
+        order = np.random.default_rng(seed).permutation(order)
+    for start in range(0, len(order), batch_size):
+        segment_ids = order[start:start + batch_size]
+        yield (*read_segments(dataset, segment_ids), segment_ids)
+
+# %% ../nbs/05_dataset.ipynb 25
+def _sample_orbit_chunk(X: np.ndarray,                # Initial states with shape (m, 6).
+                        durations: np.ndarray,        # Propagation time of every orbit, shape (m,).
+                        mu: float,                    # Gravitational parameter
+                        num_points: Optional[int],    # Points per orbit for fixed-count sampling.
+                        dt: Optional[float],          # Time step for fixed-step sampling.
+                        rtol: float,                  # Relative tolerance of the integrator.
+                        atol: float,                  # Absolute tolerance of the integrator.
+                        method: str                   # Explicit `solve_ivp` method.
+                       ) -> List[Optional[np.ndarray]]:  # Sampled states (6, points) of every orbit, None if it failed.
+    """
+    Propagate a chunk of orbits together and sample each one on its own time grid, every orbit to the requested
+    tolerances. If the batched integration fails, the orbits are retried one by one so a single bad initial
+    condition does not lose the whole chunk.
+    """
+    from scipy.integrate import solve_ivp
+    from orbit_generation.propagation import _batch_tolerances, _eom_cr3bp_normalized
+
+    samples = [None] * len(X)
+    valid = np.flatnonzero(np.isfinite(X).all(axis=1) & np.isfinite(durations) & (durations > 0))
+    if len(valid) == 0:
+        return samples
+
+    if num_points is not None:
+        # Fixed count: the same grid in the time normalized by each orbit's duration
+        grid = np.linspace(0, 1, num_points)
+        scales = durations[valid]
+        counts = np.full(len(valid), num_points)
+    else:
+        # Fixed step: one grid in physical time, each orbit keeps the points within its own duration
+        counts = np.floor(durations[valid] / dt + 1e-9).astype(int) + 1
+        grid = dt * np.arange(counts.max())
+        scales = np.ones(len(valid))
+        if grid[-1] == 0:
+            return samples
+
+    chunk_rtol, chunk_atol = _batch_tolerances(rtol, atol, len(valid))
+    sol = solve_ivp(_eom_cr3bp_normalized, [0, grid[-1]], X[valid].T.ravel(), args=(mu, scales), t_eval=grid,
+                    rtol=chunk_rtol, atol=chunk_atol, method=method)
+    if sol.status != 0 or sol.y.shape[1] != len(grid):
+        if len(valid) == 1:
+            return samples
+        for index in valid:
+            samples[index] = _sample_orbit_chunk(X[index:index + 1], durations[index:index + 1], mu, num_points, dt,
+                                                 rtol, atol, method)[0]
+        return samples
+
+    states = sol.y.reshape(6, len(valid), len(grid)).transpose(1, 0, 2)
+    for index, orbit, count in zip(valid, states, counts):
+        if np.isfinite(orbit[:, :count]).all():
+            samples[index] = orbit[:, :count]
+    return samples
+
+# %% ../nbs/05_dataset.ipynb 26
+def _sampled_chunks(X: np.ndarray,         # Initial states with shape (num_orbits, 6).
+                    durations: np.ndarray, # Propagation time of every orbit.
+                    pending: np.ndarray,   # Indices of the orbits still to propagate.
+                    chunk_size: int,       # Number of orbits integrated together.
+                    n_jobs: int,           # Number of worker processes.
+                    *args                  # mu, num_points, dt, rtol, atol and method for `_sample_orbit_chunk`.
+                   ):                      # Yields the indices of each chunk and their sampled states.
+    """
+    Propagate the pending orbits chunk by chunk, in parallel processes when `n_jobs > 1`, yielding chunks in order.
+    """
+    chunks = [pending[start:start + chunk_size] for start in range(0, len(pending), chunk_size)]
+    if n_jobs == 1 or len(chunks) < 2:
+        for indices in chunks:
+            yield indices, _sample_orbit_chunk(X[indices], durations[indices], *args)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            futures = [executor.submit(_sample_orbit_chunk, X[indices], durations[indices], *args) for indices in chunks]
+            for indices, future in zip(chunks, futures):
+                yield indices, future.result()
+
+# %% ../nbs/05_dataset.ipynb 27
+def build_orbit_dataset(features: pd.DataFrame,              # Catalog with initial conditions and periods, e.g. from `get_orbit_features`.
+                        out_path: str,                       # Output .h5/.hdf5 file or .npy file (fixed count only).
+                        mu: float,                           # Gravitational parameter
+                        num_periods: float = 1,              # Number of periods each orbit is propagated for.
+                        num_points: Optional[int] = None,    # Points per period for fixed-count sampling.
+                        dt: Optional[float] = None,          # Time step for fixed-step sampling.
+                        system_features: Optional[Dict[str, float]] = None,  # Extra system features stored with 'mu'.
+                        state_columns: List[str] = ['Initial Position X', 'Initial Position Y', 'Initial Position Z',
+                                                    'Initial Velocity X', 'Initial Velocity Y', 'Initial Velocity Z'],
+                        period_column: str = 'Period',       # Column with the orbit periods.
+                        dtype: np.dtype = np.float64,        # Data type of the stored orbits.
+                        chunk_size: int = 64,                # Number of orbits integrated together.
+                        n_jobs: int = 1,                     # Number of worker processes.
+                        resume: bool = True,                 # Continue an interrupted build of the same file.
+                        rtol: float = 1e-10,                 # Relative tolerance of the integrator.
+                        atol: float = 1e-10,                 # Absolute tolerance of the integrator.
+                        method: str = 'DOP853'               # Explicit `solve_ivp` method.
+                       ) -> Dict[str, Any]:                  # Counts of propagated, failed and skipped orbits and wall time.
+    """
+    Propagate every orbit of a catalog and write the ground-truth dataset consumed by `get_first_period_dataset`
+    (fixed count) or `get_segmented_dataset` (fixed step). Progress is checkpointed after every chunk, and
+    with `resume` the orbits already in `out_path` are skipped. Orbits whose propagation fails are recorded
+    as not propagated.
+    """
+    import time
+
+    start_time = time.perf_counter()
+    if (num_points is None) == (dt is None):
+        raise ValueError("Pass exactly one of num_points (fixed count) or dt (fixed step).")
+    X = features[state_columns].to_numpy(dtype=np.float64)
+    periods = features[period_column].to_numpy(dtype=np.float64)
+    durations = num_periods * periods
+    num_orbits = len(X)
+    # Points of the whole propagation, so the first `num_points` cover exactly the first period
+    total_points = None if num_points is None else int(round(num_periods * (num_points - 1))) + 1
+    # Orbits of similar duration share chunks, which keeps fixed-step chunks from integrating past most orbits
+    order = np.argsort(durations, kind='stable')
+    sampling_args = (mu, total_points, dt, rtol, atol, method)
+    settings = {'mu': mu, 'num_periods': num_periods, 'num_points': num_points or 0, 'dt': dt or 0.0,
+                'num_orbits': num_orbits}
+    counts = {'propagated': 0, 'failed': 0, 'skipped': 0}
+
+    if os.path.splitext(out_path)[1] == '.npy':
+        if num_points is None:
+            raise ValueError("The .npy layout needs a fixed number of points (num_points).")
+        progress_path = os.path.splitext(out_path)[0] + '_progress.npy'
+        shape = (num_orbits, 7, total_points)
+        resuming = resume and os.path.exists(out_path) and os.path.exists(progress_path)
+        if resuming:
+            output = np.lib.format.open_memmap(out_path, mode='r+')
+            progress = np.lib.format.open_memmap(progress_path, mode='r+')
+            if output.shape != shape or output.dtype != np.dtype(dtype):
+                raise ValueError(f"{out_path} holds a different dataset; pass resume=False to rebuild it.")
+        else:
+            output = np.lib.format.open_memmap(out_path, mode='w+', dtype=dtype, shape=shape)
+            # 0 pending, 1 propagated, -1 failed
+            progress = np.lib.format.open_memmap(progress_path, mode='w+', dtype=np.int8, shape=(num_orbits,))
+        pending = order[progress[order] == 0]
+        counts['skipped'] = num_orbits - len(pending)
+
+        for indices, samples in _sampled_chunks(X, durations, pending, chunk_size, n_jobs, *sampling_args):
+            for index, orbit in zip(indices, samples):
+                if orbit is None:
+                    output[index] = np.nan
+                    progress[index] = -1
+                    counts['failed'] += 1
+                else:
+                    output[index, 0] = np.linspace(0, durations[index], total_points)
+                    output[index, 1:] = orbit
+                    progress[index] = 1
+                    counts['propagated'] += 1
+            output.flush()
+            progress.flush()
+
+        not_propagated = np.flatnonzero(progress[:] == -1).tolist()
+        del output, progress
+        _write_dataset_manifest(out_path, {'data': os.path.basename(out_path),
+                                           'shape': list(shape),
+                                           'dtype': np.dtype(dtype).name,
+                                           'timesteps': num_points,
+                                           'num_periods': num_periods,
+                                           'not_propagated_orbits': not_propagated,
+                                           'system': {'mu': mu, **(system_features or {})}})
+    else:
+        with h5py.File(out_path, 'a' if resume else 'w') as file:
+            keys = _orbit_keys_from_hdf5(file)
+            if keys and any(file.attrs.get(name) != value for name, value in settings.items()):
+                raise ValueError(f"{out_path} was built with different settings; pass resume=False to rebuild it.")
+            file.attrs.update(settings)
+            # Orbit datasets and not-propagated indices are 1-based, as in the CR3BP catalogs
+            failed = [int(index) - 1 for index in file['not_propagated_orbits'][0]] if 'not_propagated_orbits' in file else []
+            done = np.zeros(num_orbits, dtype=bool)
+            done[[int(key) - 1 for key in keys] + failed] = True
+            pending = order[~done[order]]
+            counts['skipped'] = num_orbits - len(pending)
+
+            for indices, samples in _sampled_chunks(X, durations, pending, chunk_size, n_jobs, *sampling_args):
+                for index, orbit in zip(indices, samples):
+                    if orbit is None:
+                        failed.append(int(index))
+                        counts['failed'] += 1
+                    else:
+                        file.create_dataset(str(index + 1), data=orbit.astype(dtype))
+                        counts['propagated'] += 1
+                if 'not_propagated_orbits' in file:
+                    del file['not_propagated_orbits']
+                file['not_propagated_orbits'] = np.array([sorted(failed)], dtype=np.int64).reshape(1, -1) + 1
+                file.flush()
+
+            # Numeric catalog columns plus the 'period' and 'propagated_periods' used by the dataset builders
+            orbit_features = features.select_dtypes('number').astype(np.float64).copy()
+            orbit_features['period'] = periods
+            orbit_features['propagated_periods'] = num_periods
+            system = {'mu': mu, **(system_features or {})}
+            for name, data in [('orbit_features', orbit_features.to_numpy().T),
+                               ('orbit_labels', np.array(orbit_features.columns.tolist(), dtype='S')[:, None]),
+                               ('system_features', np.array(list(system.values()), dtype=np.float64)[:, None]),
+                               ('system_labels', np.array(list(system.keys()), dtype='S')[:, None])]:
+                if name in file:
+                    del file[name]
+                file[name] = data
+
+    return {'path': out_path,
+            'total': num_orbits,
+            **counts,
+            'seconds': time.perf_counter() - start_time}
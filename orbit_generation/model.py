@@ -4,10 +4,9 @@
 __all__ = ['get_optimizer']
 
 # %% ../nbs/06_model.ipynb 2
-from tensorflow.keras.optimizers import Adam, SGD
-
-# %% ../nbs/06_model.ipynb 3
 def get_optimizer(optimizer_config):
+    from tensorflow.keras.optimizers import Adam, SGD  # TensorFlow is imported on first use only.
+
     name = optimizer_config['name'].lower()
     if name == 'adam':
         return Adam(learning_rate=optimizer_config.get('learning_rate', 0.001))
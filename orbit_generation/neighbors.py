@@ -0,0 +1,152 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/10_neighbors.ipynb.
+
+# %% auto 0
+__all__ = ['flatten_orbits', 'build_orbit_index', 'save_orbit_index', 'load_orbit_index', 'query_orbit_index', 'novelty_metrics']
+
+# %% ../nbs/10_neighbors.ipynb 2
+import pickle
+import time
+import numpy as np
+from typing import Any, Dict, Optional, Tuple
+
+from .processing import resample_3d_array
+
+# %% ../nbs/10_neighbors.ipynb 7
+def flatten_orbits(orbits: np.ndarray,                # Orbits (num_orbits, num_channels, num_time_points) or latents (num_orbits, ...).
+                   num_points: Optional[int] = None,  # Resample the time axis of 3D orbits to this many points first.
+                   dtype: np.dtype = np.float32       # Data type of the flattened vectors.
+                  ) -> np.ndarray:                    # Contiguous array of shape (num_orbits, num_features).
+    """
+    Turn orbits or latent vectors into one feature vector per orbit, resampling 3D orbits to a common length.
+    """
+    orbits = np.asarray(orbits)
+    if num_points is not None and orbits.shape[-1] != num_points:
+        orbits = resample_3d_array(orbits, axis=2, target_size=num_points)
+    return np.ascontiguousarray(orbits.reshape(len(orbits), -1), dtype=dtype)
+
+# %% ../nbs/10_neighbors.ipynb 8
+def build_orbit_index(vectors: np.ndarray,       # Flattened real orbits or latents, shape (num_orbits, num_features).
+                      method: str = 'brute',     # 'brute' (blocked matrix products), 'kd_tree' or 'ball_tree'.
+                      leaf_size: int = 40        # Leaf size of the trees.
+                     ) -> Dict[str, Any]:        # Index with the 'method', 'vectors', 'squared_norms' and 'tree'.
+    """
+    Build a Euclidean nearest-neighbor index. Trees suit low-dimensional vectors such as latents;
+    flattened orbits have thousands of dimensions, where the blocked brute-force search is faster.
+    """
+    vectors = np.ascontiguousarray(vectors.reshape(len(vectors), -1))
+    index = {'method': method, 'vectors': vectors, 'squared_norms': None, 'tree': None}
+    if method == 'brute':
+        index['squared_norms'] = np.einsum('ij,ij->i', vectors, vectors, dtype=np.float64)
+    elif method in ('kd_tree', 'ball_tree'):
+        from sklearn.neighbors import BallTree, KDTree
+        index['tree'] = (KDTree if method == 'kd_tree' else BallTree)(vectors, leaf_size=leaf_size)
+    else:
+        raise ValueError("Unsupported method. Supported methods are 'brute', 'kd_tree' or 'ball_tree'.")
+    return index
+
+# %% ../nbs/10_neighbors.ipynb 9
+def save_orbit_index(index: Dict[str, Any],  # Index from `build_orbit_index`.
+                     file_path: str          # Path of the pickle file.
+                    ) -> None:
+    """
+    Save an index, including a built tree, so it does not have to be rebuilt.
+    """
+    with open(file_path, 'wb') as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+# %% ../nbs/10_neighbors.ipynb 10
+def load_orbit_index(file_path: str  # Path of a file written by `save_orbit_index`.
+                    ) -> Dict[str, Any]:  # The saved index.
+    """
+    Load an index saved with `save_orbit_index`. Only load files you trust, since they are pickles.
+    """
+    with open(file_path, 'rb') as f:
+        return pickle.load(f)
+
+# %% ../nbs/10_neighbors.ipynb 12
+def _brute_force_neighbors(index: Dict[str, Any],  # Brute-force index.
+                           queries: np.ndarray,    # Query vectors of shape (m, num_features).
+                           k: int,                 # Number of neighbors.
+                           reference_block: int    # Number of indexed vectors compared at a time.
+                          ) -> Tuple[np.ndarray, np.ndarray]:  # Distances and indices, both (m, k), nearest first.
+    """
+    Exact k nearest neighbors from |q|^2 - 2 q.x + |x|^2, computed one block of indexed vectors at a time
+    so the distance matrix never exceeds (m, reference_block). The expansion loses precision in float32,
+    so the distances of the k candidates are recomputed directly in float64 before the final sort.
+    """
+    vectors, squared_norms = index['vectors'], index['squared_norms']
+    queries = queries.astype(vectors.dtype, copy=False)
+    query_norms = np.einsum('ij,ij->i', queries, queries, dtype=np.float64)
+    best_distances = np.full((len(queries), 0), np.inf)
+    best_indices = np.empty((len(queries), 0), dtype=np.int64)
+    for start in range(0, len(vectors), reference_block):
+        block = slice(start, start + reference_block)
+        distances = query_norms[:, None] - 2 * (queries @ vectors[block].T) + squared_norms[None, block]
+        candidates = np.concatenate([best_distances, distances], axis=1)
+        candidate_indices = np.concatenate([best_indices, np.broadcast_to(
+            np.arange(block.start, block.start + distances.shape[1]), distances.shape)], axis=1)
+        keep = np.argpartition(candidates, k - 1, axis=1)[:, :k] if candidates.shape[1] > k else \
+            np.broadcast_to(np.arange(candidates.shape[1]), candidates.shape)
+        best_distances = np.take_along_axis(candidates, keep, axis=1)
+        best_indices = np.take_along_axis(candidate_indices, keep, axis=1)
+    differences = queries[:, None, :].astype(np.float64) - vectors[best_indices]
+    best_distances = np.sqrt(np.einsum('ijk,ijk->ij', differences, differences))
+    order = np.argsort(best_distances, axis=1, kind='stable')
+    return np.take_along_axis(best_distances, order, axis=1), np.take_along_axis(best_indices, order, axis=1)
+
+# %% ../nbs/10_neighbors.ipynb 13
+def query_orbit_index(index: Dict[str, Any],      # Index from `build_orbit_index` or `load_orbit_index`.
+                      queries: np.ndarray,        # Query vectors, flattened like the indexed ones.
+                      k: int = 1,                 # Number of neighbors of every query.
+                      block_size: int = 1024,     # Number of queries answered together.
+                      reference_block: int = 16384  # Indexed vectors compared at a time by the brute-force search.
+                     ) -> Tuple[np.ndarray,       # Distances to the k nearest indexed vectors, shape (m, k).
+                                np.ndarray,       # Indices of the k nearest indexed vectors, shape (m, k).
+                                Dict[str, float]]:  # Query count, wall time, throughput and per-query latency.
+    """
+    Answer k-NN queries block by block. Latencies are per query, amortized over each block;
+    the report gives their mean, median and 95th percentile in milliseconds.
+    """
+    queries = np.asarray(queries).reshape(len(queries), -1)
+    k = min(k, len(index['vectors']))
+    distances = np.empty((len(queries), k))
+    indices = np.empty((len(queries), k), dtype=np.int64)
+    latencies = []
+    start_time = time.perf_counter()
+    for start in range(0, len(queries), block_size):
+        block = slice(start, start + block_size)
+        block_start = time.perf_counter()
+        if index['method'] == 'brute':
+            distances[block], indices[block] = _brute_force_neighbors(index, queries[block], k, reference_block)
+        else:
+            distances[block], indices[block] = index['tree'].query(queries[block], k=k)
+        block_length = len(distances[block])
+        latencies.extend([(time.perf_counter() - block_start) / block_length * 1e3] * block_length)
+    seconds = time.perf_counter() - start_time
+    report = {'queries': len(queries),
+              'seconds': seconds,
+              'queries_per_second': len(queries) / seconds if seconds > 0 else float('inf'),
+              'mean_latency_ms': float(np.mean(latencies)) if latencies else 0.0,
+              'median_latency_ms': float(np.median(latencies)) if latencies else 0.0,
+              'p95_latency_ms': float(np.percentile(latencies, 95)) if latencies else 0.0}
+    return distances, indices, report
+
+# %% ../nbs/10_neighbors.ipynb 14
+def novelty_metrics(index: Dict[str, Any],     # Index of the real orbits.
+                    generated: np.ndarray,     # Generated orbits or latents, flattened like the indexed ones.
+                    memorization_threshold: Optional[float] = None,  # Distance below which a generated orbit counts as a copy.
+                    **kwargs                   # Additional keyword arguments for `query_orbit_index`.
+                   ) -> Tuple[Dict[str, np.ndarray],  # Per generated orbit 'distance' and 'neighbor' (nearest real orbit).
+                              Dict[str, float]]:      # Novelty, coverage and memorization summary plus the query report.
+    """
+    Novelty is the distance of each generated orbit to its nearest real orbit; coverage is the fraction of real
+    orbits that are the nearest neighbor of at least one generated orbit.
+    """
+    distances, indices, report = query_orbit_index(index, generated, k=1, **kwargs)
+    results = {'distance': distances[:, 0], 'neighbor': indices[:, 0]}
+    summary = {'mean_distance': float(results['distance'].mean()) if len(distances) else float('nan'),
+               'median_distance': float(np.median(results['distance'])) if len(distances) else float('nan'),
+               'coverage': len(np.unique(results['neighbor'])) / len(index['vectors'])}
+    if memorization_threshold is not None:
+        summary['memorized'] = float(np.mean(results['distance'] < memorization_threshold)) if len(distances) else 0.0
+    return results, {**summary, **report}
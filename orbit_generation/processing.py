@@ -2,51 +2,57 @@
 
 # %% auto 0
 __all__ = ['resample_3d_array', 'average_downsample_3d_array', 'reorder_orbits', 'pad_and_convert_to_3d',
-           'segment_and_convert_to_3d', 'add_time_vector_to_orbits']
+           'segment_and_convert_to_3d', 'pack_orbits', 'unpack_orbit', 'collate_packed', 'packed_batches',
+           'add_time_vector_to_orbits', 'fit_feature_scaler', 'scale_features', 'inverse_scale_features',
+           'save_feature_scaler', 'load_feature_scaler']
 
 # %% ../nbs/02_processing.ipynb 2
-from scipy.interpolate import interp1d
 import numpy as np
-from typing import Tuple, Any, List, Dict
+from typing import Tuple, Any, List, Dict, Optional
 
-# %% ../nbs/02_processing.ipynb 5
+from .profiling import instrument
+
+# %% ../nbs/02_processing.ipynb 4
+def _float_dtype(data: np.ndarray  # Input array.
+                ) -> np.dtype:     # Floating point dtype computations on `data` are done in.
+    """
+    Processing keeps the precision of floating point input (float32 stays float32) and uses float64 for anything else.
+    """
+    return data.dtype if np.issubdtype(data.dtype, np.floating) else np.dtype(np.float64)
+
+# %% ../nbs/02_processing.ipynb 6
+@instrument()
 def resample_3d_array(data: np.ndarray,  # The original 3D array to be resampled.
                       axis: int,         # The axis along which to perform the interpolation.
                       target_size: int   # The new size of the axis after resampling.
                      ) -> np.ndarray:
     """
     Resample a 3D numpy array along a specified axis using linear interpolation.
+    Floating point data is interpolated in its own precision, so float32 input stays float32 throughout.
     """
     if axis not in [0, 1, 2]:  # Validate the axis to ensure it's within the correct range.
         raise ValueError("Invalid axis. Axis must be 0, 1, or 2.")
 
-    old_indices = np.linspace(0, 1, num=data.shape[axis])  # Calculate old indices for interpolation.
-    new_indices = np.linspace(0, 1, num=target_size)       # New indices for the target size.
+    # Integer data is interpolated in float64 and cast back, as assigning the interpolated values would do.
+    work_dtype = _float_dtype(data)
 
-    new_shape = list(data.shape)  # Define the shape of the new data array.
-    new_shape[axis] = target_size
-    new_data = np.empty(new_shape, dtype=data.dtype)
-    
-    # Perform interpolation for each slice of the array along the specified axis.
-    if axis == 0:
-        for i in range(data.shape[1]):
-            for j in range(data.shape[2]):
-                interpolator = interp1d(old_indices, data[:, i, j], kind='linear')
-                new_data[:, i, j] = interpolator(new_indices)
-    elif axis == 1:
-        for i in range(data.shape[0]):
-            for j in range(data.shape[2]):
-                interpolator = interp1d(old_indices, data[i, :, j], kind='linear')
-                new_data[i, :, j] = interpolator(new_indices)
-    else:  # axis == 2
-        for i in range(data.shape[0]):
-            for j in range(data.shape[1]):
-                interpolator = interp1d(old_indices, data[i, j, :], kind='linear')
-                new_data[i, j, :] = interpolator(new_indices)
+    old_size = data.shape[axis]
+    positions = np.linspace(0, old_size - 1, num=target_size)  # New samples in units of the old indices.
+    lower = np.clip(np.floor(positions).astype(np.intp), 0, max(old_size - 2, 0))  # Left neighbour of each sample.
+    upper = np.minimum(lower + 1, old_size - 1)                                     # Right neighbour of each sample.
 
-    return new_data
+    weight_shape = [1, 1, 1]
+    weight_shape[axis] = target_size
+    weights = (positions - lower).astype(work_dtype).reshape(weight_shape)
+
+    # Interpolate all slices at once between the two neighbouring samples.
+    new_data = np.take(data, lower, axis=axis).astype(work_dtype, copy=False)
+    new_data += (np.take(data, upper, axis=axis).astype(work_dtype, copy=False) - new_data) * weights
+
+    return new_data.astype(data.dtype, copy=False)
 
-# %% ../nbs/02_processing.ipynb 9
+# %% ../nbs/02_processing.ipynb 10
+@instrument()
 def average_downsample_3d_array(data: np.ndarray,  # The original 3D array to be downsampled.
                                 axis: int,         # The axis along which to perform the downsampling (0, 1, or 2).
                                 target_size: int   # The desired size of the specified axis after downsampling.
@@ -86,7 +92,7 @@ def average_downsample_3d_array(data: np.ndarray,  # The original 3D array to be
 
     return new_data
 
-# %% ../nbs/02_processing.ipynb 12
+# %% ../nbs/02_processing.ipynb 13
 def reorder_orbits(orbit_dataset: np.ndarray  # The original 3D numpy array representing the orbits.
                   ) -> np.ndarray:
     """
@@ -119,7 +125,8 @@ def reorder_orbits(orbit_dataset: np.ndarray  # The original 3D numpy array repr
     
     return reordered_dataset
 
-# %% ../nbs/02_processing.ipynb 15
+# %% ../nbs/02_processing.ipynb 16
+@instrument()
 def pad_and_convert_to_3d(orbits: Dict[int, np.ndarray],     # Dictionary of orbits with numerical keys.
                           timesteps: int                     # Desired number of timesteps.
                          ) -> np.ndarray:                    # 3D numpy array of padded orbits.
@@ -146,7 +153,8 @@ def pad_and_convert_to_3d(orbits: Dict[int, np.ndarray],     # Dictionary of orb
     # Convert the list of padded arrays to a 3D numpy array and return it
     return np.stack(padded_arrays)
 
-# %% ../nbs/02_processing.ipynb 16
+# %% ../nbs/02_processing.ipynb 17
+@instrument()
 def segment_and_convert_to_3d(orbits: Dict[int, np.ndarray],  # Dictionary of orbits with numerical keys.
                               segment_length: int             # Desired length of each segment.
                              ) -> Tuple[np.ndarray,           # 3D numpy array of segments.
@@ -181,7 +189,67 @@ def segment_and_convert_to_3d(orbits: Dict[int, np.ndarray],  # Dictionary of or
 
     return segments_3d, segment_ids
 
-# %% ../nbs/02_processing.ipynb 18
+# %% ../nbs/02_processing.ipynb 19
+def pack_orbits(orbits: Dict[int, np.ndarray]  # Dictionary of orbits (num_scalars, length) with numerical keys, or a list of them.
+               ) -> Dict[str, np.ndarray]:     # Packed 'values', 'offsets', 'lengths' and orbit 'keys'.
+    """
+    Pack orbits of different lengths without padding.
+    """
+    if not isinstance(orbits, dict):
+        orbits = dict(enumerate(orbits))
+    keys = np.fromiter(orbits.keys(), dtype=np.int64, count=len(orbits))
+    lengths = np.fromiter((orbit.shape[1] for orbit in orbits.values()), dtype=np.int64, count=len(orbits))
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    values = np.concatenate([orbit.T for orbit in orbits.values()]) if len(orbits) else np.empty((0, 0))
+    return {'values': values, 'offsets': offsets, 'lengths': lengths, 'keys': keys}
+
+# %% ../nbs/02_processing.ipynb 20
+def unpack_orbit(packed: Dict[str, np.ndarray],  # Packed orbits from `pack_orbits`.
+                 index: int                      # Position of the orbit in the packed arrays.
+                ) -> np.ndarray:                 # Orbit of shape (num_scalars, length), a view of the packed values.
+    """
+    Get one orbit back from the packed arrays.
+    """
+    return packed['values'][packed['offsets'][index]:packed['offsets'][index + 1]].T
+
+# %% ../nbs/02_processing.ipynb 21
+def collate_packed(packed: Dict[str, np.ndarray],  # Packed orbits from `pack_orbits`.
+                   indices: np.ndarray,            # Positions of the orbits in the batch.
+                   pad_value: float = 0.0          # Value of the padded time steps.
+                  ) -> Tuple[np.ndarray,           # Batch of shape (batch_size, num_scalars, longest length in the batch).
+                             np.ndarray]:          # Mask of shape (batch_size, longest length), True on valid time steps.
+    """
+    Pad a batch of packed orbits to the longest orbit of the batch only.
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    lengths = packed['lengths'][indices]
+    max_length = int(lengths.max()) if len(indices) else 0
+    values = packed['values']
+    batch = np.full((len(indices), max_length, values.shape[1]), pad_value, dtype=values.dtype)
+    mask = np.arange(max_length) < lengths[:, None]
+    # Source rows of every valid time step, gathered in a single indexing operation
+    rows = (packed['offsets'][indices][:, None] + np.arange(max_length))[mask]
+    batch[mask] = values[rows]
+    return batch.transpose(0, 2, 1), mask
+
+# %% ../nbs/02_processing.ipynb 22
+def packed_batches(packed: Dict[str, np.ndarray],  # Packed orbits from `pack_orbits`.
+                   batch_size: int,                # Number of orbits per batch.
+                   shuffle: bool = False,          # Draw the orbits in a random order.
+                   seed: Optional[int] = None,     # Seed of the shuffle.
+                   pad_value: float = 0.0          # Value of the padded time steps.
+                  ):                               # Yields (batch, mask, indices) tuples.
+    """
+    Iterate over packed orbits in batches collated with `collate_packed`.
+    """
+    order = np.arange(len(packed['lengths']))
+    if shuffle:
+        order = np.random.default_rng(seed).permutation(order)
+    for start in range(0, len(order), batch_size):
+        indices = order[start:start + batch_size]
+        yield (*collate_packed(packed, indices, pad_value), indices)
+
+# %% ../nbs/02_processing.ipynb 25
 def add_time_vector_to_orbits(orbits: Dict[int, np.ndarray],  # Dictionary of orbits with numerical keys.
                               propagated_periods: List[float], # List of propagated periods for each orbit.
                               periods: List[float]            # List of periods for each orbit.
@@ -199,7 +267,7 @@ def add_time_vector_to_orbits(orbits: Dict[int, np.ndarray],  # Dictionary of or
         period = periods[key]
 
         # Compute the new time vector
-        tvec = np.linspace(0, propagated_period * period, orbit.shape[1])
+        tvec = np.linspace(0, propagated_period * period, orbit.shape[1], dtype=_float_dtype(orbit))
 
         # Add the time vector as the first vector in the orbit array
         updated_orbit = np.vstack([tvec, orbit])
@@ -208,3 +276,132 @@ def add_time_vector_to_orbits(orbits: Dict[int, np.ndarray],  # Dictionary of or
         updated_orbits[key] = updated_orbit
 
     return updated_orbits
+
+# %% ../nbs/02_processing.ipynb 27
+@instrument()
+def fit_feature_scaler(data: np.ndarray,  # Orbit data of shape (num_orbits, num_features, num_time_points), e.g. a memmap.
+                       method: str = 'minmax',  # 'minmax' to map each feature to `feature_range`, 'standard' for zero mean and unit std.
+                       feature_range: Tuple[float, float] = (0, 1),  # Target range of the 'minmax' method.
+                       chunk_size: int = 1024  # Number of orbits read at a time.
+                      ) -> Dict[str, Any]:  # Scaler parameters: per-feature statistics plus `scale` and `shift`.
+    """
+    Fit a per-feature scaler in a single streaming pass over the orbits, with float64 accumulators.
+    Scaling is `data * scale + shift` along the feature axis (axis 1).
+    """
+    if method not in ['minmax', 'standard']:
+        raise ValueError("method must be 'minmax' or 'standard'")
+
+    num_features = data.shape[1]
+    if method == 'minmax':
+        lower = np.full(num_features, np.inf)
+        upper = np.full(num_features, -np.inf)
+        for start in range(0, data.shape[0], chunk_size):
+            chunk = np.asarray(data[start:start + chunk_size])
+            lower = np.minimum(lower, chunk.min(axis=(0, 2)))
+            upper = np.maximum(upper, chunk.max(axis=(0, 2)))
+        span = np.where(upper > lower, upper - lower, 1.0)  # Constant features are only shifted
+        scale = (feature_range[1] - feature_range[0]) / span
+        shift = feature_range[0] - lower * scale
+        return {'method': method, 'feature_range': list(feature_range), 'min': lower, 'max': upper,
+                'scale': scale, 'shift': shift}
+
+    # Combine the per-chunk means and squared deviations (Chan et al.) for a numerically stable variance
+    count, mean, squares = 0, np.zeros(num_features), np.zeros(num_features)
+    for start in range(0, data.shape[0], chunk_size):
+        chunk = np.asarray(data[start:start + chunk_size])
+        chunk_count = chunk.shape[0] * chunk.shape[2]
+        chunk_mean = chunk.mean(axis=(0, 2), dtype=np.float64)
+        chunk_squares = ((chunk.astype(np.float64) - chunk_mean[None, :, None]) ** 2).sum(axis=(0, 2))
+        delta = chunk_mean - mean
+        total = count + chunk_count
+        mean = mean + delta * chunk_count / total
+        squares = squares + chunk_squares + delta ** 2 * count * chunk_count / total
+        count = total
+    std = np.sqrt(squares / count)
+    std = np.where(std > 0, std, 1.0)  # Constant features are only centred
+    return {'method': method, 'mean': mean, 'std': std, 'scale': 1 / std, 'shift': -mean / std}
+
+# %% ../nbs/02_processing.ipynb 28
+def _apply_feature_scaling(data: np.ndarray,   # Orbit data of shape (num_orbits, num_features, num_time_points).
+                           scale: np.ndarray,  # Per-feature factor.
+                           shift: np.ndarray,  # Per-feature offset, added after the factor.
+                           inplace: bool,      # Overwrite `data` instead of returning a new array.
+                           chunk_size: int     # Number of orbits transformed at a time.
+                          ) -> np.ndarray:
+    """
+    Compute `data * scale + shift` chunk by chunk in the floating point dtype of `data`.
+    """
+    dtype = _float_dtype(data)
+    if inplace and dtype != data.dtype:
+        raise TypeError("In-place scaling needs floating point data.")
+    scale = np.asarray(scale, dtype=dtype)[None, :, None]
+    shift = np.asarray(shift, dtype=dtype)[None, :, None]
+    output = data if inplace else np.empty(data.shape, dtype=dtype)
+    for start in range(0, data.shape[0], chunk_size):
+        block = output[start:start + chunk_size]
+        if not inplace:
+            block[...] = data[start:start + chunk_size]
+        block *= scale
+        block += shift
+    return output
+
+# %% ../nbs/02_processing.ipynb 29
+@instrument()
+def scale_features(data: np.ndarray,          # Orbit data of shape (num_orbits, num_features, num_time_points).
+                   scaler: Dict[str, Any],    # Parameters from `fit_feature_scaler` or `load_feature_scaler`.
+                   inplace: bool = False,     # Overwrite `data` (e.g. a memmap opened with 'r+') instead of copying it.
+                   chunk_size: int = 1024     # Number of orbits transformed at a time.
+                  ) -> np.ndarray:            # The scaled data.
+    """
+    Scale every feature with the fitted parameters.
+    """
+    return _apply_feature_scaling(data, scaler['scale'], scaler['shift'], inplace, chunk_size)
+
+# %% ../nbs/02_processing.ipynb 30
+@instrument()
+def inverse_scale_features(data: np.ndarray,          # Scaled data of shape (num_orbits, num_features, num_time_points).
+                           scaler: Dict[str, Any],    # Parameters from `fit_feature_scaler` or `load_feature_scaler`.
+                           inplace: bool = False,     # Overwrite `data` instead of copying it.
+                           chunk_size: int = 1024     # Number of orbits transformed at a time.
+                          ) -> np.ndarray:            # The data in the original units.
+    """
+    Undo `scale_features`, e.g. on generated orbits.
+    """
+    scale = np.asarray(scaler['scale'], dtype=np.float64)
+    return _apply_feature_scaling(data, 1 / scale, -np.asarray(scaler['shift']) / scale, inplace, chunk_size)
+
+# %% ../nbs/02_processing.ipynb 31
+def save_feature_scaler(scaler: Dict[str, Any],  # Parameters from `fit_feature_scaler`.
+                        file_path: str           # Path ending in .json or .npz.
+                       ) -> None:
+    """
+    Save the scaler parameters to a small JSON or NPZ file.
+    """
+    if file_path.endswith('.json'):
+        import json
+        with open(file_path, 'w') as f:
+            json.dump({key: np.asarray(value).tolist() if isinstance(value, np.ndarray) else value
+                       for key, value in scaler.items()}, f, indent=2)
+    elif file_path.endswith('.npz'):
+        np.savez(file_path, **scaler)
+    else:
+        raise ValueError("Unsupported file extension. Supported extensions are '.json' or '.npz'.")
+
+# %% ../nbs/02_processing.ipynb 32
+def load_feature_scaler(file_path: str  # Path of a file written by `save_feature_scaler`.
+                       ) -> Dict[str, Any]:  # Scaler parameters.
+    """
+    Load scaler parameters saved with `save_feature_scaler`.
+    """
+    if file_path.endswith('.json'):
+        import json
+        with open(file_path) as f:
+            scaler = json.load(f)
+    elif file_path.endswith('.npz'):
+        with np.load(file_path) as f:
+            scaler = {key: f[key] for key in f.files}
+    else:
+        raise ValueError("Unsupported file extension. Supported extensions are '.json' or '.npz'.")
+    # NPZ stores the method as a 0-d string array; everything else is numeric
+    return {key: str(value) if key == 'method' else np.asarray(value, dtype=np.float64)
+            for key, value in scaler.items()}
@@ -0,0 +1,136 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/12_profiling.ipynb.
+
+# %% auto 0
+__all__ = ['instrument', 'record_solver', 'profile_run', 'save_profile', 'load_profile', 'profile_summary']
+
+# %% ../nbs/12_profiling.ipynb 2
+import json
+import time
+import functools
+import contextlib
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional
+
+# %% ../nbs/12_profiling.ipynb 5
+_ACTIVE_PROFILES: List[Dict[str, Any]] = []  # Profiles of the enclosing `profile_run` blocks, innermost last.
+
+def _record(name: str,    # Name of the instrumented function.
+            **counters    # Amounts added to its counters: calls, seconds, nfev, njev, nlu or bytes.
+           ) -> None:
+    """
+    Add to the counters of a function in every active profile.
+    """
+    for profile in _ACTIVE_PROFILES:
+        record = profile['records'].setdefault(name, {'calls': 0, 'seconds': 0.0, 'nfev': 0, 'njev': 0, 'nlu': 0, 'bytes': 0})
+        for counter, amount in counters.items():
+            record[counter] += amount
+
+# %% ../nbs/12_profiling.ipynb 6
+def _array_bytes(value: Any  # Argument or result of an instrumented function.
+                ) -> int:    # Bytes of the arrays it holds, looking into tuples, lists and dict values.
+    """
+    Count the bytes of the numpy arrays in a value.
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(_array_bytes(item) for item in value)
+    if isinstance(value, dict):
+        return sum(_array_bytes(item) for item in value.values())
+    return 0
+
+# %% ../nbs/12_profiling.ipynb 7
+def instrument(name: Optional[str] = None,  # Name of the record, the function name by default.
+               bytes_from: str = 'inputs'   # Count the array bytes of the 'inputs' or of the 'output' (e.g. for loaders).
+              ) -> Callable:                # Decorator.
+    """
+    Decorator recording calls, wall time and bytes processed of a function while a `profile_run` is active.
+    """
+    if bytes_from not in ('inputs', 'output'):
+        raise ValueError("bytes_from must be 'inputs' or 'output'.")
+
+    def decorator(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _ACTIVE_PROFILES:
+                return func(*args, **kwargs)
+            start_time = time.perf_counter()
+            result = None
+            try:
+                result = func(*args, **kwargs)
+                return result
+            finally:
+                seconds = time.perf_counter() - start_time
+                processed = _array_bytes((args, kwargs)) if bytes_from == 'inputs' else _array_bytes(result)
+                _record(label, calls=1, seconds=seconds, bytes=processed)
+        return wrapper
+    return decorator
+
+# %% ../nbs/12_profiling.ipynb 8
+def record_solver(name: str,  # Name of the instrumented function that called `solve_ivp`.
+                  solution    # Result of `solve_ivp`.
+                 ) -> None:
+    """
+    Add the function evaluations, Jacobian evaluations and LU decompositions of a `solve_ivp` call to a record.
+    """
+    if _ACTIVE_PROFILES:
+        _record(name, nfev=int(solution.nfev), njev=int(solution.njev), nlu=int(solution.nlu))
+
+# %% ../nbs/12_profiling.ipynb 9
+@contextlib.contextmanager
+def profile_run(path: Optional[str] = None,            # Optional JSON file the profile is saved to on exit.
+                metadata: Optional[Dict[str, Any]] = None  # Extra entries stored with the profile, e.g. a model name.
+               ):                                      # Yields the profile, filled in as the block runs.
+    """
+    Record the instrumented functions called inside the block. Runs can be nested; each profile sees every call
+    made while it is active. Also usable as a decorator when given a `path`.
+    """
+    from orbit_generation import __version__
+
+    profile = {'version': __version__, 'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'metadata': metadata or {},
+               'seconds': 0.0, 'records': {}}
+    _ACTIVE_PROFILES.append(profile)
+    start_time = time.perf_counter()
+    try:
+        yield profile
+    finally:
+        profile['seconds'] = time.perf_counter() - start_time
+        _ACTIVE_PROFILES.remove(profile)
+        if path is not None:
+            save_profile(profile, path)
+
+# %% ../nbs/12_profiling.ipynb 11
+def save_profile(profile: Dict[str, Any],  # Profile from `profile_run`.
+                 path: str                 # Path of the JSON file.
+                ) -> None:
+    """
+    Save a profile as JSON, to compare runs across releases.
+    """
+    with open(path, 'w') as f:
+        json.dump(profile, f, indent=2)
+
+# %% ../nbs/12_profiling.ipynb 12
+def load_profile(path: str  # Path of a file written by `save_profile`.
+                ) -> Dict[str, Any]:  # The saved profile.
+    """
+    Load a profile saved with `save_profile`.
+    """
+    with open(path) as f:
+        return json.load(f)
+
+# %% ../nbs/12_profiling.ipynb 13
+def profile_summary(profile: Dict[str, Any]  # Profile from `profile_run` or `load_profile`.
+                   ):                        # DataFrame with one row per function, slowest first.
+    """
+    Summary table of a profile: calls, inclusive wall time, share of the run, solver statistics and throughput.
+    """
+    import pandas as pd
+
+    columns = ['calls', 'seconds', 'nfev', 'njev', 'nlu', 'bytes']
+    summary = pd.DataFrame.from_dict(profile['records'], orient='index', columns=columns)
+    summary['mean_ms'] = summary['seconds'] / summary['calls'].clip(lower=1) * 1e3
+    summary['share'] = summary['seconds'] / profile['seconds'] if profile['seconds'] > 0 else 0.0
+    summary['mb_per_second'] = summary['bytes'] / 2**20 / summary['seconds'].where(summary['seconds'] > 0)
+    return summary.sort_values('seconds', ascending=False)
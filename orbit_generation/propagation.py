@@ -1,14 +1,18 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/07_propagation.ipynb.
 
 # %% auto 0
-__all__ = ['RELATIVE_TOLERANCE', 'ABSOLUTE_TOLERANCE', 'jacobi_constant', 'eom_cr3bp', 'prop_node', 'jacobi_test',
-           'dynamics_defect', 'calculate_errors']
+__all__ = ['RELATIVE_TOLERANCE', 'ABSOLUTE_TOLERANCE', 'jacobi_constant', 'eom_cr3bp', 'enable_prop_node_cache',
+           'disable_prop_node_cache', 'clear_prop_node_cache', 'prop_node_cache_info', 'prop_node', 'jacobi_test',
+           'dynamics_defect', 'calculate_errors', 'jacobi_constants', 'prop_nodes', 'dynamics_defects', 'jacobi_spread',
+           'screen_orbits', 'budgeted_dynamics_defect', 'budgeted_dynamics_defects', 'prop_stm', 'stability_indices',
+           'catalog_stability_indices', 'shooting_nodes', 'correct_periodic_orbits']
 
 # %% ../nbs/07_propagation.ipynb 3
-import matplotlib.pyplot as plt
 import numpy as np
 from scipy.integrate import solve_ivp
-from typing import Tuple, List, Dict, Optional
+from typing import Any, Tuple, List, Dict, Optional
+
+from .profiling import instrument, record_solver
 
 # %% ../nbs/07_propagation.ipynb 6
 RELATIVE_TOLERANCE = 1e-8
@@ -95,12 +99,188 @@ def eom_cr3bp(t: float,  # Time variable (not used in this formulation)
     return Xdot
 
 # %% ../nbs/07_propagation.ipynb 15
+_PROP_NODE_CACHE: Optional[Dict[str, Any]] = None  # State of the opt-in `prop_node` cache, None while disabled.
+
+def enable_prop_node_cache(max_memory_bytes: int = 64 * 2**20,         # Size of the in-memory LRU tier, counting the Python objects of every entry.
+                           path: Optional[str] = None,                 # SQLite file of the on-disk tier, memory only when None.
+                           max_disk_bytes: int = 2**30                 # Size of the on-disk tier.
+                          ) -> None:
+    """
+    Start memoizing `prop_node` results, replacing any cache enabled before with empty counters.
+    """
+    global _PROP_NODE_CACHE
+    import threading
+    from collections import OrderedDict
+
+    disable_prop_node_cache()
+    connection, disk_entries, clock = None, 0, 0
+    if path is not None:
+        import sqlite3
+        # Autocommit without fsync on every write: a lost entry only costs a repropagation. The connection is
+        # shared by all threads, serialized by the cache lock
+        connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute('CREATE TABLE IF NOT EXISTS results (key BLOB PRIMARY KEY, value BLOB NOT NULL, used INTEGER NOT NULL)')
+        disk_entries, clock = connection.execute('SELECT COUNT(*), COALESCE(MAX(used), 0) FROM results').fetchone()
+    _PROP_NODE_CACHE = {'lock': threading.RLock(), 'memory': OrderedDict(), 'memory_bytes': 0, 'max_memory_bytes': max_memory_bytes,
+                        'memory_entry_bytes': _prop_node_memory_entry_bytes(),
+                        'connection': connection, 'disk_entries': disk_entries, 'max_disk_bytes': max_disk_bytes,
+                        'clock': clock, 'hits': 0, 'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+
+# %% ../nbs/07_propagation.ipynb 16
+def disable_prop_node_cache() -> None:
+    """
+    Stop memoizing `prop_node`. The on-disk tier stays on disk for the next `enable_prop_node_cache`.
+    """
+    global _PROP_NODE_CACHE
+    cache = _PROP_NODE_CACHE
+    _PROP_NODE_CACHE = None
+    if cache is not None and cache['connection'] is not None:
+        with cache['lock']:
+            cache['connection'].close()
+
+# %% ../nbs/07_propagation.ipynb 17
+def clear_prop_node_cache() -> None:
+    """
+    Empty both tiers of the enabled cache and reset its counters.
+    """
+    cache = _PROP_NODE_CACHE
+    if cache is None:
+        return
+    with cache['lock']:
+        cache['memory'].clear()
+        cache['memory_bytes'] = 0
+        if cache['connection'] is not None:
+            cache['connection'].execute('DELETE FROM results')
+        cache['disk_entries'] = 0
+        cache.update(hits=0, memory_hits=0, disk_hits=0, misses=0, evictions=0)
+
+# %% ../nbs/07_propagation.ipynb 18
+def prop_node_cache_info() -> Dict[str, Any]:  # Hit/miss counters and tier sizes, {'enabled': False} when disabled.
+    """
+    Report how well the `prop_node` cache is doing.
+    """
+    cache = _PROP_NODE_CACHE
+    if cache is None:
+        return {'enabled': False}
+    lookups = cache['hits'] + cache['misses']
+    return {'enabled': True,
+            'hits': cache['hits'],
+            'memory_hits': cache['memory_hits'],
+            'disk_hits': cache['disk_hits'],
+            'misses': cache['misses'],
+            'hit_rate': cache['hits'] / lookups if lookups else 0.0,
+            'evictions': cache['evictions'],
+            'memory_entries': len(cache['memory']),
+            'memory_bytes': cache['memory_bytes'],
+            'memory_entry_bytes': cache['memory_entry_bytes'],
+            'disk_entries': cache['disk_entries'],
+            'disk_bytes': cache['disk_entries'] * _PROP_NODE_ENTRY_BYTES if cache['connection'] is not None else 0}
+
+# %% ../nbs/07_propagation.ipynb 19
+_PROP_NODE_ENTRY_BYTES = 16 + 6 * 8  # Key digest plus final state of one row of the on-disk tier.
+
+def _prop_node_memory_entry_bytes() -> int:  # Approximate bytes held by one entry of the in-memory tier.
+    """
+    Measure what an in-memory entry really costs: the bytes key and ndarray objects around the 64 B of payload,
+    plus its share of an `OrderedDict` (hash table and linked-list node).
+    """
+    import sys
+    from collections import OrderedDict
+    sample = OrderedDict((i.to_bytes(16, 'little'), None) for i in range(4096))
+    return sys.getsizeof(bytes(16)) + sys.getsizeof(np.zeros(6)) + sys.getsizeof(sample) // len(sample)
+
+def _prop_node_cache_key(X: np.ndarray,  # Initial state in float64.
+                         dt: float,      # Time step.
+                         mu: float,      # Gravitational parameter
+                         method: str,    # `solve_ivp` method.
+                         rtol: float,    # Relative tolerance.
+                         atol: float     # Absolute tolerance.
+                        ) -> bytes:      # 16-byte digest identifying the propagation.
+    """
+    Hash everything the result of `prop_node` depends on.
+    """
+    import hashlib
+    settings = np.array([dt, mu, rtol, atol], dtype=np.float64).tobytes()
+    return hashlib.blake2b(X.tobytes() + settings + method.encode(), digest_size=16).digest()
+
+# %% ../nbs/07_propagation.ipynb 20
+def _prop_node_cache_remember(key: bytes,        # Cache key.
+                              value: np.ndarray  # Final state.
+                             ) -> None:
+    """
+    Put an entry at the recent end of the in-memory tier, evicting the least recently used ones beyond its size.
+    """
+    cache = _PROP_NODE_CACHE
+    memory = cache['memory']
+    if key not in memory:
+        cache['memory_bytes'] += cache['memory_entry_bytes']
+    memory[key] = value
+    memory.move_to_end(key)
+    while cache['memory_bytes'] > cache['max_memory_bytes'] and memory:
+        memory.popitem(last=False)
+        cache['memory_bytes'] -= cache['memory_entry_bytes']
+        cache['evictions'] += 1
+
+# %% ../nbs/07_propagation.ipynb 21
+def _prop_node_cache_get(key: bytes  # Cache key.
+                        ) -> Optional[np.ndarray]:  # Copy of the cached final state, None on a miss.
+    """
+    Look a propagation up in memory first, then on disk. Safe to call from several threads.
+    """
+    cache = _PROP_NODE_CACHE
+    with cache['lock']:
+        if key in cache['memory']:
+            cache['memory'].move_to_end(key)
+            cache['hits'] += 1
+            cache['memory_hits'] += 1
+            return cache['memory'][key].copy()
+        connection = cache['connection']
+        if connection is not None:
+            row = connection.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                cache['clock'] += 1
+                connection.execute('UPDATE results SET used = ? WHERE key = ?', (cache['clock'], key))
+                value = np.frombuffer(row[0], dtype=np.float64).copy()
+                _prop_node_cache_remember(key, value)
+                cache['hits'] += 1
+                cache['disk_hits'] += 1
+                return value.copy()
+        cache['misses'] += 1
+        return None
+
+# %% ../nbs/07_propagation.ipynb 22
+def _prop_node_cache_put(key: bytes,        # Cache key.
+                         value: np.ndarray  # Final state in float64.
+                        ) -> None:
+    """
+    Store a new propagation in both tiers. Safe to call from several threads.
+    """
+    cache = _PROP_NODE_CACHE
+    with cache['lock']:
+        _prop_node_cache_remember(key, value.copy())
+        connection = cache['connection']
+        if connection is None:
+            return
+        cache['clock'] += 1
+        inserted = connection.execute('INSERT OR IGNORE INTO results VALUES (?, ?, ?)', (key, value.tobytes(), cache['clock'])).rowcount
+        cache['disk_entries'] += inserted
+        excess = cache['disk_entries'] - cache['max_disk_bytes'] // _PROP_NODE_ENTRY_BYTES
+        if excess > 0:
+            connection.execute('DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY used LIMIT ?)', (excess,))
+            cache['disk_entries'] -= excess
+            cache['evictions'] += excess
+
+# %% ../nbs/07_propagation.ipynb 24
+@instrument()
 def prop_node(X: np.ndarray,  # Initial state vector with 6 components (x, y, z, v_x, v_y, v_z)
               dt: float,  # Time step for propagation
               mu: float  # Gravitational parameter
              ) -> np.ndarray:
     """
     Return the state X after a given time step dt = T_end - T_start.
+    Results are memoized while the cache of `enable_prop_node_cache` is enabled.
     
     Parameters:
     X (np.ndarray): Initial state vector with 6 components (x, y, z, v_x, v_y, v_z).
@@ -110,6 +290,16 @@ def prop_node(X: np.ndarray,  # Initial state vector with 6 components (x, y, z,
     Returns:
     np.ndarray: Final state vector after time step dt.
     """
+    # Integrate in float64 whatever the precision of the stored orbits
+    X = np.asarray(X, dtype=np.float64)
+
+    key = None
+    if _PROP_NODE_CACHE is not None:
+        key = _prop_node_cache_key(X, dt, mu, 'Radau', RELATIVE_TOLERANCE, ABSOLUTE_TOLERANCE)
+        cached = _prop_node_cache_get(key)
+        if cached is not None:
+            return cached
+
     # Solve the initial value problem using the eom_cr3bp function
     sol = solve_ivp(
         eom_cr3bp, [0, dt], X, args=(mu,), dense_output=True,
@@ -117,9 +307,14 @@ def prop_node(X: np.ndarray,  # Initial state vector with 6 components (x, y, z,
     )
     
     # Return the final state vector
-    return sol.y.T[-1]
+    record_solver('prop_node', sol)
+    final = sol.y.T[-1]
+    if key is not None:
+        _prop_node_cache_put(key, final)
+    return final
 
-# %% ../nbs/07_propagation.ipynb 18
+# %% ../nbs/07_propagation.ipynb 27
+@instrument()
 def jacobi_test(X: np.ndarray,  # State vector with shape (n, 6) or (n, 7), where n is the number of samples
                 mu: float  # Gravitational parameter
                ) -> float:
@@ -134,6 +329,7 @@ def jacobi_test(X: np.ndarray,  # State vector with shape (n, 6) or (n, 7), wher
     Returns:
     float: Cumulative energy error with respect to the initial value.
     """
+    X = np.asarray(X, dtype=np.float64)  # Energies are compared in float64, also for float32 orbits
     n, k = np.shape(X)
     
     # Initial Jacobi constant
@@ -147,7 +343,8 @@ def jacobi_test(X: np.ndarray,  # State vector with shape (n, 6) or (n, 7), wher
     
     return err
 
-# %% ../nbs/07_propagation.ipynb 19
+# %% ../nbs/07_propagation.ipynb 28
+@instrument()
 def dynamics_defect(X: np.ndarray,  # Time-state vector with shape (n, 7), where the first column is the time vector
                     mu: float  # Gravitational parameter
                    ) -> Tuple[float, float]:
@@ -163,6 +360,7 @@ def dynamics_defect(X: np.ndarray,  # Time-state vector with shape (n, 7), where
     Returns:
     Tuple[float, float]: Cumulative errors in position and velocity.
     """
+    X = np.asarray(X, dtype=np.float64)  # Time steps and defects are computed in float64, also for float32 orbits
     n, m = np.shape(X)
     if m != 7:
         raise TypeError("X must be of size (n, 7). The first column is the time vector.")
@@ -182,7 +380,8 @@ def dynamics_defect(X: np.ndarray,  # Time-state vector with shape (n, 7), where
     
     return errX, errV
 
-# %% ../nbs/07_propagation.ipynb 21
+# %% ../nbs/07_propagation.ipynb 31
+@instrument()
 def calculate_errors(orbit_data: np.ndarray,  # 3D array of orbit data
                      mu: float,  # Gravitational parameter
                      orbit_indices: List[int] = None,  # List of integers referring to the orbits to analyze
@@ -223,7 +422,7 @@ def calculate_errors(orbit_data: np.ndarray,  # 3D array of orbit data
         raise ValueError("Invalid orbit_data shape. Must be (n, 6, m) or (n, 7, m)")
 
     num_time_points = orbit_data.shape[2]
-    tvec = orbit_data[0, 0, :]  # Time vector from the data
+    tvec = np.asarray(orbit_data[0, 0, :], dtype=np.float64)  # Time vector from the data
     
     # Ensure the time vector is strictly increasing
     if not np.all(np.diff(tvec) > 0):
@@ -236,7 +435,8 @@ def calculate_errors(orbit_data: np.ndarray,  # 3D array of orbit data
         error_evolution = np.zeros(num_time_points - 1)
         
         for idx in orbit_indices:
-            selected_orbit = orbit_data[idx, :, :].T  # Transpose to shape (num_time_points, 7)
+            # Transpose to shape (num_time_points, 7), promoting only this orbit to float64
+            selected_orbit = np.asarray(orbit_data[idx, :, :].T, dtype=np.float64)
             
             if error_type == 'position':
                 pos_error, _ = dynamics_defect(selected_orbit, mu)
@@ -275,6 +475,8 @@ def calculate_errors(orbit_data: np.ndarray,  # 3D array of orbit data
             print(f"Cumulative {error_type} error for selected orbits: {cumulative_error}")
             print(f"Average {error_type} error per time step: {avg_error_per_timestep}")
             
+            import matplotlib.pyplot as plt  # Plotting is optional, so matplotlib is imported on demand.
+
             # Display the error evolution as a chart
             plt.figure(figsize=(10, 6))
             plt.plot(tvec[:-1], error_evolution, label=f'{error_type.capitalize()} Error Evolution')
@@ -289,3 +491,448 @@ def calculate_errors(orbit_data: np.ndarray,  # 3D array of orbit data
     
     return errors
 
+
+# %% ../nbs/07_propagation.ipynb 35
+def jacobi_constants(states: np.ndarray,  # States with the 6 components (x, y, z, xp, yp, zp) on the last axis.
+                     mu: float            # Gravitational parameter
+                    ) -> np.ndarray:      # Jacobi constant of every state, shape `states.shape[:-1]`.
+    """
+    Vectorized `jacobi_constant` for any number of states, computed in float64.
+    """
+    states = np.asarray(states, dtype=np.float64)
+    if states.shape[-1] != 6:
+        raise TypeError("Define state vectors of length 6 on the last axis")
+    x, y, z, xp, yp, zp = np.moveaxis(states, -1, 0)
+    mu1 = 1 - mu
+    r1 = np.sqrt((x + mu)**2 + y**2 + z**2)
+    r2 = np.sqrt((x - mu1)**2 + y**2 + z**2)
+    E = 0.5 * (xp**2 + yp**2 + zp**2) - 0.5 * (x**2 + y**2) - mu1 / r1 - mu / r2 - 0.5 * mu1 * mu
+    return -2 * E
+
+# %% ../nbs/07_propagation.ipynb 36
+def _eom_cr3bp_normalized(tau: float,       # Normalized time (not used in this formulation)
+                          Y: np.ndarray,    # Flattened states of shape (6 * m,), component-major.
+                          mu: float,        # Gravitational parameter
+                          dts: np.ndarray   # Time step of each of the m states.
+                         ) -> np.ndarray:
+    """
+    CR3BP equations of motion for m states at once, in the normalized time of each state.
+    """
+    x, y, z, v_x, v_y, v_z = Y.reshape(6, -1)
+    r1_3 = ((x + mu)**2 + y**2 + z**2) ** 1.5
+    r2_3 = ((x - (1 - mu))**2 + y**2 + z**2) ** 1.5
+    pull = (1 - mu) / r1_3 + mu / r2_3
+    x_ddot = x + 2 * v_y - (1 - mu) * (x + mu) / r1_3 - mu * (x - (1 - mu)) / r2_3
+    y_ddot = y - 2 * v_x - y * pull
+    z_ddot = -z * pull
+    return (np.stack([v_x, v_y, v_z, x_ddot, y_ddot, z_ddot]) * dts).ravel()
+
+# %% ../nbs/07_propagation.ipynb 37
+def _batch_tolerances(rtol: float,  # Relative tolerance requested for every state.
+                      atol: float,  # Absolute tolerance requested for every state.
+                      m: int        # Number of states integrated in one `solve_ivp` call.
+                     ) -> Tuple[float, float]:  # Tolerances to pass to `solve_ivp`.
+    """
+    `solve_ivp` controls the RMS error of the whole batch, so the tolerances are divided by the square root of the
+    number of states: every state then meets `rtol`/`atol` as if it were integrated alone.
+    """
+    shrink = np.sqrt(max(m, 1))
+    return max(rtol / shrink, 100 * np.finfo(float).eps), atol / shrink
+
+# %% ../nbs/07_propagation.ipynb 38
+@instrument()
+def prop_nodes(X: np.ndarray,                # Initial states with shape (m, 6).
+               dt: np.ndarray,               # Time step of every state, shape (m,), or a single time step.
+               mu: float,                    # Gravitational parameter
+               rtol: float = RELATIVE_TOLERANCE,  # Relative tolerance of the integrator.
+               atol: float = ABSOLUTE_TOLERANCE,  # Absolute tolerance of the integrator.
+               method: str = 'DOP853',       # Explicit `solve_ivp` method; the batched problem is not stiff.
+               chunk_size: int = 256         # Number of states integrated together.
+              ) -> np.ndarray:               # Final states with shape (m, 6), in float64.
+    """
+    Batched `prop_node`: return every state X[i] after its time step dt[i].
+    Every state meets `rtol`/`atol` as if it were integrated alone (see `_batch_tolerances`). A hard state (e.g. a close
+    lunar flyby) still forces small steps on its whole chunk; smaller chunks confine that cost, larger chunks save
+    Python overhead on smooth orbits.
+    """
+    X = np.asarray(X, dtype=np.float64).reshape(-1, 6)
+    dt = np.broadcast_to(np.asarray(dt, dtype=np.float64), (len(X),))
+    final = np.empty_like(X)
+    for start in range(0, len(X), chunk_size):
+        block = slice(start, start + chunk_size)
+        chunk_rtol, chunk_atol = _batch_tolerances(rtol, atol, len(X[block]))
+        sol = solve_ivp(_eom_cr3bp_normalized, [0, 1], X[block].T.ravel(), args=(mu, dt[block]),
+                        rtol=chunk_rtol, atol=chunk_atol, method=method)
+        record_solver('prop_nodes', sol)
+        final[block] = sol.y[:, -1].reshape(6, -1).T
+    return final
+
+# %% ../nbs/07_propagation.ipynb 39
+@instrument()
+def dynamics_defects(orbits: np.ndarray,  # Orbits with shape (num_orbits, 7, num_time_points), time first.
+                     mu: float,           # Gravitational parameter
+                     **kwargs             # Additional keyword arguments for `prop_nodes`.
+                    ) -> Tuple[np.ndarray, np.ndarray]:  # Cumulative position and velocity errors per orbit.
+    """
+    Batched `dynamics_defect`: all the steps of all the orbits are propagated together with `prop_nodes`.
+    """
+    orbits = np.asarray(orbits, dtype=np.float64)
+    if orbits.ndim != 3 or orbits.shape[1] != 7:
+        raise TypeError("orbits must be of size (num_orbits, 7, num_time_points). The first row is the time vector.")
+    num_orbits, _, num_time_points = orbits.shape
+    starts = orbits[:, 1:, :-1].transpose(0, 2, 1).reshape(-1, 6)
+    ends = orbits[:, 1:, 1:].transpose(0, 2, 1).reshape(-1, 6)
+    dts = np.diff(orbits[:, 0, :], axis=1).ravel()
+    err = (prop_nodes(starts, dts, mu, **kwargs) - ends).reshape(num_orbits, num_time_points - 1, 6)
+    return np.linalg.norm(err[..., :3], axis=-1).sum(axis=1), np.linalg.norm(err[..., 3:], axis=-1).sum(axis=1)
+
+# %% ../nbs/07_propagation.ipynb 42
+def jacobi_spread(orbits: np.ndarray,  # Orbits with shape (num_orbits, 7, num_time_points) (time first) or (num_orbits, 6, num_time_points).
+                  mu: float            # Gravitational parameter
+                 ) -> np.ndarray:      # Max minus min Jacobi constant along every orbit.
+    """
+    Spread of the Jacobi constant along each orbit, computed for all orbits at once.
+    """
+    states = np.asarray(orbits)[:, -6:, :].transpose(0, 2, 1)
+    jacobi = jacobi_constants(states, mu)
+    return jacobi.max(axis=1) - jacobi.min(axis=1)
+
+# %% ../nbs/07_propagation.ipynb 43
+@instrument()
+def screen_orbits(orbits: np.ndarray,                           # Orbits with shape (num_orbits, 7, num_time_points), time first.
+                  mu: float,                                    # Gravitational parameter
+                  jacobi_threshold: float,                      # Largest Jacobi constant spread kept by the first tier.
+                  position_threshold: Optional[float] = None,   # Largest cumulative position defect kept by the second tier.
+                  velocity_threshold: Optional[float] = None,   # Largest cumulative velocity defect kept by the second tier.
+                  **kwargs                                      # Additional keyword arguments for `prop_nodes`.
+                 ) -> Tuple[Dict[str, np.ndarray],              # Per-orbit 'passed', 'jacobi_spread', 'position_defect', 'velocity_defect'.
+                            Dict[str, float]]:                  # Counts removed by each tier and timings.
+    """
+    Two-tier screening: a vectorized Jacobi constant spread test, then `dynamics_defects` on the survivors only.
+    Defects of orbits removed by the first tier are NaN. The report estimates the time saved as the time the
+    second tier would have spent on the removed orbits.
+    """
+    import time
+
+    orbits = np.asarray(orbits)
+    start = time.perf_counter()
+    spread = jacobi_spread(orbits, mu)
+    energy_ok = spread <= jacobi_threshold
+    energy_seconds = time.perf_counter() - start
+
+    position = np.full(len(orbits), np.nan)
+    velocity = np.full(len(orbits), np.nan)
+    start = time.perf_counter()
+    if energy_ok.any():
+        position[energy_ok], velocity[energy_ok] = dynamics_defects(orbits[energy_ok], mu, **kwargs)
+    dynamics_seconds = time.perf_counter() - start
+
+    passed = energy_ok.copy()
+    if position_threshold is not None:
+        passed &= position <= position_threshold
+    if velocity_threshold is not None:
+        passed &= velocity <= velocity_threshold
+
+    num_removed_by_energy = int((~energy_ok).sum())
+    seconds_per_orbit = dynamics_seconds / energy_ok.sum() if energy_ok.any() else 0.0
+    report = {'total': len(orbits),
+              'removed_by_energy': num_removed_by_energy,
+              'removed_by_dynamics': int(energy_ok.sum() - passed.sum()),
+              'passed': int(passed.sum()),
+              'energy_seconds': energy_seconds,
+              'dynamics_seconds': dynamics_seconds,
+              'estimated_seconds_saved': seconds_per_orbit * num_removed_by_energy}
+    results = {'passed': passed, 'jacobi_spread': spread, 'position_defect': position, 'velocity_defect': velocity}
+    return results, report
+
+# %% ../nbs/07_propagation.ipynb 46
+def _coarse_to_fine_order(num_segments: int,  # Number of segments of the orbit.
+                          stride: int         # Every `stride`-th segment is visited in the first pass.
+                         ) -> List[np.ndarray]:  # Segment indices of each pass.
+    """
+    Split the segments into `stride` passes: 0, k, 2k, ... first, then 1, k + 1, ... and so on.
+    """
+    return [np.arange(offset, num_segments, stride) for offset in range(min(stride, num_segments))]
+
+# %% ../nbs/07_propagation.ipynb 47
+def budgeted_dynamics_defect(X: np.ndarray,  # Time-state vector with shape (n, 7), where the first column is the time vector
+                             mu: float,      # Gravitational parameter
+                             max_position_defect: float = np.inf,  # Position defect budget.
+                             max_velocity_defect: float = np.inf,  # Velocity defect budget.
+                             coarse_stride: int = 8                # Number of coarse-to-fine passes, as in `budgeted_dynamics_defects`.
+                            ) -> Tuple[float, float, bool]:  # Position and velocity defects, and whether a budget was exceeded.
+    """
+    `dynamics_defect` with early exit: stop at the first segment after which a budget is exceeded.
+    When the flag is True the returned defects are partial sums.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    n, m = np.shape(X)
+    if m != 7:
+        raise TypeError("X must be of size (n, 7). The first column is the time vector.")
+
+    errX, errV = 0.0, 0.0
+    for segments in _coarse_to_fine_order(n - 1, coarse_stride):
+        for i in segments:
+            err = prop_node(X[i, 1:7], X[i + 1, 0] - X[i, 0], mu) - X[i + 1, 1:7]
+            errX += np.linalg.norm(err[0:3])
+            errV += np.linalg.norm(err[3:6])
+            if errX > max_position_defect or errV > max_velocity_defect:
+                return errX, errV, True
+    return errX, errV, False
+
+# %% ../nbs/07_propagation.ipynb 48
+def budgeted_dynamics_defects(orbits: np.ndarray,  # Orbits with shape (num_orbits, 7, num_time_points), time first.
+                              mu: float,           # Gravitational parameter
+                              max_position_defect: float = np.inf,  # Position defect budget per orbit.
+                              max_velocity_defect: float = np.inf,  # Velocity defect budget per orbit.
+                              coarse_stride: int = 8,               # Number of coarse-to-fine passes.
+                              **kwargs             # Additional keyword arguments for `prop_nodes`.
+                             ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:  # Position and velocity defects, exceeded flags.
+    """
+    Batched budgeted defects. The segments are propagated in `coarse_stride` passes with `prop_nodes`;
+    after every pass the orbits over budget are dropped, so their remaining segments are never integrated.
+    """
+    orbits = np.asarray(orbits, dtype=np.float64)
+    if orbits.ndim != 3 or orbits.shape[1] != 7:
+        raise TypeError("orbits must be of size (num_orbits, 7, num_time_points). The first row is the time vector.")
+    num_orbits = len(orbits)
+    position = np.zeros(num_orbits)
+    velocity = np.zeros(num_orbits)
+    active = np.arange(num_orbits)
+    for segments in _coarse_to_fine_order(orbits.shape[2] - 1, coarse_stride):
+        if len(active) == 0:
+            break
+        starts = orbits[active][:, 1:, segments].transpose(0, 2, 1).reshape(-1, 6)
+        ends = orbits[active][:, 1:, segments + 1].transpose(0, 2, 1).reshape(-1, 6)
+        dts = (orbits[active][:, 0, segments + 1] - orbits[active][:, 0, segments]).ravel()
+        err = (prop_nodes(starts, dts, mu, **kwargs) - ends).reshape(len(active), len(segments), 6)
+        position[active] += np.linalg.norm(err[..., :3], axis=-1).sum(axis=1)
+        velocity[active] += np.linalg.norm(err[..., 3:], axis=-1).sum(axis=1)
+        active = active[(position[active] <= max_position_defect) & (velocity[active] <= max_velocity_defect)]
+    exceeded = np.ones(num_orbits, dtype=bool)
+    exceeded[active] = False
+    return position, velocity, exceeded
+
+# %% ../nbs/07_propagation.ipynb 51
+def _eom_cr3bp_stm_normalized(tau: float,          # Normalized time (not used in this formulation)
+                              Y: np.ndarray,       # Flattened states and STMs of shape (42 * m,).
+                              mu: float,           # Gravitational parameter
+                              periods: np.ndarray  # Integration time of each of the m orbits.
+                             ) -> np.ndarray:
+    """
+    CR3BP equations of motion plus variational equations for m orbits at once, in normalized time.
+    The first 6 * m values are the states (component-major), the rest the STMs with shape (6, 6, m).
+    """
+    m = len(periods)
+    x, y, z, v_x, v_y, v_z = Y[:6 * m].reshape(6, m)
+    phi = Y[6 * m:].reshape(6, 6, m)
+
+    dx1, dx2 = x + mu, x - (1 - mu)
+    r1_2 = dx1**2 + y**2 + z**2
+    r2_2 = dx2**2 + y**2 + z**2
+    a1 = (1 - mu) / r1_2**1.5  # (1 - mu) / r1^3
+    a2 = mu / r2_2**1.5        # mu / r2^3
+    b1 = 3 * a1 / r1_2         # 3 (1 - mu) / r1^5
+    b2 = 3 * a2 / r2_2         # 3 mu / r2^5
+
+    state_dot = np.stack([v_x, v_y, v_z,
+                          x + 2 * v_y - a1 * dx1 - a2 * dx2,
+                          y - 2 * v_x - (a1 + a2) * y,
+                          -(a1 + a2) * z])
+
+    # Hessian of the pseudo-potential
+    hessian = np.empty((3, 3, m))
+    hessian[0, 0] = 1 - a1 - a2 + b1 * dx1**2 + b2 * dx2**2
+    hessian[1, 1] = 1 - a1 - a2 + (b1 + b2) * y**2
+    hessian[2, 2] = -a1 - a2 + (b1 + b2) * z**2
+    hessian[0, 1] = hessian[1, 0] = (b1 * dx1 + b2 * dx2) * y
+    hessian[0, 2] = hessian[2, 0] = (b1 * dx1 + b2 * dx2) * z
+    hessian[1, 2] = hessian[2, 1] = (b1 + b2) * y * z
+
+    # dPhi/dt = A Phi, with the position rows copying the velocity rows of Phi
+    phi_dot = np.empty_like(phi)
+    phi_dot[:3] = phi[3:]
+    phi_dot[3:] = np.einsum('ijm,jkm->ikm', hessian, phi[:3])
+    phi_dot[3] += 2 * phi[4]
+    phi_dot[4] -= 2 * phi[3]
+
+    return np.concatenate([(state_dot * periods).ravel(), (phi_dot * periods).ravel()])
+
+# %% ../nbs/07_propagation.ipynb 52
+def _prop_stm_chunk(X: np.ndarray,        # Initial states with shape (m, 6).
+                    periods: np.ndarray,  # Integration time of each state.
+                    mu: float,            # Gravitational parameter
+                    rtol: float,          # Relative tolerance of the integrator.
+                    atol: float,          # Absolute tolerance of the integrator.
+                    method: str           # `solve_ivp` method.
+                   ) -> Tuple[np.ndarray, np.ndarray]:  # Final states (m, 6) and STMs (m, 6, 6).
+    """
+    Integrate one chunk of states together with their STMs, each to the requested tolerances.
+    """
+    m = len(X)
+    rtol, atol = _batch_tolerances(rtol, atol, m)
+    phi0 = np.broadcast_to(np.eye(6)[:, :, None], (6, 6, m))
+    Y0 = np.concatenate([X.T.ravel(), phi0.ravel()])
+    sol = solve_ivp(_eom_cr3bp_stm_normalized, [0, 1], Y0, args=(mu, periods), rtol=rtol, atol=atol, method=method)
+    record_solver('prop_stm', sol)
+    Y = sol.y[:, -1]
+    return Y[:6 * m].reshape(6, m).T, Y[6 * m:].reshape(6, 6, m).transpose(2, 0, 1)
+
+# %% ../nbs/07_propagation.ipynb 53
+@instrument()
+def prop_stm(X: np.ndarray,                   # Initial states with shape (m, 6).
+             periods: np.ndarray,             # Integration time of every state, shape (m,), or a single time.
+             mu: float,                       # Gravitational parameter
+             rtol: float = 1e-10,             # Relative tolerance of the integrator.
+             atol: float = 1e-10,             # Absolute tolerance of the integrator.
+             method: str = 'DOP853',          # Explicit `solve_ivp` method.
+             chunk_size: int = 256,           # Number of orbits integrated together.
+             n_jobs: int = 1                  # Number of processes integrating chunks in parallel.
+            ) -> Tuple[np.ndarray, np.ndarray]:  # Final states (m, 6) and state transition matrices (m, 6, 6).
+    """
+    Propagate many states together with their 6x6 state transition matrices (a 42-dimensional state per orbit).
+    Integrated over one period, the STMs are the monodromy matrices of the orbits.
+    """
+    X = np.asarray(X, dtype=np.float64).reshape(-1, 6)
+    periods = np.broadcast_to(np.asarray(periods, dtype=np.float64), (len(X),))
+    chunks = [slice(start, start + chunk_size) for start in range(0, len(X), chunk_size)]
+    args = [(X[chunk], periods[chunk], mu, rtol, atol, method) for chunk in chunks]
+
+    if n_jobs == 1 or len(chunks) < 2:
+        results = [_prop_stm_chunk(*chunk_args) for chunk_args in args]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            results = list(executor.map(_prop_stm_chunk, *zip(*args)))
+
+    if not results:
+        return np.empty((0, 6)), np.empty((0, 6, 6))
+    return np.concatenate([final for final, _ in results]), np.concatenate([stm for _, stm in results])
+
+# %% ../nbs/07_propagation.ipynb 54
+def stability_indices(monodromy: np.ndarray  # Monodromy matrices with shape (m, 6, 6).
+                     ) -> np.ndarray:        # Stability index of every orbit, shape (m,).
+    """
+    Stability index 1/2 (|lambda_max| + 1 / |lambda_max|) from the largest eigenvalue of each monodromy matrix.
+    Orbits with an index of 1 are linearly stable; larger values are increasingly unstable.
+    """
+    largest = np.abs(np.linalg.eigvals(monodromy)).max(axis=-1)
+    return 0.5 * (largest + 1 / largest)
+
+# %% ../nbs/07_propagation.ipynb 55
+def catalog_stability_indices(features,         # DataFrame with initial conditions, periods and stored stability indices.
+                              mu: float,        # Gravitational parameter
+                              state_columns: List[str] = ['Initial Position X', 'Initial Position Y', 'Initial Position Z',
+                                                          'Initial Velocity X', 'Initial Velocity Y', 'Initial Velocity Z'],
+                              period_column: str = 'Period',  # Column with the orbit periods.
+                              stability_column: Optional[str] = 'Stability Index',  # Column with the stored indices, if any.
+                              **kwargs          # Additional keyword arguments for `prop_stm`.
+                             ) -> Dict[str, np.ndarray]:  # 'computed', and 'stored' plus 'relative_error' when available.
+    """
+    Recompute the stability indices of a catalog (e.g. from `get_orbit_features`) and compare them with the stored ones.
+    """
+    X = features[state_columns].to_numpy(dtype=np.float64)
+    periods = features[period_column].to_numpy(dtype=np.float64)
+    _, monodromy = prop_stm(X, periods, mu, **kwargs)
+    result = {'computed': stability_indices(monodromy)}
+    if stability_column is not None and stability_column in features:
+        result['stored'] = features[stability_column].to_numpy(dtype=np.float64)
+        result['relative_error'] = np.abs(result['computed'] - result['stored']) / np.abs(result['stored'])
+    return result
+
+# %% ../nbs/07_propagation.ipynb 59
+def shooting_nodes(orbits: np.ndarray,  # Orbits with shape (num_orbits, 7, num_time_points), time first.
+                   num_nodes: int = 1   # Number of shooting nodes per orbit.
+                  ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:  # Nodes (num_orbits, num_nodes, 6), periods (num_orbits,) and arc fractions (num_nodes,).
+    """
+    Take shooting nodes from equally spaced columns of (generated) orbits. The period is the time span of each orbit
+    and every arc covers a fixed fraction of it, taken from the time row of the first orbit.
+    """
+    orbits = np.asarray(orbits, dtype=np.float64)
+    num_time_points = orbits.shape[2]
+    columns = np.round(np.linspace(0, num_time_points - 1, num_nodes + 1)).astype(int)
+    periods = orbits[:, 0, -1] - orbits[:, 0, 0]
+    node_times = orbits[0, 0, columns] - orbits[0, 0, 0]
+    fractions = np.diff(node_times) / node_times[-1]
+    return orbits[:, 1:, columns[:-1]].transpose(0, 2, 1), periods, fractions
+
+# %% ../nbs/07_propagation.ipynb 60
+@instrument()
+def correct_periodic_orbits(nodes: np.ndarray,    # Initial states (num_orbits, 6) or shooting nodes (num_orbits, num_nodes, 6).
+                            periods: np.ndarray,  # Period guess of every orbit.
+                            mu: float,            # Gravitational parameter
+                            fractions: Optional[np.ndarray] = None,  # Fraction of the period covered by each arc, uniform by default.
+                            tolerance: float = 1e-10,   # Largest residual component of a converged orbit.
+                            max_iterations: int = 20,   # Newton iterations before an orbit counts as failed.
+                            divergence: float = 1.0,    # Residual above which an orbit is abandoned.
+                            **kwargs                    # Additional keyword arguments for `prop_stm`.
+                           ) -> Tuple[Dict[str, np.ndarray],  # Per-orbit 'states', 'periods', 'converged', 'iterations', 'residual' and 'nodes'.
+                                      Dict[str, float]]:      # Converged and failed counts, iterations and wall time.
+    """
+    Batched single or multiple shooting differential correction of periodic orbits. Only the orbits that
+    have neither converged nor failed are propagated at every iteration. The arcs of all orbits share `prop_stm`
+    chunks, whose tolerances hold per arc, so a hard candidate does not change how accurately the others converge.
+    """
+    import time
+
+    start_time = time.perf_counter()
+    nodes = np.array(nodes, dtype=np.float64)
+    if nodes.ndim == 2:
+        nodes = nodes[:, None, :]
+    num_orbits, num_nodes, _ = nodes.shape
+    periods = np.array(periods, dtype=np.float64).reshape(num_orbits)
+    fractions = np.full(num_nodes, 1 / num_nodes) if fractions is None else np.asarray(fractions, dtype=np.float64)
+
+    converged = np.zeros(num_orbits, dtype=bool)
+    iterations = np.zeros(num_orbits, dtype=int)
+    residual_norm = np.full(num_orbits, np.inf)
+    active = np.arange(num_orbits)
+    size = 6 * num_nodes
+    identity = np.eye(6)
+
+    for iteration in range(max_iterations + 1):
+        if len(active) == 0:
+            break
+        arc_times = (periods[active, None] * fractions).ravel()
+        final, stm = prop_stm(nodes[active].reshape(-1, 6), arc_times, mu, **kwargs)
+        final = final.reshape(len(active), num_nodes, 6)
+        stm = stm.reshape(len(active), num_nodes, 6, 6)
+
+        # Each arc must end on the next node, the last one on the first node
+        residual = final - np.roll(nodes[active], -1, axis=1)
+        residual_norm[active] = np.abs(residual).max(axis=(1, 2))
+        done = residual_norm[active] < tolerance
+        converged[active[done]] = True
+        keep = ~done & (residual_norm[active] < divergence)
+        if iteration == max_iterations:
+            break
+        active, residual, final, stm = active[keep], residual[keep], final[keep], stm[keep]
+        if len(active) == 0:
+            break
+
+        # Jacobian of the residuals with respect to the nodes and the period
+        jacobian = np.zeros((len(active), size, size + 1))
+        final_dot = _eom_cr3bp_normalized(0, final.reshape(-1, 6).T.ravel(), mu, 1.0).reshape(6, -1).T
+        final_dot = final_dot.reshape(len(active), num_nodes, 6)
+        for k in range(num_nodes):
+            rows = slice(6 * k, 6 * k + 6)
+            following = (k + 1) % num_nodes
+            jacobian[:, rows, 6 * k:6 * k + 6] += stm[:, k]
+            jacobian[:, rows, 6 * following:6 * following + 6] -= identity
+            jacobian[:, rows, -1] = final_dot[:, k] * fractions[k]
+
+        # Minimum-norm Newton step of the underdetermined system
+        step = -np.einsum('aij,aj->ai', np.linalg.pinv(jacobian), residual.reshape(len(active), size))
+        nodes[active] += step[:, :size].reshape(len(active), num_nodes, 6)
+        periods[active] += step[:, -1]
+        iterations[active] += 1
+
+    results = {'states': nodes[:, 0, :], 'periods': periods, 'converged': converged, 'iterations': iterations,
+               'residual': residual_norm, 'nodes': nodes}
+    report = {'total': num_orbits,
+              'converged': int(converged.sum()),
+              'failed': int(num_orbits - converged.sum()),
+              'mean_iterations': float(iterations[converged].mean()) if converged.any() else float('nan'),
+              'max_iterations': int(iterations.max()) if num_orbits else 0,
+              'seconds': time.perf_counter() - start_time}
+    return results, report
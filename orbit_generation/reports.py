@@ -0,0 +1,83 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/08_reports.ipynb.
+
+# %% auto 0
+__all__ = ['render_figures']
+
+# %% ../nbs/08_reports.ipynb 2
+import os
+import time
+import importlib
+import matplotlib
+import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+# %% ../nbs/08_reports.ipynb 7
+def _resolve_plot_function(function: Union[str, Callable]  # Plotting function or its dotted path.
+                          ) -> Callable:
+    """
+    Return the plotting function referenced by a plot spec.
+    """
+    if callable(function):
+        return function
+    module_name, _, function_name = function.rpartition('.')
+    if not module_name:
+        raise ValueError(f"Plot function '{function}' must be a callable or a dotted path 'module.function'.")
+    return getattr(importlib.import_module(module_name), function_name)
+
+# %% ../nbs/08_reports.ipynb 8
+def _init_headless_worker() -> None:
+    """
+    Switch a rendering worker to the non-interactive Agg backend.
+    """
+    matplotlib.use('Agg', force=True)
+
+# %% ../nbs/08_reports.ipynb 9
+def _render_plot_spec(spec: Dict[str, Any],   # Plot spec with 'name', 'function' and optional 'kwargs'.
+                      output_dir: str,        # Directory where the figures are written.
+                      formats: Sequence[str]  # File formats to write, e.g. ('png', 'svg').
+                     ) -> Dict[str, Any]:     # Rendering record with the written files and timings.
+    """
+    Render a single plot spec without showing it and save every figure it produces.
+    """
+    start = time.perf_counter()
+    function = _resolve_plot_function(spec['function'])
+    result = function(**spec.get('kwargs', {}), show=False)
+    figures = result if isinstance(result, list) else [result]
+    plot_seconds = time.perf_counter() - start
+
+    files = []
+    for i, fig in enumerate(figures):
+        stem = spec['name'] if len(figures) == 1 else f"{spec['name']}_{i}"
+        for file_format in formats:
+            file_path = os.path.join(output_dir, f"{stem}.{file_format}")
+            fig.savefig(file_path, format=file_format)
+            files.append(file_path)
+        plt.close(fig)
+
+    total_seconds = time.perf_counter() - start
+    return {'name': spec['name'], 'files': files, 'plot_seconds': plot_seconds,
+            'save_seconds': total_seconds - plot_seconds, 'total_seconds': total_seconds}
+
+# %% ../nbs/08_reports.ipynb 11
+def render_figures(specs: List[Dict[str, Any]],        # Plot specs with 'name', 'function' and optional 'kwargs'.
+                   output_dir: str,                    # Directory where the figures are written.
+                   formats: Sequence[str] = ('png',),  # File formats written for every figure.
+                   n_jobs: Optional[int] = None        # Worker processes; None uses every core and 1 renders in this process.
+                  ) -> List[Dict[str, Any]]:           # One record per spec, in spec order, with its files and timings.
+    """
+    Render many figures headlessly by calling each plotting function with `show=False` and saving the
+    returned figures. Specs are distributed over a process pool whose workers use the Agg backend.
+    """
+    names = [spec['name'] for spec in specs]
+    if len(set(names)) != len(names):
+        raise ValueError("Plot spec names must be unique.")
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Render in this process, figures are closed without ever being shown.
+    if n_jobs == 1:
+        return [_render_plot_spec(spec, output_dir, formats) for spec in specs]
+
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_headless_worker) as executor:
+        futures = [executor.submit(_render_plot_spec, spec, output_dir, formats) for spec in specs]
+        return [future.result() for future in futures]
@@ -0,0 +1,156 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/11_spectral.ipynb.
+
+# %% auto 0
+__all__ = ['fit_spectral', 'evaluate_spectral', 'spectral_resample', 'spectral_compression_report']
+
+# %% ../nbs/11_spectral.ipynb 2
+import time
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional
+
+# %% ../nbs/11_spectral.ipynb 7
+def fit_spectral(orbits: np.ndarray,                    # Orbits of shape (N, 6|7, T), uniformly sampled in time.
+                 kind: str = 'fourier',                 # 'fourier' or 'chebyshev'.
+                 num_harmonics: int = 16,               # Harmonics kept by the Fourier series, besides the mean.
+                 num_segments: int = 4,                 # Chebyshev pieces along the orbit.
+                 degree: int = 12,                      # Degree of every Chebyshev piece.
+                 periods: Optional[np.ndarray] = None,  # Time span of orbits without a time row; evaluation uses fractions of the orbit otherwise.
+                 endpoint: bool = True,                 # The last sample closes the period (Fourier only); otherwise the samples cover [0, P).
+                 dtype: np.dtype = np.float32           # Precision of the stored coefficients (complex for Fourier).
+                ) -> Dict[str, Any]:                    # Representation with the 'kind', 'coefficients', 'start', 'span' and layout.
+    """
+    Fit every channel of every orbit at once: a batched real FFT for the Fourier series,
+    one shared least-squares projection per piece for the Chebyshev polynomials.
+    """
+    orbits = np.asarray(orbits, dtype=np.float64)
+    num_orbits, num_channels, num_time_points = orbits.shape
+    time_row = num_channels == 7
+    states = orbits[:, 1:] if time_row else orbits
+    if time_row:
+        start, span = orbits[:, 0, 0], orbits[:, 0, -1] - orbits[:, 0, 0]
+    else:
+        start = np.zeros(num_orbits)
+        span = np.ones(num_orbits) if periods is None else np.broadcast_to(np.asarray(periods, dtype=np.float64), (num_orbits,)).copy()
+    representation = {'kind': kind, 'time_row': time_row, 'num_time_points': num_time_points}
+
+    if kind == 'fourier':
+        samples = states[..., :-1] if endpoint else states
+        num_samples = samples.shape[-1]
+        if not endpoint:
+            # The samples cover [0, P) and the time row stops one step short of the period
+            span = span * num_samples / (num_samples - 1)
+        if num_harmonics > num_samples // 2:
+            raise ValueError(f"At most {num_samples // 2} harmonics can be fitted from {num_samples} samples per period.")
+        spectrum = np.fft.rfft(samples, axis=-1)[..., :num_harmonics + 1] / num_samples
+        # One-sided weights: harmonics stand for their negative-frequency pair, except the mean and Nyquist terms
+        weights = np.full(num_harmonics + 1, 2.0)
+        weights[0] = 1.0
+        if num_samples % 2 == 0 and num_harmonics == num_samples // 2:
+            weights[-1] = 1.0
+        representation['coefficients'] = (spectrum * weights).astype(np.result_type(dtype, np.complex64))
+        representation['endpoint'] = endpoint
+    elif kind == 'chebyshev':
+        breakpoints = np.linspace(0, 1, num_segments + 1)
+        fractions = np.linspace(0, 1, num_time_points)
+        coefficients = np.empty((num_orbits, states.shape[1], num_segments, degree + 1))
+        for segment in range(num_segments):
+            lower, upper = breakpoints[segment], breakpoints[segment + 1]
+            inside = np.flatnonzero((fractions >= lower - 1e-12) & (fractions <= upper + 1e-12))
+            if len(inside) < degree + 1:
+                raise ValueError(f"Every piece needs at least degree + 1 = {degree + 1} samples, got {len(inside)}.")
+            local = 2 * (fractions[inside] - lower) / (upper - lower) - 1
+            projection = np.linalg.pinv(np.polynomial.chebyshev.chebvander(local, degree))
+            coefficients[:, :, segment] = np.einsum('kt,nct->nck', projection, states[..., inside])
+        representation['coefficients'] = coefficients.astype(dtype)
+        representation['breakpoints'] = breakpoints
+    else:
+        raise ValueError("Unsupported kind. Supported kinds are 'fourier' or 'chebyshev'.")
+
+    representation['start'], representation['span'] = start, span
+    return representation
+
+# %% ../nbs/11_spectral.ipynb 9
+def evaluate_spectral(representation: Dict[str, Any],     # Representation from `fit_spectral`.
+                      times: Optional[np.ndarray] = None, # Times (T',) shared by all orbits or (N, T'), in the units of the time row.
+                      num_points: Optional[int] = None    # Or a number of points spread uniformly over every orbit, laid out like the fitted samples.
+                     ) -> np.ndarray:                     # Orbits of shape (N, 6|7, T') in float64, with the time row if fitted with one.
+    """
+    Evaluate the fitted orbits at arbitrary times in batch. Fourier series are periodic, so times beyond one
+    period wrap around; Chebyshev pieces extrapolate the first and last piece.
+    """
+    start, span = representation['start'], representation['span']
+    if times is None:
+        num_points = representation['num_time_points'] if num_points is None else num_points
+        # Both ends are included, unless the samples were fitted with `endpoint=False` and stop one step short of the period
+        grid = np.linspace(0, 1, num_points) if representation.get('endpoint', True) else np.arange(num_points) / num_points
+        fractions = np.broadcast_to(grid, (len(start), num_points))
+    else:
+        times = np.asarray(times, dtype=np.float64)
+        fractions = (np.broadcast_to(times, (len(start), times.shape[-1])) - start[:, None]) / span[:, None]
+
+    coefficients = representation['coefficients']
+    if representation['kind'] == 'fourier':
+        harmonics = np.arange(coefficients.shape[-1])
+        basis = np.exp(2j * np.pi * fractions[..., None] * harmonics)
+        states = np.einsum('nch,nth->nct', coefficients.astype(np.complex128), basis).real
+    else:
+        breakpoints = representation['breakpoints']
+        segments = np.clip(np.searchsorted(breakpoints, fractions, side='right') - 1, 0, len(breakpoints) - 2)
+        lower, upper = breakpoints[segments], breakpoints[segments + 1]
+        basis = np.polynomial.chebyshev.chebvander(2 * (fractions - lower) / (upper - lower) - 1, coefficients.shape[-1] - 1)
+        # Coefficients of the piece each time falls in, shape (N, T', channels, degree + 1)
+        pieces = coefficients[np.arange(len(start))[:, None], :, segments].astype(np.float64)
+        states = np.einsum('ntck,ntk->nct', pieces, basis)
+
+    if representation['time_row']:
+        return np.concatenate([(start[:, None] + fractions * span[:, None])[:, None], states], axis=1)
+    return states
+
+# %% ../nbs/11_spectral.ipynb 10
+def spectral_resample(orbits: np.ndarray,   # Orbits of shape (N, 6|7, T), periodic over their time span.
+                      target_size: int,     # Number of points of the resampled orbits.
+                      **kwargs              # Additional keyword arguments for `fit_spectral`.
+                     ) -> np.ndarray:       # Orbits of shape (N, 6|7, target_size) in float64.
+    """
+    Resample like `resample_3d_array(orbits, 2, target_size)`, but by evaluating a Fourier series fitted with
+    all harmonics instead of interpolating linearly, so smooth periodic orbits keep their curvature.
+    """
+    num_samples = orbits.shape[2] - 1 if kwargs.get('endpoint', True) else orbits.shape[2]
+    kwargs = {'num_harmonics': num_samples // 2, 'dtype': np.float64, **kwargs}
+    return evaluate_spectral(fit_spectral(orbits, kind='fourier', **kwargs), num_points=target_size)
+
+# %% ../nbs/11_spectral.ipynb 12
+def spectral_compression_report(orbits: np.ndarray,                    # Orbits of shape (N, 6|7, T).
+                                settings: Optional[List[Dict[str, Any]]] = None,  # Keyword arguments of `fit_spectral`, one representation each.
+                                **kwargs                               # Keyword arguments shared by all settings, e.g. `periods`.
+                               ) -> pd.DataFrame:                      # Compression ratio, errors and timings per representation.
+    """
+    Reconstruction error at the original samples versus compression ratio (bytes of the orbits over bytes of the
+    coefficients, start times and spans) for several Fourier and Chebyshev settings.
+    """
+    if settings is None:
+        settings = [{'kind': 'fourier', 'num_harmonics': harmonics} for harmonics in (4, 8, 16, 32)] + \
+                   [{'kind': 'chebyshev', 'num_segments': segments, 'degree': 12} for segments in (2, 4, 8)]
+    orbits = np.asarray(orbits)
+    states = np.asarray(orbits[:, 1:] if orbits.shape[1] == 7 else orbits, dtype=np.float64)
+    rows = {}
+    for setting in settings:
+        setting = {**kwargs, **setting}
+        start_time = time.perf_counter()
+        representation = fit_spectral(orbits, **setting)
+        fit_seconds = time.perf_counter() - start_time
+        reconstructed = evaluate_spectral(representation)
+        evaluate_seconds = time.perf_counter() - start_time - fit_seconds
+        if representation['time_row']:
+            reconstructed = reconstructed[:, 1:]
+        error = np.abs(reconstructed - states)
+        stored = representation['coefficients'].nbytes + representation['start'].nbytes + representation['span'].nbytes
+        label = ', '.join(f'{key}={value}' for key, value in setting.items() if key in
+                          ('kind', 'num_harmonics', 'num_segments', 'degree'))
+        rows[label] = {'compression_ratio': orbits.nbytes / stored,
+                       'max_error': error.max(),
+                       'rms_error': np.sqrt(np.mean(error ** 2)),
+                       'fit_seconds': fit_seconds,
+                       'evaluate_seconds': evaluate_seconds}
+    return pd.DataFrame.from_dict(rows, orient='index')
@@ -1,22 +1,23 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/04_statistics.ipynb.
 
 # %% auto 0
-__all__ = ['calculate_overall_statistics', 'plot_time_increments', 'plot_orbit_data_lengths', 'plot_histograms_position',
-           'plot_histograms_comparison', 'plot_latent_space', 'plot_combined_latent_space',
-           'plot_combined_latent_space_with_labels']
+__all__ = ['calculate_overall_statistics', 'plot_time_increments', 'plot_orbit_data_lengths', 'histogram_edges',
+           'histogram_counts', 'plot_histograms_position', 'plot_histograms_comparison', 'plot_latent_space',
+           'plot_combined_latent_space', 'plot_combined_latent_space_with_labels', 'dtw_distance_matrix',
+           'lb_keogh_envelopes', 'lb_keogh', 'dtw_nearest_neighbors']
 
 # %% ../nbs/04_statistics.ipynb 2
+import os
+import mmap
+import time
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib import colormaps
-from sklearn.decomposition import PCA
-from sklearn.manifold import TSNE
-from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
-import umap.umap_ as umap
-from typing import List, Any, Dict, Optional
+from typing import List, Any, Dict, Optional, Tuple
 
 # %% ../nbs/04_statistics.ipynb 7
-def calculate_overall_statistics(orbits: np.ndarray  # The array containing orbit data of shape (number_of_orbits, 6, number_of_time_instants).
+def calculate_overall_statistics(orbits: np.ndarray,  # The array containing orbit data of shape (number_of_orbits, 6, number_of_time_instants).
+                                 mask: Optional[np.ndarray] = None  # Boolean mask of valid time steps (number_of_orbits, number_of_time_instants), e.g. from `collate_packed`.
                                  ) -> Dict[str, Dict[str, float]]:
     """
     Calculate the overall min, mean, max, and percentile statistics for each scalar 
@@ -24,6 +25,7 @@ def calculate_overall_statistics(orbits: np.ndarray  # The array containing orbi
 
     Parameters:
     - orbits (np.ndarray): A numpy array of shape (number_of_orbits, 6, number_of_time_instants) containing orbit data.
+    - mask (np.ndarray, optional): Only the time steps where the mask is True are used, so padding does not bias the statistics.
 
     Returns:
     - Dict[str, Dict[str, float]]: A dictionary with statistics ('min', 'mean', 'max', '25%', '50%', '75%') for each scalar.
@@ -32,12 +34,13 @@ def calculate_overall_statistics(orbits: np.ndarray  # The array containing orbi
     scalar_names = ['posx', 'posy', 'posz', 'velx', 'vely', 'velz']  # List of scalar names for positions and velocities.
     
     for scalar_index, scalar_name in enumerate(scalar_names):
-        scalar_data = orbits[:, scalar_index, :].flatten()  # Flatten data to combine all orbits and time points for each scalar.
+        # Flatten data to combine all orbits and (valid) time points for each scalar.
+        scalar_data = orbits[:, scalar_index, :].flatten() if mask is None else orbits[:, scalar_index, :][mask]
         
         # Calculate statistics for the current scalar and store them in the dictionary.
         stats[scalar_name] = {
             'min': np.min(scalar_data),  # Minimum value.
-            'mean': np.mean(scalar_data),  # Mean value.
+            'mean': np.mean(scalar_data, dtype=np.float64),  # Mean value, accumulated in float64 for float32 data.
             'max': np.max(scalar_data),  # Maximum value.
             '25%': np.percentile(scalar_data, 25),  # 25th percentile.
             '50%': np.median(scalar_data),  # Median, equivalent to the 50th percentile.
@@ -49,8 +52,10 @@ def calculate_overall_statistics(orbits: np.ndarray  # The array containing orbi
 # %% ../nbs/04_statistics.ipynb 10
 def plot_time_increments(orbit_dataset: np.ndarray,  # The 3D numpy array representing the orbits
                          orbits_to_plot: List[int] = None,  # Optional list of integers referring to the orbits to plot
-                         show_legend: bool = True  # Boolean to control the display of the legend
-                        ) -> None:
+                         show_legend: bool = True,  # Boolean to control the display of the legend
+                         show: bool = True,  # Display the figure; when False it is returned instead
+                         mask: Optional[np.ndarray] = None  # Boolean mask of valid time steps, padding is not plotted
+                        ) -> Optional[plt.Figure]:
     """
     Plots the time as a function to visualize how it increments for each orbit.
 
@@ -60,6 +65,8 @@ def plot_time_increments(orbit_dataset: np.ndarray,  # The 3D numpy array repres
                                 and the third dimension is the time steps.
     orbits_to_plot (list[int], optional): List of integers referring to the orbits to plot. If None, plots all orbits.
     show_legend (bool, optional): Whether to display the legend. Default is True.
+    show (bool, optional): Whether to display the figure. If False, the figure is returned instead. Default is True.
+    mask (np.ndarray, optional): Boolean mask of shape (number of orbits, time steps); only valid time steps are plotted.
     """
     num_orbits = orbit_dataset.shape[0]
 
@@ -67,10 +74,12 @@ def plot_time_increments(orbit_dataset: np.ndarray,  # The 3D numpy array repres
     if orbits_to_plot is None:
         orbits_to_plot = list(range(num_orbits))
 
-    plt.figure(figsize=(10, 6))
+    fig = plt.figure(figsize=(10, 6))
 
     for i in orbits_to_plot:
         time_steps = orbit_dataset[i, 0]  # Extract the time steps for the current orbit
+        if mask is not None:
+            time_steps = time_steps[mask[i]]  # Drop the padded time steps
         plt.plot(time_steps, label=f'Orbit {i}')
 
     plt.xlabel('Time Step Index')
@@ -81,10 +90,12 @@ def plot_time_increments(orbit_dataset: np.ndarray,  # The 3D numpy array repres
         plt.legend()
     
     plt.grid(True)
+    if not show:
+        return fig
     plt.show()
 
 # %% ../nbs/04_statistics.ipynb 12
-def plot_orbit_data_lengths(orbit_data, key_range=(1, 36072), dimension=0, bins=30, color='blue', plot=True, title='Histogram of Orbits Time Steps'):
+def plot_orbit_data_lengths(orbit_data, key_range=(1, 36072), dimension=0, bins=30, color='blue', plot=True, title='Histogram of Orbits Time Steps', show=True):
     lengths = []
     
     # Iterate over each dataset name within the provided range
@@ -101,20 +112,105 @@ def plot_orbit_data_lengths(orbit_data, key_range=(1, 36072), dimension=0, bins=
     
     if plot:
         # Plot the histogram of these lengths if plot is True
-        plt.figure(figsize=(10, 6))
+        fig = plt.figure(figsize=(10, 6))
         plt.hist(lengths, bins=bins, color=color, edgecolor='black')
         plt.title(title)
         plt.xlabel('Time Steps')
         plt.ylabel('Frequency')
+        if not show:
+            return fig
         plt.show()
     else:
         # Return lengths data for further analysis
         return lengths
 
 # %% ../nbs/04_statistics.ipynb 13
+def histogram_edges(*datasets: np.ndarray,  # Orbit data arrays of shape (num_orbits, num_scalars, num_time_points).
+                    bins: int = 50,  # Number of bins per scalar.
+                    chunk_size: int = 1024,  # Number of orbits read at a time.
+                    masks: Optional[List[Optional[np.ndarray]]] = None  # Boolean masks of valid time steps, one per dataset.
+                   ) -> np.ndarray:  # Bin edges of shape (num_scalars, bins + 1).
+    """
+    Compute bin edges per scalar spanning the range of all given datasets, so that they share the same bins.
+    The datasets are streamed in chunks of orbits, which keeps memory bounded for memory-mapped arrays.
+    With `masks`, padded time steps are left out of the range.
+    """
+    num_scalars = datasets[0].shape[1]
+    if any(data.shape[1] != num_scalars for data in datasets):
+        raise ValueError("All datasets must have the same number of scalar dimensions.")
+
+    lower = np.full(num_scalars, np.inf)
+    upper = np.full(num_scalars, -np.inf)
+    masks = [None] * len(datasets) if masks is None else masks
+    for data, mask in zip(datasets, masks):
+        for start in range(0, data.shape[0], chunk_size):
+            chunk = np.asarray(data[start:start + chunk_size])
+            if mask is None:
+                lower = np.minimum(lower, chunk.min(axis=(0, 2)))
+                upper = np.maximum(upper, chunk.max(axis=(0, 2)))
+            else:
+                valid = np.asarray(mask[start:start + chunk_size])[:, None, :]
+                lower = np.minimum(lower, np.where(valid, chunk, np.inf).min(axis=(0, 2)))
+                upper = np.maximum(upper, np.where(valid, chunk, -np.inf).max(axis=(0, 2)))
+
+    # Widen degenerate ranges the same way np.histogram does.
+    constant = lower == upper
+    lower[constant] -= 0.5
+    upper[constant] += 0.5
+
+    return np.linspace(lower, upper, bins + 1, axis=1)
+
+# %% ../nbs/04_statistics.ipynb 14
+_HISTOGRAM_CACHE: Dict[tuple, np.ndarray] = {}  # Counts of memory-mapped datasets keyed by file and bin edges.
+
+def _histogram_cache_key(data: np.ndarray,  # Orbit data array.
+                         edges: np.ndarray  # Bin edges of shape (num_scalars, bins + 1).
+                        ) -> Optional[tuple]:  # Cache key, or None if the data cannot be identified reliably.
+    """
+    Identify a memory-mapped dataset by its backing file so its counts can be reused across calls.
+    Views of a memory map are not cached, since they carry the offset of the whole file.
+    """
+    if not isinstance(data, np.memmap) or not isinstance(data.base, mmap.mmap) or data.filename is None:
+        return None
+    return (data.filename, os.stat(data.filename).st_mtime_ns, data.offset, data.shape, data.dtype.str,
+            edges.tobytes())
+
+# %% ../nbs/04_statistics.ipynb 15
+def histogram_counts(data: np.ndarray,  # Orbit data array of shape (num_orbits, num_scalars, num_time_points).
+                     edges: np.ndarray,  # Bin edges of shape (num_scalars, bins + 1), e.g. from `histogram_edges`.
+                     chunk_size: int = 1024,  # Number of orbits read at a time.
+                     use_cache: bool = True,  # Reuse the counts of a memory-mapped dataset computed earlier.
+                     mask: Optional[np.ndarray] = None  # Boolean mask of valid time steps (num_orbits, num_time_points).
+                    ) -> np.ndarray:  # Counts of shape (num_scalars, bins).
+    """
+    Count the values of every scalar into the given bins with `np.histogram`, streaming the orbits in chunks.
+    Values outside the edges are ignored, as are the time steps outside `mask`; masked counts are not cached.
+    """
+    if data.shape[1] != edges.shape[0]:
+        raise ValueError("The bin edges must have one row per scalar dimension.")
+
+    key = _histogram_cache_key(data, edges) if use_cache and mask is None else None
+    if key is not None and key in _HISTOGRAM_CACHE:
+        return _HISTOGRAM_CACHE[key].copy()
+
+    counts = np.zeros((edges.shape[0], edges.shape[1] - 1), dtype=np.int64)
+    for start in range(0, data.shape[0], chunk_size):
+        chunk = np.asarray(data[start:start + chunk_size])
+        valid = None if mask is None else np.asarray(mask[start:start + chunk_size])
+        for i in range(edges.shape[0]):
+            counts[i] += np.histogram(chunk[:, i, :] if valid is None else chunk[:, i, :][valid], bins=edges[i])[0]
+
+    if key is not None:
+        _HISTOGRAM_CACHE[key] = counts.copy()
+    return counts
+
+# %% ../nbs/04_statistics.ipynb 17
 def plot_histograms_position(data: np.ndarray,  # The orbit data array of shape (num_orbits, num_scalars, num_time_points).
-                             save_path: str = None  # Optional path to save the plot image.
-                            ) -> None:
+                             save_path: str = None,  # Optional path to save the plot image.
+                             show: bool = True,  # Display the figure; when False it is returned instead.
+                             bins: int = 50,  # Number of bins per scalar.
+                             mask: Optional[np.ndarray] = None  # Boolean mask of valid time steps, padding is not counted.
+                            ) -> Optional[plt.Figure]:
     """
     Plots histograms for the scalar values (position and velocity in X, Y, Z, and optionally time) across all orbits
     and time points. Handles arrays with 6 or 7 scalar dimensions, with the 7th being 'time'.
@@ -122,6 +218,9 @@ def plot_histograms_position(data: np.ndarray,  # The orbit data array of shape
     Parameters:
     - data (np.ndarray): The orbit data array.
     - save_path (str, optional): If provided, the plot will be saved to this file path.
+    - show (bool, optional): If False, the figure is returned instead of displayed.
+    - bins (int, optional): Number of bins per scalar.
+    - mask (np.ndarray, optional): Boolean mask of shape (num_orbits, num_time_points) of the valid time steps.
     """
     # Check the number of scalars and adjust scalar names accordingly
     num_scalars = data.shape[1]
@@ -136,12 +235,14 @@ def plot_histograms_position(data: np.ndarray,  # The orbit data array of shape
     rows, cols = (3, 3) if num_scalars == 7 else (2, 3)
     fig, axs = plt.subplots(rows, cols, figsize=(15, 5 * rows))  # Adjust height based on rows
     fig.suptitle('Histograms of Position, Velocity Components, and Time (if present) Across All Orbits')
+
+    # Count all orbits and time points for each scalar in a single streaming pass
+    edges = histogram_edges(data, bins=bins, masks=[mask])
+    counts = histogram_counts(data, edges, mask=mask)
     
     for i in range(num_scalars):
-        scalar_values = data[:, i, :].flatten()  # Flatten combines all orbits and time points for each scalar
-        
         row, col = divmod(i, cols)  # Determine subplot position
-        axs[row, col].hist(scalar_values, bins=50, alpha=0.75)  # You can adjust the number of bins
+        axs[row, col].stairs(counts[i], edges[i], fill=True, alpha=0.75)
         axs[row, col].set_title(f'{scalar_names[i]}')
         axs[row, col].set_ylabel('Frequency')
         axs[row, col].set_xlabel('Value')
@@ -152,21 +253,31 @@ def plot_histograms_position(data: np.ndarray,  # The orbit data array of shape
     if save_path:
         plt.savefig(save_path)  # Save the figure to the specified path
 
-    # Display the figure regardless of saving
+    # Display the figure regardless of saving, unless the caller takes it over
+    if not show:
+        return fig
     plt.show()
 
-# %% ../nbs/04_statistics.ipynb 15
+# %% ../nbs/04_statistics.ipynb 19
 def plot_histograms_comparison(data1: np.ndarray,  # First orbit data array of shape (num_orbits, num_scalars, num_time_points).
                                data2: np.ndarray,  # Second orbit data array of shape (num_orbits, num_scalars, num_time_points).
                                label1: str = "Dataset 1",  # Label for the first dataset.
                                label2: str = "Dataset 2",  # Label for the second dataset.
                                save_path: str = None,  # Optional path to save the plot image.
-                               normalize: bool = False  # Normalize histograms to show relative frequencies.
-                               ) -> None:
+                               normalize: bool = False,  # Normalize histograms to show relative frequencies.
+                               show: bool = True,  # Display the figure; when False it is returned instead.
+                               bins: int = 50,  # Number of bins per scalar when `edges` is not given.
+                               edges: Optional[np.ndarray] = None,  # Shared bin edges of shape (num_scalars, bins + 1).
+                               counts1: Optional[np.ndarray] = None,  # Precomputed counts of `data1` for `edges`.
+                               mask1: Optional[np.ndarray] = None,  # Boolean mask of the valid time steps of `data1`.
+                               mask2: Optional[np.ndarray] = None   # Boolean mask of the valid time steps of `data2`.
+                               ) -> Optional[plt.Figure]:
     """
     Plots histograms for scalar values (position, velocity in X, Y, Z, and optionally time) from two datasets on 
     the same chart with different colors. Supports both 6 and 7 scalar dimensions, with the 7th being 'time'.
     Optionally saves the plot to a specified file path and can normalize histograms for relative comparison.
+    Both datasets share the same bin edges; passing `edges` and `counts1` lets many comparisons against the
+    same reference dataset reuse its counts. Masks leave the padded time steps out of the histograms.
     """
     # Check the number of scalars and adjust scalar names accordingly
     num_scalars = data1.shape[1]
@@ -177,6 +288,21 @@ def plot_histograms_comparison(data1: np.ndarray,  # First orbit data array of s
     if num_scalars not in [6, 7]:
         raise ValueError("Data arrays must have either 6 or 7 scalar dimensions.")
 
+    # Count both datasets over shared bin edges
+    if edges is None:
+        if counts1 is not None:
+            raise ValueError("counts1 requires the edges it was computed with.")
+        edges = histogram_edges(data1, data2, bins=bins, masks=[mask1, mask2])
+    if counts1 is None:
+        counts1 = histogram_counts(data1, edges, mask=mask1)
+    counts2 = histogram_counts(data2, edges, mask=mask2)
+
+    if normalize:
+        # Relative frequencies as densities, so that each histogram integrates to one
+        widths = np.diff(edges, axis=1)
+        counts1 = counts1 / np.maximum(counts1.sum(axis=1, keepdims=True), 1) / widths
+        counts2 = counts2 / np.maximum(counts2.sum(axis=1, keepdims=True), 1) / widths
+
     # Setting up the subplot grid
     rows, cols = (3, 3) if num_scalars == 7 else (2, 3)
     fig, axs = plt.subplots(rows, cols, figsize=(15, 5 * rows))
@@ -184,13 +310,10 @@ def plot_histograms_comparison(data1: np.ndarray,  # First orbit data array of s
 
     # Plot histograms
     for i in range(num_scalars):
-        scalar_values1 = data1[:, i, :].flatten()
-        scalar_values2 = data2[:, i, :].flatten()
         row, col = divmod(i, 3)
         
-        density = normalize  # Use the same variable for clarity in the hist function call
-        axs[row, col].hist(scalar_values1, bins=50, alpha=0.75, color='blue', label=label1, density=density)
-        axs[row, col].hist(scalar_values2, bins=50, alpha=0.75, color='green', label=label2, density=density)
+        axs[row, col].stairs(counts1[i], edges[i], fill=True, alpha=0.75, color='blue', label=label1)
+        axs[row, col].stairs(counts2[i], edges[i], fill=True, alpha=0.75, color='green', label=label2)
         
         axs[row, col].set_title(scalar_names[i])
         axs[row, col].set_ylabel('Density' if normalize else 'Frequency')
@@ -202,9 +325,34 @@ def plot_histograms_comparison(data1: np.ndarray,  # First orbit data array of s
     # Saving or showing the plot
     if save_path:
         plt.savefig(save_path)
+    if not show:
+        return fig
     plt.show()
 
-# %% ../nbs/04_statistics.ipynb 19
+# %% ../nbs/04_statistics.ipynb 25
+def _reduction_model(technique: str,     # Technique to use for reduction ('PCA', 't-SNE', 'UMAP', 'LDA').
+                     n_components: int,  # Number of dimensions to reduce to.
+                     **kwargs: Any       # Additional keyword arguments for t-SNE and UMAP.
+                    ) -> Optional[Any]:  # Unfitted model, or None if the technique is unknown.
+    """
+    Build a dimensionality reduction model. scikit-learn and UMAP are imported on first use only,
+    since they dominate the import time of this module.
+    """
+    if technique == 'PCA':
+        from sklearn.decomposition import PCA
+        return PCA(n_components=n_components)
+    if technique == 't-SNE':
+        from sklearn.manifold import TSNE
+        return TSNE(n_components=n_components, **kwargs)
+    if technique == 'UMAP':
+        import umap.umap_ as umap
+        return umap.UMAP(n_components=n_components, **kwargs)
+    if technique == 'LDA':
+        from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
+        return LinearDiscriminantAnalysis(n_components=n_components)
+    return None
+
+# %% ../nbs/04_statistics.ipynb 26
 def plot_latent_space(
         latent_representations: np.ndarray,  # Precomputed latent representations (numpy array).
         labels: np.ndarray,                  # Labels for the data points, used for coloring in the plot.
@@ -213,21 +361,16 @@ def plot_latent_space(
         figsize: tuple = (12, 9),            # Size of the figure for each subplot.
         colors: Optional[List[str]] = None,  # Optional list of colors for the labels. If None, use random colors.
         save_path: Optional[str] = None,     # Optional path to save the plot image.
+        show: bool = True,                   # Display the figures; when False they are returned instead.
         **kwargs: Any                        # Additional keyword arguments for dimensionality reduction methods.
-    ) -> None:
+    ) -> Optional[List[plt.Figure]]:
     """
     Plots and optionally saves the latent space representations using specified dimensionality reduction techniques.
     Each technique's plot is handled in a separate figure, supporting 1D, 2D, or 3D visualizations.
     """
-    models = {
-        'PCA': PCA(n_components=n_components),
-        't-SNE': TSNE(n_components=n_components, **kwargs),
-        'UMAP': umap.UMAP(n_components=n_components, **kwargs),
-        'LDA': LinearDiscriminantAnalysis(n_components=n_components)
-    }
-
+    figures = []
     for technique in techniques:
-        model = models.get(technique)
+        model = _reduction_model(technique, n_components, **kwargs)
         if not model:
             continue  # Skip if model not found in dictionary
 
@@ -259,9 +402,15 @@ def plot_latent_space(
             individual_save_path = f"{save_path}_{technique}.png"
             plt.savefig(individual_save_path)
             print(f"Saved plot to {individual_save_path}")
-        plt.show()
+        if show:
+            plt.show()
+        else:
+            figures.append(fig)
+
+    if not show:
+        return figures
 
-# %% ../nbs/04_statistics.ipynb 24
+# %% ../nbs/04_statistics.ipynb 31
 def plot_combined_latent_space(
         real_data: np.ndarray,                # Real data samples.
         synthetic_data: np.ndarray,           # Synthetic data samples generated by a model.
@@ -271,8 +420,9 @@ def plot_combined_latent_space(
         figsize: tuple = (12, 9),             # Size of the figure for each subplot.
         colors: Optional[List[str]] = None,   # Optional list of colors for the labels. If None, use random colors.
         save_path: Optional[str] = None,      # Optional path to save the plot image.
+        show: bool = True,                    # Display the figures; when False they are returned instead.
         **kwargs: Any                         # Additional keyword arguments for dimensionality reduction methods.
-    ) -> None:
+    ) -> Optional[List[plt.Figure]]:
     """
     Plots the combined latent space of real and synthetic data using specified dimensionality reduction techniques.
     """
@@ -289,7 +439,7 @@ def plot_combined_latent_space(
     latent_representations = latent_outputs[0]  # Assuming the mean of the latent space is the first output
 
     # Plot the latent space using the previously defined function
-    plot_latent_space(
+    return plot_latent_space(
         latent_representations=latent_representations,
         labels=combined_labels,
         techniques=techniques,
@@ -297,11 +447,12 @@ def plot_combined_latent_space(
         figsize=figsize,
         colors=colors,
         save_path=save_path,
+        show=show,
         **kwargs
     )
 
 
-# %% ../nbs/04_statistics.ipynb 25
+# %% ../nbs/04_statistics.ipynb 32
 def plot_combined_latent_space_with_labels(
         real_data: np.ndarray,                # Real data samples.
         synthetic_data: np.ndarray,           # Synthetic data samples generated by a model.
@@ -313,8 +464,9 @@ def plot_combined_latent_space_with_labels(
         real_colors: Optional[List[str]] = None,   # Optional list of colors for the real data labels. If None, use random colors.
         synthetic_color: str = 'red',         # Color for the synthetic data points.
         save_path: Optional[str] = None,      # Optional path to save the plot image.
+        show: bool = True,                    # Display the figures; when False they are returned instead.
         **kwargs: Any                         # Additional keyword arguments for dimensionality reduction methods.
-    ) -> None:
+    ) -> Optional[List[plt.Figure]]:
     """
     Plots the combined latent space of real and synthetic data using specified dimensionality reduction techniques.
     The real data points are colored according to their labels, and the synthetic data points are overlaid in a new color.
@@ -330,15 +482,9 @@ def plot_combined_latent_space_with_labels(
     latent_outputs = encoder.predict(combined_data)
     latent_representations = latent_outputs[0]  # Assuming the mean of the latent space is the first output
 
-    models = {
-        'PCA': PCA(n_components=n_components),
-        't-SNE': TSNE(n_components=n_components, **kwargs),
-        'UMAP': umap.UMAP(n_components=n_components, **kwargs),
-        'LDA': LinearDiscriminantAnalysis(n_components=n_components)
-    }
-
+    figures = []
     for technique in techniques:
-        model = models.get(technique)
+        model = _reduction_model(technique, n_components, **kwargs)
         if not model:
             continue  # Skip if model not found in dictionary
 
@@ -373,4 +519,153 @@ def plot_combined_latent_space_with_labels(
             individual_save_path = f"{save_path}_{technique}.png"
             plt.savefig(individual_save_path)
             print(f"Saved plot to {individual_save_path}")
-        plt.show()
+        if show:
+            plt.show()
+        else:
+            figures.append(fig)
+
+    if not show:
+        return figures
+
+# %% ../nbs/04_statistics.ipynb 34
+def _dtw_series(orbits: np.ndarray  # Orbits of shape (num_orbits, num_channels, num_time_points).
+               ) -> np.ndarray:     # C-contiguous float64 series of shape (num_orbits, num_time_points, num_channels).
+    """
+    Bring orbits to the time-major layout the C backend of `dtaidistance` reads without copying.
+    """
+    return np.ascontiguousarray(np.asarray(orbits, dtype=np.float64).transpose(0, 2, 1))
+
+# %% ../nbs/04_statistics.ipynb 35
+def dtw_distance_matrix(generated: np.ndarray,          # Generated orbits of shape (N, num_channels, num_time_points).
+                        real: np.ndarray,               # Real orbits of shape (M, num_channels, num_time_points).
+                        window: Optional[int] = None,   # Warping window, unconstrained when None.
+                        block_size: int = 256,          # Orbits of each set compared per block.
+                        out_path: Optional[str] = None, # Optional .npy file the N x M matrix is streamed into.
+                        parallel: bool = True           # Use the OpenMP threads of the C backend within each block.
+                       ) -> Tuple[np.ndarray,           # DTW distances of shape (N, M), a read-only memmap with `out_path`.
+                                  Dict[str, float]]:    # Number of pairs, wall time and pairs per second.
+    """
+    Compute the DTW distance of every generated orbit to every real orbit, one block of pairs at a time.
+    Both inputs may be memory-mapped; with `out_path` only one block of orbits and distances is held in memory.
+    """
+    from dtaidistance import dtw_ndim
+
+    start_time = time.perf_counter()
+    num_generated, num_real = len(generated), len(real)
+    if out_path is not None:
+        output = np.lib.format.open_memmap(out_path, mode='w+', dtype=np.float64, shape=(num_generated, num_real))
+    else:
+        output = np.empty((num_generated, num_real))
+
+    for row in range(0, num_generated, block_size):
+        queries = _dtw_series(generated[row:row + block_size])
+        for column in range(0, num_real, block_size):
+            references = _dtw_series(real[column:column + block_size])
+            series = np.concatenate([queries, references])
+            block = dtw_ndim.distance_matrix(series, window=window, block=((0, len(queries)), (len(queries), len(series))),
+                                             compact=True, use_c=True, parallel=parallel)
+            output[row:row + len(queries), column:column + len(references)] = \
+                np.asarray(block).reshape(len(queries), len(references))
+        if out_path is not None:
+            output.flush()
+
+    seconds = time.perf_counter() - start_time
+    if out_path is not None:
+        del output
+        output = np.load(out_path, mmap_mode='r')
+    report = {'pairs': num_generated * num_real,
+              'seconds': seconds,
+              'pairs_per_second': num_generated * num_real / seconds if seconds > 0 else float('inf')}
+    return output, report
+
+# %% ../nbs/04_statistics.ipynb 36
+def lb_keogh_envelopes(real: np.ndarray,            # Real orbits of shape (M, num_channels, num_time_points).
+                       window: Optional[int] = None # Warping window used for the DTW distances.
+                      ) -> Tuple[np.ndarray, np.ndarray]:  # Lower and upper envelopes, both (M, num_time_points, num_channels).
+    """
+    Running minimum and maximum of every real orbit over the time steps reachable within the warping window.
+    """
+    from scipy.ndimage import maximum_filter1d, minimum_filter1d
+
+    series = _dtw_series(real)
+    size = 2 * series.shape[1] - 1 if window is None else 2 * window - 1
+    return minimum_filter1d(series, size, axis=1, mode='nearest'), maximum_filter1d(series, size, axis=1, mode='nearest')
+
+# %% ../nbs/04_statistics.ipynb 37
+def lb_keogh(query: np.ndarray,  # One orbit (num_time_points, num_channels) or a batch (Q, num_time_points, num_channels) in DTW layout.
+             lower: np.ndarray,  # Lower envelopes from `lb_keogh_envelopes`.
+             upper: np.ndarray   # Upper envelopes from `lb_keogh_envelopes`.
+            ) -> np.ndarray:     # LB_Keogh lower bound of the DTW distance to every enveloped orbit, shape (M,) or (Q, M).
+    """
+    Lower bound of the multivariate DTW distance: every query point is matched to some point within the window,
+    so its distance is at least its excursion outside the envelopes, summed over the channels.
+    The bound only holds between series of the same length.
+    """
+    query = np.asarray(query)
+    if query.shape[-2] != lower.shape[1]:
+        raise ValueError(f"LB_Keogh needs series of the same length, got {query.shape[-2]} and {lower.shape[1]} time points.")
+    query = query[..., None, :, :]
+    excess = np.maximum(query - upper, 0) + np.maximum(lower - query, 0)
+    return np.sqrt(np.einsum('...mtc,...mtc->...m', excess, excess))
+
+# %% ../nbs/04_statistics.ipynb 38
+def dtw_nearest_neighbors(generated: np.ndarray,         # Generated orbits of shape (N, num_channels, num_time_points).
+                          real: np.ndarray,              # Real orbits of shape (M, num_channels, num_time_points).
+                          k: int = 1,                    # Number of neighbors of every generated orbit.
+                          window: Optional[int] = None,  # Warping window; narrow windows give tight bounds and prune more.
+                          candidate_block: int = 4096    # (generated, real) pairs bounded together, which sets the memory of the bound pass.
+                         ) -> Tuple[np.ndarray,          # DTW distances to the k nearest real orbits, shape (N, k).
+                                    np.ndarray,          # Indices of the k nearest real orbits, shape (N, k).
+                                    Dict[str, float]]:   # Pair counts, pruning rate, wall time and throughput.
+    """
+    Exact k-NN search under DTW. Candidates are visited in order of their LB_Keogh bound and the search stops once the
+    bound reaches the k-th best distance; the DTW computations themselves abandon early beyond that distance.
+    The bounds of a block of generated orbits are computed at once. LB_Keogh only holds between series of the same
+    length, so generated and real orbits of different lengths are compared without pruning.
+    """
+    from dtaidistance import dtw_ndim
+
+    start_time = time.perf_counter()
+    series = _dtw_series(real)
+    lower, upper = lb_keogh_envelopes(real, window)
+    k = min(k, len(series))
+    distances = np.full((len(generated), k), np.inf)
+    indices = np.full((len(generated), k), -1, dtype=np.int64)
+    computed = 0
+
+    queries = _dtw_series(generated)
+    same_length = queries.shape[1] == series.shape[1]
+    candidates_per_block = max(1, min(len(series), candidate_block))
+    queries_per_block = max(1, candidate_block // candidates_per_block)
+
+    for first in range(0, len(queries), queries_per_block):
+        block = queries[first:first + queries_per_block]
+        bounds = np.zeros((len(block), len(series)))
+        if same_length:
+            for start in range(0, len(series), candidates_per_block):
+                end = start + candidates_per_block
+                bounds[:, start:end] = lb_keogh(block, lower[start:end], upper[start:end])
+
+        for row, query, query_bounds in zip(range(first, first + len(block)), block, bounds):
+            best_distances, best_indices = distances[row], indices[row]
+            for candidate in np.argsort(query_bounds, kind='stable'):
+                if query_bounds[candidate] >= best_distances[-1]:
+                    break
+                max_dist = best_distances[-1] if np.isfinite(best_distances[-1]) else None
+                distance = dtw_ndim.distance(query, series[candidate], window=window, max_dist=max_dist, use_c=True)
+                computed += 1
+                if distance < best_distances[-1]:
+                    position = np.searchsorted(best_distances, distance, side='right')
+                    best_distances[position + 1:] = best_distances[position:-1].copy()
+                    best_indices[position + 1:] = best_indices[position:-1].copy()
+                    best_distances[position], best_indices[position] = distance, candidate
+
+    seconds = time.perf_counter() - start_time
+    pairs = len(generated) * len(series)
+    report = {'pairs': pairs,
+              'dtw_computed': computed,
+              'pruned': pairs - computed,
+              'pruning_rate': (pairs - computed) / pairs if pairs else 0.0,
+              'seconds': seconds,
+              'pairs_per_second': pairs / seconds if seconds > 0 else float('inf')}
+    return distances, indices, report
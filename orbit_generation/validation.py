@@ -0,0 +1,99 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/09_validation.ipynb.
+
+# %% auto 0
+__all__ = ['validate_generated_orbits']
+
+# %% ../nbs/09_validation.ipynb 2
+import os
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Optional, Tuple, Union
+
+from .data import take_orbits
+from .processing import inverse_scale_features
+from .propagation import dynamics_defects, jacobi_constants
+
+# %% ../nbs/09_validation.ipynb 7
+def _prepare_generated_orbits(block: np.ndarray,                 # Chunk of generated orbits.
+                              scaler: Optional[Dict[str, Any]],  # Scaler fitted on (N, 7, T) or (N, 6, T) data, or None.
+                              channels_last: bool,               # The chunk has shape (n, T, channels).
+                              time_step: Optional[float]         # Time step for orbits without a time row.
+                             ) -> np.ndarray:                    # Orbits of shape (n, 7, T) in float64, original units.
+    """
+    Bring a chunk of generated orbits back to the (n, 7, T) layout and units used by the propagation.
+    """
+    block = np.array(block, dtype=np.float64)
+    if channels_last:
+        block = np.ascontiguousarray(block.transpose(0, 2, 1))
+    if scaler is not None:
+        if block.shape[1] == 6 and len(scaler['scale']) == 7:
+            # Orbits without a time row only undo the scaling of the state features
+            scaler = {**scaler, 'scale': np.asarray(scaler['scale'])[1:], 'shift': np.asarray(scaler['shift'])[1:]}
+        block = inverse_scale_features(block, scaler, inplace=True)
+    if block.shape[1] == 6:
+        if time_step is None:
+            raise ValueError("time_step must be provided for orbits without a time row.")
+        tvec = np.arange(block.shape[2]) * time_step
+        block = np.concatenate([np.broadcast_to(tvec, (len(block), 1, len(tvec))), block], axis=1)
+    elif block.shape[1] != 7:
+        raise ValueError("Generated orbits must have 6 or 7 channels.")
+    return block
+
+# %% ../nbs/09_validation.ipynb 8
+def _save_score_table(scores: pd.DataFrame,  # Per-orbit score table.
+                      output_path: str       # Path ending in .parquet or .npz.
+                     ) -> None:
+    """
+    Write the score table as Parquet (needs pyarrow or fastparquet) or as NPZ with one array per column.
+    """
+    if output_path.endswith('.parquet'):
+        scores.to_parquet(output_path)
+    elif output_path.endswith('.npz'):
+        np.savez(output_path, orbit_index=scores.index.to_numpy(),
+                 **{column: scores[column].to_numpy() for column in scores.columns})
+    else:
+        raise ValueError("Unsupported file extension. Supported extensions are '.parquet' or '.npz'.")
+
+# %% ../nbs/09_validation.ipynb 9
+def validate_generated_orbits(generated: Union[np.ndarray, str],  # Generated orbits, or the path of a .npy file holding them.
+                              mu: float,                          # Gravitational parameter
+                              scaler: Optional[Dict[str, Any]] = None,  # Scaler to undo, from `fit_feature_scaler`.
+                              channels_last: bool = False,        # Orbits are stored as (N, T, channels), as the model outputs them.
+                              time_step: Optional[float] = None,  # Time step if the orbits have no time row.
+                              output_path: Optional[str] = None,  # Optional .parquet or .npz file for the score table.
+                              top_k: int = 10,                    # Number of most consistent orbits to return.
+                              chunk_size: int = 256,              # Number of orbits processed at a time.
+                              **kwargs                            # Additional keyword arguments for `prop_nodes`.
+                             ) -> Tuple[pd.DataFrame,             # Per-orbit defects, score and rank.
+                                        np.ndarray]:              # The `top_k` best orbits, (top_k, 7, T) in original units.
+    """
+    Screen generated orbits without plotting. Every orbit gets its cumulative position, velocity and energy defects;
+    the score is the mean position plus velocity defect per time step, and rank 1 is the most physically consistent orbit.
+    Orbits are read, inverse-scaled and propagated `chunk_size` at a time, so large `.npy` files are memory-mapped.
+    """
+    data = np.load(generated, mmap_mode='r') if isinstance(generated, str) else generated
+
+    columns = {name: np.empty(len(data)) for name in ['position_defect', 'velocity_defect', 'energy_defect', 'score']}
+    monotonic_time = np.empty(len(data), dtype=bool)
+    for start in range(0, len(data), chunk_size):
+        orbits = _prepare_generated_orbits(data[start:start + chunk_size], scaler, channels_last, time_step)
+        block = slice(start, start + len(orbits))
+        position, velocity = dynamics_defects(orbits, mu, **kwargs)
+        jacobi = jacobi_constants(orbits[:, 1:, :].transpose(0, 2, 1), mu)
+        columns['position_defect'][block] = position
+        columns['velocity_defect'][block] = velocity
+        columns['energy_defect'][block] = np.abs(jacobi - jacobi[:, :1]).sum(axis=1)
+        columns['score'][block] = (position + velocity) / (orbits.shape[2] - 1)
+        monotonic_time[block] = np.all(np.diff(orbits[:, 0, :], axis=1) > 0, axis=1)
+
+    scores = pd.DataFrame(columns)
+    scores['monotonic_time'] = monotonic_time
+    scores['rank'] = scores['score'].rank(method='first').astype(int)
+    scores.index.name = 'orbit_index'
+
+    if output_path is not None:
+        _save_score_table(scores, output_path)
+
+    best = scores.nsmallest(top_k, 'score').index.to_numpy()
+    top_orbits = _prepare_generated_orbits(take_orbits(data, best), scaler, channels_last, time_step)
+    return scores, top_orbits
@@ -1,15 +1,19 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/03_visualization.ipynb.
 
 # %% auto 0
-__all__ = ['visualize_static_orbits', 'export_dynamic_orbits_html', 'plot_grouped_features', 'plot_value_proportions']
+__all__ = ['visualize_static_orbits', 'export_dynamic_orbits_html', 'compute_grouped_aggregates', 'plot_grouped_features',
+           'compute_value_proportions', 'plot_value_proportions']
 
 # %% ../nbs/03_visualization.ipynb 2
+import os
+import base64
+import weakref
 import numpy as np
-import plotly.graph_objects as go
 import matplotlib.pyplot as plt
+from matplotlib.lines import Line2D
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
 import pandas as pd
-import seaborn as sns
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Union, Any, Hashable
 
 # %% ../nbs/03_visualization.ipynb 6
 def visualize_static_orbits(data: np.ndarray,  # The orbit data with shape (num_orbits, 6, num_time_points).
@@ -18,10 +22,15 @@ def visualize_static_orbits(data: np.ndarray,  # The orbit data with shape (num_
                             point_dict: Optional[Dict[str, tuple]] = None,  # Dictionary of extra points to plot.
                             show_legend: bool = True,  # Flag to indicate whether to show a legend.
                             save_path: Optional[str] = None,  # Path to save the figure; defaults to None.
-                            plot_reference_box: bool = True  # Flag to indicate whether to plot the reference box.
-                           ) -> None:
+                            plot_reference_box: bool = True,  # Flag to indicate whether to plot the reference box.
+                            fast: bool = False,  # Draw all orbits as one Line3DCollection and all highlights as one scatter.
+                            max_orbits: Optional[int] = None,  # Budget of orbits to draw; the selection is evenly subsampled.
+                            decimate: int = 1,  # Keep every `decimate`-th time point of the orbit lines.
+                            show: bool = True  # Display the figure; when False it is returned instead.
+                           ) -> Optional[plt.Figure]:
     """
     Visualizes orbits in 3D space and highlights specified time instants for each selected orbit.
+    The `fast` path renders whole orbit families in a couple of draw calls instead of one per orbit and instant.
     """
     
     # Use Matplotlib's Computer Modern font
@@ -50,23 +59,52 @@ def visualize_static_orbits(data: np.ndarray,  # The orbit data with shape (num_
             if index < 0 or index >= num_orbits:
                 raise ValueError(f"Orbit index {index} is out of range.")
 
+    if decimate < 1:
+        raise ValueError("decimate must be a positive integer.")
+
+    # Subsample the selection evenly if it exceeds the orbit budget.
+    if max_orbits is not None and len(orbit_indices) > max_orbits:
+        keep = np.linspace(0, len(orbit_indices) - 1, num=max_orbits).round().astype(int)
+        orbit_indices = [orbit_indices[i] for i in keep]
+
     # Setup a 3D plot.
     fig = plt.figure(figsize=(10, 8))
     ax = fig.add_subplot(111, projection='3d')
 
-    # Plot each selected orbit.
-    for index in orbit_indices:
-        X = data[index, 0, :]  # X coordinates
-        Y = data[index, 1, :]  # Y coordinates
-        Z = data[index, 2, :]  # Z coordinates
-        ax.plot(X, Y, Z, label=f'Orbit {index}', alpha=0.5)  # Plot each orbit with a label.
-
     # Generate a color map for time instants if they exist.
     colors = plt.cm.jet(np.linspace(0, 1, len(time_instants)))
+    legend_proxies = []  # Legend entries for artists drawn without individual labels
+
+    if fast:
+        selected = np.asarray(orbit_indices, dtype=int)
+
+        # Draw every orbit as a polyline of a single collection, shape (num_selected, num_points, 3).
+        segments = np.transpose(data[selected, 0:3, ::decimate], (0, 2, 1))
+        cycle = plt.rcParams['axes.prop_cycle'].by_key()['color']
+        line_colors = [cycle[i % len(cycle)] for i in range(len(selected))]
+        ax.add_collection3d(Line3DCollection(segments, colors=line_colors, alpha=0.5, label='Orbits'))
+        if not plot_reference_box:
+            ax.auto_scale_xyz(segments[..., 0], segments[..., 1], segments[..., 2])
+
+        # Draw every highlighted (time instant, orbit) pair in one scatter with a color array.
+        if time_instants:
+            points = data[selected[:, None], 0:3, np.asarray(time_instants)[None, :]]  # (num_selected, num_instants, 3)
+            point_colors = np.broadcast_to(colors[None, :, :], (len(selected), len(time_instants), 4))
+            ax.scatter(points[..., 0].ravel(), points[..., 1].ravel(), points[..., 2].ravel(),
+                       c=point_colors.reshape(-1, 4), s=100, zorder=5)
+            legend_proxies = [Line2D([], [], color=color, marker='o', linestyle='', markersize=10, label=f'Time {time_instant}')
+                              for time_instant, color in zip(time_instants, colors)]
+    else:
+        # Plot each selected orbit.
+        for index in orbit_indices:
+            X = data[index, 0, ::decimate]  # X coordinates
+            Y = data[index, 1, ::decimate]  # Y coordinates
+            Z = data[index, 2, ::decimate]  # Z coordinates
+            ax.plot(X, Y, Z, label=f'Orbit {index}', alpha=0.5)  # Plot each orbit with a label.
 
     # Highlight specified time instants and add to the legend.
     legend_added = set()  # Track which labels have been added to the legend
-    if time_instants:
+    if time_instants and not fast:
         for time_instant, color in zip(time_instants, colors):
             for index in orbit_indices:
                 posx, posy, posz = data[index, 0:3, time_instant]
@@ -90,7 +128,8 @@ def visualize_static_orbits(data: np.ndarray,  # The orbit data with shape (num_
 
     # Display the legend if requested.
     if show_legend:
-        ax.legend()
+        handles, _ = ax.get_legend_handles_labels()
+        ax.legend(handles=handles + legend_proxies)
 
     # Set the background color and plot reference box if requested.
     if plot_reference_box:
@@ -111,56 +150,56 @@ def visualize_static_orbits(data: np.ndarray,  # The orbit data with shape (num_
     if save_path:
         plt.savefig(save_path)
 
-    # Show the plot.
+    # Show the plot or hand it back to the caller.
+    if not show:
+        return fig
     plt.show()
 
-# %% ../nbs/03_visualization.ipynb 13
-def export_dynamic_orbits_html(data: np.ndarray,  # Orbit data as a 3D numpy array (num_orbits, 6, num_time_points).
-                               time_instants: Optional[List[int]] = None,  # Time instants to highlight.
-                               orbit_indices: Optional[List[int]] = None,  # Indices of orbits to visualize.
-                               point_dict: Optional[Dict[str, tuple]] = None,  # Named points as a dict with 3D coordinates.
-                               filename: str = 'orbits.html'  # Path and name of the file to save the HTML plot.
-                               ) -> None:
+# %% ../nbs/03_visualization.ipynb 15
+def _typed_array(values: np.ndarray  # Coordinates to embed in the figure.
+                ) -> Dict[str, str]:  # Plotly.js typed array specification.
     """
-    Generates an interactive 3D visualization of orbits and saves it as an HTML file, including the ability to
-    highlight specific time instants and show named points.
+    Encode an array as a base64 float32 typed array understood by plotly.js.
     """
-    if time_instants is None:
-        time_instants = []  # Ensure time_instants is initialized if None.
+    values = np.ascontiguousarray(values, dtype='<f4')
+    return {'dtype': 'f4', 'bdata': base64.b64encode(values.tobytes()).decode('ascii')}
 
-    num_orbits = data.shape[0]  # Total number of orbits in the dataset.
-    if orbit_indices is None:
-        orbit_indices = list(range(num_orbits))  # Default to visualizing all orbits if none specified.
+# %% ../nbs/03_visualization.ipynb 16
+def _build_orbits_figure(data: np.ndarray,  # Orbit data as a 3D numpy array (num_orbits, 6, num_time_points).
+                         time_instants: List[int],  # Time instants to highlight.
+                         orbit_indices: List[int],  # Indices of orbits to visualize.
+                         point_dict: Optional[Dict[str, tuple]],  # Named points as a dict with 3D coordinates.
+                         binary: bool  # Embed coordinates as base64 float32 typed arrays.
+                        ) -> 'go.Figure':
+    """
+    Build the plotly figure used by `export_dynamic_orbits_html` for a selection of orbits.
+    """
+    import plotly.graph_objects as go  # Imported on first use to keep module import light.
 
+    encode = _typed_array if binary else (lambda values: values)
     fig = go.Figure()  # Initialize the plotly figure.
 
-    # Validate and plot each orbit.
+    # Plot each orbit.
     for index in orbit_indices:
-        if index < 0 or index >= num_orbits:
-            raise ValueError(f"Orbit index {index} is out of range.")
-        
         # Extract coordinates for the plot.
         X = data[index, 0, :]  # X coordinates.
         Y = data[index, 1, :]  # Y coordinates.
         Z = data[index, 2, :]  # Z coordinates.
-        fig.add_trace(go.Scatter3d(x=X, y=Y, z=Z, mode='lines',
+        fig.add_trace(go.Scatter3d(x=encode(X), y=encode(Y), z=encode(Z), mode='lines',
                                    name=f'Orbit {index}',
                                    legendgroup=f'orbit{index}',
                                    showlegend=True))
 
         # Highlight specific time instants.
-        if time_instants:
-            for timestamp in time_instants:
-                if timestamp < 0 or timestamp >= data.shape[2]:
-                    raise ValueError(f"The provided timestamp {timestamp} is out of range.")
-                highlight_x = [data[index, 0, timestamp]]
-                highlight_y = [data[index, 1, timestamp]]
-                highlight_z = [data[index, 2, timestamp]]
-                fig.add_trace(go.Scatter3d(x=highlight_x, y=highlight_y, z=highlight_z, mode='markers',
-                                           marker=dict(size=5, color='red'),
-                                           name=f'Highlight {index} @ {timestamp}',
-                                           legendgroup=f'orbit{index}',
-                                           showlegend=False))
+        for timestamp in time_instants:
+            highlight_x = encode(data[index, 0, [timestamp]])
+            highlight_y = encode(data[index, 1, [timestamp]])
+            highlight_z = encode(data[index, 2, [timestamp]])
+            fig.add_trace(go.Scatter3d(x=highlight_x, y=highlight_y, z=highlight_z, mode='markers',
+                                       marker=dict(size=5, color='red'),
+                                       name=f'Highlight {index} @ {timestamp}',
+                                       legendgroup=f'orbit{index}',
+                                       showlegend=False))
 
     # Add additional points from point_dict to the plot.
     if point_dict:
@@ -175,24 +214,198 @@ def export_dynamic_orbits_html(data: np.ndarray,  # Orbit data as a 3D numpy arr
                       width=800, height=600,
                       legend_title="Orbits Legend",
                       clickmode='event+select')
+    return fig
+
+# %% ../nbs/03_visualization.ipynb 17
+def export_dynamic_orbits_html(data: np.ndarray,  # Orbit data as a 3D numpy array (num_orbits, 6, num_time_points).
+                               time_instants: Optional[List[int]] = None,  # Time instants to highlight.
+                               orbit_indices: Optional[List[int]] = None,  # Indices of orbits to visualize.
+                               point_dict: Optional[Dict[str, tuple]] = None,  # Named points as a dict with 3D coordinates.
+                               filename: str = 'orbits.html',  # Path and name of the file to save the HTML plot.
+                               binary: bool = False,  # Embed coordinates as base64 float32 typed arrays instead of JSON text.
+                               include_plotlyjs: Union[bool, str] = True,  # True inlines plotly.js; 'cdn', 'directory' or a path to a local plotly.min.js references it.
+                               orbits_per_file: Optional[int] = None  # Maximum orbits per HTML file; larger exports are sharded behind an index page.
+                               ) -> List[str]:  # Paths of the written HTML files.
+    """
+    Generates an interactive 3D visualization of orbits and saves it as an HTML file, including the ability to
+    highlight specific time instants and show named points. Large exports can be written in a compact binary
+    encoding and split into several files linked from an index page at `filename`.
+    """
+    if time_instants is None:
+        time_instants = []  # Ensure time_instants is initialized if None.
+
+    num_orbits = data.shape[0]  # Total number of orbits in the dataset.
+    if orbit_indices is None:
+        orbit_indices = list(range(num_orbits))  # Default to visualizing all orbits if none specified.
+    orbit_indices = list(orbit_indices)
+
+    # Validate the selection before building any figure.
+    for index in orbit_indices:
+        if index < 0 or index >= num_orbits:
+            raise ValueError(f"Orbit index {index} is out of range.")
+    for timestamp in time_instants:
+        if timestamp < 0 or timestamp >= data.shape[2]:
+            raise ValueError(f"The provided timestamp {timestamp} is out of range.")
+    if orbits_per_file is not None and orbits_per_file < 1:
+        raise ValueError("orbits_per_file must be a positive integer.")
+
+    # Write a single file when no sharding is needed.
+    if orbits_per_file is None or len(orbit_indices) <= orbits_per_file:
+        fig = _build_orbits_figure(data, time_instants, orbit_indices, point_dict, binary)
+        fig.write_html(filename, include_plotlyjs=include_plotlyjs)
+        print(f"Visualization saved to {filename}")
+        return [filename]
+
+    # Shard the orbits into several files and link them from an index page.
+    stem, extension = os.path.splitext(filename)
+    shard_files, links = [], []
+    for start in range(0, len(orbit_indices), orbits_per_file):
+        shard_indices = orbit_indices[start:start + orbits_per_file]
+        shard_file = f"{stem}_part{len(shard_files)}{extension}"
+        fig = _build_orbits_figure(data, time_instants, shard_indices, point_dict, binary)
+        fig.write_html(shard_file, include_plotlyjs=include_plotlyjs)
+        shard_files.append(shard_file)
+        links.append(f'<li><a href="{os.path.basename(shard_file)}">Orbits {shard_indices[0]} - {shard_indices[-1]}</a></li>')
+
+    links = '\n'.join(links)
+    with open(filename, 'w') as index_file:
+        index_file.write(f"<html>\n<head><title>3D Orbits Visualization</title></head>\n<body>\n"
+                         f"<h1>3D Orbits Visualization</h1>\n<ul>\n{links}\n</ul>\n</body>\n</html>\n")
+    print(f"Visualization saved to {filename} ({len(shard_files)} files)")
+    return [filename] + shard_files
+
+# %% ../nbs/03_visualization.ipynb 23
+_AGGREGATE_CACHE: Dict[tuple, tuple] = {}  # Aggregates keyed by DataFrame identity and arguments, with a weak reference to the frame and a fingerprint of its contents.
+_FINGERPRINT_ROWS = 1024  # Rows hashed to fingerprint a DataFrame when the caller passes no fingerprint.
+
+def _cached_aggregate(df: pd.DataFrame,  # DataFrame the aggregate is computed from.
+                      key: tuple,        # Arguments identifying the aggregate.
+                      columns: List[str], # Columns the aggregate reads, fingerprinted to notice in-place changes.
+                      fingerprint: Optional[Hashable], # Caller's identifier of the contents of `df`, or None to sample them.
+                      compute,           # Function computing the aggregate when it is not cached.
+                      use_cache: bool    # Whether to look up and store the aggregate in the cache.
+                     ) -> Any:
+    """
+    Return an aggregate of `df` from the cache, computing and storing it on a miss.
+    Without a fingerprint from the caller, the shape and a strided sample of at most about `_FINGERPRINT_ROWS` rows
+    of the columns read are hashed: lookups stay cheap on large frames and catch most in-place changes (or a new
+    frame reusing the id). Edits the sample can miss need a new `fingerprint`, e.g. a version number, or no cache.
+    Entries are dropped once their DataFrame is garbage collected.
+    """
+    if not use_cache:
+        return compute()
+    key = (id(df),) + key
+    if fingerprint is None:
+        sample = df[list(columns)].iloc[::max(1, len(df) // _FINGERPRINT_ROWS)]
+        fingerprint = (df.shape, hash(pd.util.hash_pandas_object(sample).to_numpy().tobytes()))
+    if key in _AGGREGATE_CACHE:
+        frame_ref, cached_fingerprint, aggregate = _AGGREGATE_CACHE[key]
+        if frame_ref() is df and cached_fingerprint == fingerprint:
+            return aggregate
+
+    # Drop entries of DataFrames that no longer exist before storing the new one.
+    for stale_key in [k for k, (frame_ref, _, _) in _AGGREGATE_CACHE.items() if frame_ref() is None]:
+        del _AGGREGATE_CACHE[stale_key]
+    aggregate = compute()
+    _AGGREGATE_CACHE[key] = (weakref.ref(df), fingerprint, aggregate)
+    return aggregate
+
+# %% ../nbs/03_visualization.ipynb 24
+def compute_grouped_aggregates(df: pd.DataFrame,       # DataFrame containing the data.
+                               columns: List[str],     # List of column names to aggregate.
+                               group_col: str,         # Column name to group by.
+                               bins: int = 20,         # Number of histogram bins per group.
+                               use_cache: bool = True, # Reuse the aggregates computed earlier for the same DataFrame.
+                               fingerprint: Optional[Hashable] = None  # Identifies the contents of `df` for the cache, sampled rows are hashed when None.
+                              ) -> Dict[str, Any]:
+    """
+    Compute in a single grouped pass the summary statistics (count, min, max, quartiles and box plot whiskers),
+    the box plot fliers and per-group histograms of the given columns. The groups are handled through categorical codes.
+    The result is cached per DataFrame and recomputed when the grouped columns change (see `_cached_aggregate`).
+    """
+    def compute():
+        groups = df[group_col].astype('category').cat.remove_unused_categories()
+        codes = groups.cat.codes.to_numpy()
+        num_groups = len(groups.cat.categories)
+
+        # Count, extremes and quartiles of every column for every group.
+        grouped = df[columns].groupby(groups, observed=True)
+        summary = grouped.agg(['count', 'min', 'max'])
+        quartiles = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+        for column in columns:
+            summary[(column, 'q1')] = quartiles[(column, 0.25)]
+            summary[(column, 'median')] = quartiles[(column, 0.5)]
+            summary[(column, 'q3')] = quartiles[(column, 0.75)]
 
-    # Write the plot to an HTML file.
-    fig.write_html(filename)
-    print(f"Visualization saved to {filename}")
+        histograms, fliers = {}, {}
+        valid_group = codes >= 0
+        for column in columns:
+            values = df[column].to_numpy(dtype=float)
+            valid = valid_group & np.isfinite(values)
+            group_codes, group_values = codes[valid], values[valid]
+
+            # Whiskers reach the most extreme values within 1.5 IQR of the quartiles, as in Matplotlib.
+            q1 = summary[(column, 'q1')].to_numpy()
+            q3 = summary[(column, 'q3')].to_numpy()
+            low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+            inside_low = group_values >= low[group_codes]
+            inside_high = group_values <= high[group_codes]
+            whislo = np.full(num_groups, np.inf)
+            whishi = np.full(num_groups, -np.inf)
+            np.minimum.at(whislo, group_codes[inside_low], group_values[inside_low])
+            np.maximum.at(whishi, group_codes[inside_high], group_values[inside_high])
+            summary[(column, 'whislo')] = np.minimum(whislo, q1)
+            summary[(column, 'whishi')] = np.maximum(whishi, q3)
+
+            # Values beyond the whiskers are drawn as fliers, split by group.
+            outside = ~(inside_low & inside_high)
+            order = np.argsort(group_codes[outside], kind='stable')
+            splits = np.cumsum(np.bincount(group_codes[outside], minlength=num_groups))[:-1]
+            fliers[column] = np.split(group_values[outside][order], splits)
+
+            # Histograms over the range of each group, as plt.hist would use on the group alone.
+            lower = summary[(column, 'min')].to_numpy(dtype=float)
+            upper = summary[(column, 'max')].to_numpy(dtype=float)
+            constant = lower == upper
+            lower, upper = np.where(constant, lower - 0.5, lower), np.where(constant, upper + 0.5, upper)
+            edges = np.linspace(lower, upper, bins + 1, axis=1)
+            position = (group_values - lower[group_codes]) / (upper - lower)[group_codes] * bins
+            bin_index = np.clip(position.astype(int), 0, bins - 1)
+            counts = np.bincount(group_codes * bins + bin_index, minlength=num_groups * bins)
+            histograms[column] = (counts.reshape(num_groups, bins), edges)
+
+        return {'groups': list(groups.cat.categories), 'summary': summary.sort_index(axis=1),
+                'histograms': histograms, 'fliers': fliers}
 
-# %% ../nbs/03_visualization.ipynb 18
+    return _cached_aggregate(df, ('grouped', tuple(columns), group_col, bins), [group_col] + list(columns),
+                             fingerprint, compute, use_cache)
+
+# %% ../nbs/03_visualization.ipynb 25
 def plot_grouped_features(df: pd.DataFrame,               # DataFrame containing the data.
                           columns: List[str],             # List of column names to plot.
                           group_col: str,                 # Column name to group by.
-                          plot_type: str                  # Type of plot: 'violin', 'box', 'facetgrid', or 'histogram'
-                         ) -> None:
+                          plot_type: str,                 # Type of plot: 'violin', 'box', 'facetgrid', or 'histogram'
+                          show: bool = True,              # Display the figures; when False they are returned instead.
+                          use_cache: bool = True,         # Reuse the grouped aggregates computed earlier for this DataFrame.
+                          fingerprint: Optional[Hashable] = None  # Identifies the contents of `df` for the cache, see `compute_grouped_aggregates`.
+                         ) -> Optional[List[plt.Figure]]:
     """
     Group the DataFrame by a specified column and plot the specified type of plot for each column for each group.
+    Box plots and histograms are drawn from aggregates computed once per DataFrame (see `compute_grouped_aggregates`).
     """
     if plot_type not in ['violin', 'box', 'facetgrid', 'histogram']:
         raise ValueError("plot_type must be one of 'violin', 'box', 'facetgrid', or 'histogram'")
+
+    figures = []  # Figures kept when they are not shown
+
+    if plot_type != 'violin':
+        aggregates = compute_grouped_aggregates(df, columns, group_col, use_cache=use_cache, fingerprint=fingerprint)
+        group_names, summary, histograms = aggregates['groups'], aggregates['summary'], aggregates['histograms']
+        fliers = aggregates['fliers']
     
     if plot_type in ['violin', 'box']:
+        import seaborn as sns  # Imported on first use to keep module import light.
+
         # Set up the matplotlib figure
         fig, axs = plt.subplots(1, len(columns), figsize=(5 * len(columns), 5))
         
@@ -203,32 +416,53 @@ def plot_grouped_features(df: pd.DataFrame,               # DataFrame containing
         # Plot each specified column
         for i, column in enumerate(columns):
             if plot_type == 'violin':
-                sns.violinplot(x=group_col, y=column, data=df, ax=axs[i])
+                # Violins need the raw values; a categorical grouping keeps the split cheap
+                sns.violinplot(x=df[group_col].astype('category'), y=df[column], ax=axs[i])
                 axs[i].set_title(f'Violin plot of {column.capitalize()} by {group_col.capitalize()}')
             elif plot_type == 'box':
-                sns.boxplot(x=group_col, y=column, data=df, ax=axs[i])
+                box_stats = [{'label': group_name,
+                              'med': summary.loc[group_name, (column, 'median')],
+                              'q1': summary.loc[group_name, (column, 'q1')],
+                              'q3': summary.loc[group_name, (column, 'q3')],
+                              'whislo': summary.loc[group_name, (column, 'whislo')],
+                              'whishi': summary.loc[group_name, (column, 'whishi')],
+                              'fliers': fliers[column][g]}
+                             for g, group_name in enumerate(group_names)]
+                axs[i].bxp(box_stats, showfliers=True, patch_artist=True,
+                           boxprops=dict(facecolor=sns.color_palette()[0]))
                 axs[i].set_title(f'Box plot of {column.capitalize()} by {group_col.capitalize()}')
             axs[i].set_xlabel(group_col.capitalize())
             axs[i].set_ylabel(column.capitalize())
         
         # Adjust layout and show the plot
         plt.tight_layout()
-        plt.show()
+        if show:
+            plt.show()
+        else:
+            figures.append(fig)
 
     elif plot_type == 'facetgrid':
         for column in columns:
-            g = sns.FacetGrid(df, col=group_col, col_wrap=4, height=4, sharex=False, sharey=False)
-            g.map(plt.hist, column, bins=20, edgecolor='black')
-            g.set_axis_labels(column.capitalize(), 'Frequency')
-            g.set_titles(col_template=f"{column.capitalize()} | {{col_name}} {group_col}")
-            plt.show()
+            counts, edges = histograms[column]
+            num_cols = min(len(group_names), 4)  # Wrap the facets in rows of four
+            num_rows = -(-len(group_names) // num_cols)
+            fig, axs = plt.subplots(num_rows, num_cols, figsize=(4 * num_cols, 4 * num_rows), squeeze=False)
+            for ax in axs.flat[len(group_names):]:
+                ax.set_visible(False)
+            for g, (group_name, ax) in enumerate(zip(group_names, axs.flat)):
+                ax.bar(edges[g, :-1], counts[g], width=np.diff(edges[g]), align='edge', edgecolor='black')
+                ax.set_title(f"{column.capitalize()} | {group_name} {group_col}")
+                ax.set_xlabel(column.capitalize())
+                ax.set_ylabel('Frequency')
+            plt.tight_layout()
+            if show:
+                plt.show()
+            else:
+                figures.append(fig)
 
     elif plot_type == 'histogram':
-        # Group by the specified column
-        grouped = df.groupby(group_col)
-
         # Plot histograms for each group
-        for group_name, group in grouped:
+        for g, group_name in enumerate(group_names):
             num_columns = len(columns)
             fig, axs = plt.subplots(1, num_columns, figsize=(5 * num_columns, 5))
             
@@ -238,7 +472,8 @@ def plot_grouped_features(df: pd.DataFrame,               # DataFrame containing
             
             # Plot each specified column
             for i, column in enumerate(columns):
-                axs[i].hist(group[column], bins=20, edgecolor='black')
+                counts, edges = histograms[column]
+                axs[i].bar(edges[g, :-1], counts[g], width=np.diff(edges[g]), align='edge', edgecolor='black')
                 axs[i].set_title(f'{column.capitalize()} for {group_col.capitalize()}: {group_name}')
                 axs[i].set_xlabel(column.capitalize())
                 axs[i].set_ylabel('Frequency')
@@ -246,38 +481,65 @@ def plot_grouped_features(df: pd.DataFrame,               # DataFrame containing
             
             # Adjust layout and show the plot
             plt.tight_layout()
-            plt.show()
+            if show:
+                plt.show()
+            else:
+                figures.append(fig)
+
+    if not show:
+        return figures
+
+# %% ../nbs/03_visualization.ipynb 26
+def compute_value_proportions(df: pd.DataFrame,       # DataFrame containing the data.
+                              values_list: List[int], # List of ID values to filter the DataFrame.
+                              id_col: str,            # Column name to be used as ID.
+                              use_cache: bool = True, # Reuse the counts computed earlier for the same DataFrame and IDs.
+                              fingerprint: Optional[Hashable] = None  # Identifies the contents of `df` for the cache, sampled rows are hashed when None.
+                             ) -> Dict[str, pd.Series]:  # Value counts of every column except the ID column.
+    """
+    Filter the DataFrame once on values_list and count the values of every other column.
+    The result is cached per DataFrame and recomputed when its contents change (see `_cached_aggregate`).
+    """
+    def compute():
+        filtered_df = df[df[id_col].isin(values_list)]
+        return {column: filtered_df[column].value_counts() for column in df.columns if column != id_col}
+
+    return _cached_aggregate(df, ('proportions', tuple(values_list), id_col), list(df.columns),
+                             fingerprint, compute, use_cache)
 
-# %% ../nbs/03_visualization.ipynb 19
+# %% ../nbs/03_visualization.ipynb 27
 def plot_value_proportions(df: pd.DataFrame,             # DataFrame containing the data.
                            values_list: List[int],       # List of ID values to filter the DataFrame.
-                           id_col: str                   # Column name to be used as ID.
-                          ) -> None:
+                           id_col: str,                  # Column name to be used as ID.
+                           show: bool = True,            # Display the figure; when False it is returned instead.
+                           use_cache: bool = True,       # Reuse the counts computed earlier for this DataFrame and IDs.
+                           fingerprint: Optional[Hashable] = None  # Identifies the contents of `df` for the cache, see `compute_value_proportions`.
+                          ) -> Optional[plt.Figure]:
     """
     Filter the DataFrame based on values_list and plot pie charts for each column except the ID column.
     The total number of unique values in each column is displayed in the middle of each pie chart.
     """
-    # Filter the DataFrame to include only the rows with IDs in values_list
-    filtered_df = df[df[id_col].isin(values_list)]
+    # Count the values of every column on the filtered DataFrame
+    value_counts = compute_value_proportions(df, values_list, id_col, use_cache=use_cache, fingerprint=fingerprint)
     
     # Number of columns to plot
-    num_cols = len(df.columns) - 1  # Excluding the ID column
+    num_cols = len(value_counts)  # Excluding the ID column
     
     # Create a figure with subplots arranged horizontally
     fig, axes = plt.subplots(1, num_cols, figsize=(num_cols * 6, 6))
+    axes = np.atleast_1d(axes)
     
     # Plot pie charts for each column except the ID column
-    for i, column in enumerate(df.columns):
-        if column == id_col:
-            continue
-        values = filtered_df[column].value_counts()
-        axes[i-1].pie(values, labels=values.index, autopct='%1.1f%%', startangle=140)
-        axes[i-1].set_title(f'Proportion of values in {column}')
-        axes[i-1].axis('equal')  # Equal aspect ratio ensures the pie is drawn as a circle.
+    for ax, (column, values) in zip(axes, value_counts.items()):
+        ax.pie(values, labels=values.index, autopct='%1.1f%%', startangle=140)
+        ax.set_title(f'Proportion of values in {column}')
+        ax.axis('equal')  # Equal aspect ratio ensures the pie is drawn as a circle.
         
         # Calculate and print the total number of classes in the middle
         total_classes = len(values)
-        axes[i-1].text(0, 0, str(total_classes), ha='center', va='center', fontsize=12, weight='bold')
+        ax.text(0, 0, str(total_classes), ha='center', va='center', fontsize=12, weight='bold')
     
     plt.tight_layout()
+    if not show:
+        return fig
     plt.show()